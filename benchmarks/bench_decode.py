@@ -0,0 +1,127 @@
+# Throughput benchmark for Si4467Analyzer.decode
+# Usage: python benchmarks/bench_decode.py [--iterations N] [--baseline FILE] [--save-baseline]
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from si4467_analyzer import COMMAND_ID_TO_NAME, Si4467Analyzer  # noqa: E402
+from traffic import Transaction, generate  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def measure_throughput(transactions: List[Transaction], repeat: int) -> Dict[str, float]:
+    frames = [frame for _, transaction_frames in transactions for frame in transaction_frames]
+    best = None
+    produced = 0
+    for _ in range(repeat):
+        decode = Si4467Analyzer().decode
+        produced = 0
+        start = time.perf_counter()
+        for frame in frames:
+            if decode(frame) is not None:
+                produced += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "input_frames": len(frames),
+        "output_calls": produced,
+        "seconds": best,
+        "frames_per_second": len(frames) / best,
+    }
+
+
+def measure_per_command(transactions: List[Transaction], repeat: int) -> Dict[str, float]:
+    """Microseconds spent in decode() per input frame, grouped by command (best of `repeat` runs)."""
+    clock = time.perf_counter
+    best = {}
+    for _ in range(repeat):
+        decode = Si4467Analyzer().decode
+        elapsed = defaultdict(float)
+        frame_count = defaultdict(int)
+        for command_id, frames in transactions:
+            start = clock()
+            for frame in frames:
+                decode(frame)
+            elapsed[command_id] += clock() - start
+            frame_count[command_id] += len(frames)
+        for command_id in elapsed:
+            us = elapsed[command_id] / frame_count[command_id] * 1e6
+            best[command_id] = min(us, best.get(command_id, us))
+    return {COMMAND_ID_TO_NAME.get(command_id, f"0x{command_id:02x}"): best[command_id] for command_id in sorted(best)}
+
+
+def measure_peak_memory(transactions: List[Transaction]) -> int:
+    frames = [frame for _, transaction_frames in transactions for frame in transaction_frames]
+    analyzer = Si4467Analyzer()
+    tracemalloc.start()
+    try:
+        for frame in frames:
+            analyzer.decode(frame)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> bool:
+    ok = True
+    reference = baseline["frames_per_second"]
+    ratio = results["frames_per_second"] / reference
+    print(f"\nvs. baseline: {ratio:.2f}x frames/s ({reference:,.0f} frames/s recorded)")
+    if ratio < 1.0 - tolerance:
+        print("  REGRESSION: overall throughput")
+        ok = False
+    for name, us in results["us_per_frame"].items():
+        if name not in baseline["us_per_frame"]:
+            continue
+        reference_us = baseline["us_per_frame"][name]
+        flag = ""
+        if us > reference_us * (1.0 + tolerance):
+            flag = "  REGRESSION"
+            ok = False
+        print(f"  {name:<22} {reference_us:8.3f} -> {us:8.3f} us/frame{flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Throughput benchmark for Si4467Analyzer.decode")
+    parser.add_argument("--iterations", type=int, default=20000, help="driver loop iterations to synthesize")
+    parser.add_argument("--repeat", type=int, default=3, help="throughput runs, the best one counts")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    transactions = generate(args.iterations)
+    results = measure_throughput(transactions, args.repeat)
+    results["us_per_frame"] = measure_per_command(transactions, args.repeat)
+    results["peak_memory_bytes"] = measure_peak_memory(transactions)
+
+    print(f"{results['input_frames']:,} SPI frames in {results['seconds']:.3f} s: "
+          f"{results['frames_per_second']:,.0f} frames/s")
+    print(f"peak memory during decode: {results['peak_memory_bytes'] / 1024:,.1f} KiB")
+    print("us per frame by command:")
+    for name, us in results["us_per_frame"].items():
+        print(f"  {name:<22} {us:8.3f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            return 0 if compare(results, json.load(f), args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# Synthetic EZRadioPRO driver traffic
+# Produces the enable/result/disable frames the Logic 2 SPI analyzer would hand to the HLA for typical host driver
+# activity.
+import os
+import random
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from si4467_analyzer import AnalyzerFrame, Command  # noqa: E402
+
+BYTE_TIME = 1e-6
+BYTE_GAP = 0.2e-6
+NSEL_SETUP = 0.5e-6
+TRANSACTION_GAP = 5e-6
+
+Transaction = Tuple[int, List[AnalyzerFrame]]
+
+
+class TrafficGenerator:
+    """Emits SPI transactions with monotonically increasing timestamps."""
+
+    def __init__(self, seed: int = 4467):
+        self.random = random.Random(seed)
+        self.time = 0.0
+        self.transactions: List[Transaction] = []
+
+    def transaction(self, mosi: Sequence[int], miso: Optional[Sequence[int]] = None) -> None:
+        if miso is None:
+            miso = [0xFF] * len(mosi)
+        frames = [AnalyzerFrame('enable', self.time, self.time, {})]
+        time = self.time + NSEL_SETUP
+        for sent, received in zip(mosi, miso):
+            frames.append(AnalyzerFrame('result', time, time + BYTE_TIME,
+                                        {'mosi': bytes((sent,)), 'miso': bytes((received,))}))
+            time += BYTE_TIME + BYTE_GAP
+        frames.append(AnalyzerFrame('disable', time, time, {}))
+        self.time = time + TRANSACTION_GAP
+        self.transactions.append((mosi[0], frames))
+
+    def wait_for_cts(self, response: Sequence[int] = (), polls: Optional[int] = None) -> None:
+        """READ_CMD_BUFF polling loop, `polls` not-ready reads followed by one ready read."""
+        if polls is None:
+            polls = self.random.randint(0, 6)
+        for _ in range(polls):
+            self.transaction([Command.READ_CMD_BUFF.value, 0x00], [0x00, 0x00])
+        self.transaction([Command.READ_CMD_BUFF.value] + [0x00] * (1 + len(response)),
+                         [0x00, 0xFF] + list(response))
+
+    def get_int_status(self) -> None:
+        self.transaction([Command.GET_INT_STATUS.value, 0x00, 0x00, 0x00])
+        ph_pend = self.random.choice((0x00, 0x10, 0x20, 0x02, 0x01))
+        self.wait_for_cts([0x01 if ph_pend else 0x00, 0x01, ph_pend, ph_pend, 0x00, 0x00, 0x00, 0x04, 0x00])
+
+    def frr_read(self) -> None:
+        command = self.random.choice((Command.FRR_A_READ, Command.FRR_B_READ, Command.FRR_C_READ,
+                                      Command.FRR_D_READ)).value
+        count = self.random.randint(1, 4)
+        self.transaction([command] + [0x00] * count, [0x00] + [self.random.randrange(256) for _ in range(count)])
+
+    def write_tx_fifo(self, length: int = 64) -> None:
+        self.transaction([Command.WRITE_TX_FIFO.value] + [self.random.randrange(256) for _ in range(length)])
+
+    def read_rx_fifo(self, length: int = 64) -> None:
+        self.transaction([Command.READ_RX_FIFO.value] + [0x00] * length,
+                         [0x00] + [self.random.randrange(256) for _ in range(length)])
+
+    def set_property(self, group: int, start: int, values: Sequence[int]) -> None:
+        self.transaction([Command.SET_PROPERTY.value, group, len(values), start] + list(values))
+        self.wait_for_cts()
+
+    def fifo_info(self) -> None:
+        self.transaction([Command.FIFO_INFO.value, 0x00])
+        self.wait_for_cts([self.random.randrange(65), self.random.randrange(65)])
+
+    def configure(self) -> None:
+        """Radio bring-up: a block of SET_PROPERTY commands like the WDS generated configuration array."""
+        for group, start, count in ((0x00, 0x00, 4), (0x01, 0x00, 4), (0x02, 0x00, 4), (0x10, 0x00, 9),
+                                    (0x11, 0x00, 5), (0x12, 0x00, 12), (0x12, 0x0c, 12), (0x20, 0x00, 12),
+                                    (0x20, 0x0c, 12), (0x20, 0x18, 12), (0x21, 0x00, 12), (0x22, 0x00, 4),
+                                    (0x23, 0x00, 7), (0x40, 0x00, 8)):
+            self.set_property(group, start, [self.random.randrange(256) for _ in range(count)])
+
+    def transmit(self) -> None:
+        self.write_tx_fifo()
+        self.transaction([Command.START_TX.value, 0x00, 0x30, 0x00, 0x40, 0x00, 0x00])
+        self.wait_for_cts()
+        self.get_int_status()
+
+    def receive(self) -> None:
+        self.get_int_status()
+        self.fifo_info()
+        self.read_rx_fifo()
+        self.transaction([Command.START_RX.value, 0x00, 0x00, 0x00, 0x00, 0x00, 0x03, 0x03])
+        self.wait_for_cts()
+
+    def driver_mix(self, iterations: int) -> List[Transaction]:
+        """Interrupt driven driver: configuration, then a mix of ISR status reads, FRR reads and packets."""
+        self.configure()
+        for _ in range(iterations):
+            action = self.random.random()
+            if action < 0.35:
+                self.frr_read()
+            elif action < 0.6:
+                self.get_int_status()
+            elif action < 0.75:
+                self.transmit()
+            elif action < 0.9:
+                self.receive()
+            else:
+                self.set_property(0x20, 0x00, [self.random.randrange(256) for _ in range(4)])
+        return self.transactions
+
+
+def generate(iterations: int, seed: int = 4467) -> List[Transaction]:
+    return TrafficGenerator(seed).driver_mix(iterations)
@@ -0,0 +1,110 @@
+# Stand-in for the Logic 2 extension runtime
+# Implements the parts of `saleae.analyzers` and `saleae.data` used by this extension, so the analyzer can be run,
+# profiled and benchmarked outside of Logic 2. Logic 2 always provides the real modules, this one is only picked up
+# when they cannot be imported.
+from typing import Any, Dict, Optional, Sequence
+
+
+class SaleaeTimeDelta(float):
+    """Duration in seconds, `float(delta)` gives the seconds like the real runtime."""
+
+    def __new__(cls, second: float = 0.0, millisecond: float = 0.0, microsecond: float = 0.0,
+                nanosecond: float = 0.0, picosecond: float = 0.0):
+        return float.__new__(cls, second + millisecond * 1e-3 + microsecond * 1e-6 + nanosecond * 1e-9
+                             + picosecond * 1e-12)
+
+    def __add__(self, other):
+        if isinstance(other, SaleaeTime):
+            return NotImplemented
+        return SaleaeTimeDelta(float(self) + float(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return SaleaeTimeDelta(float(self) - float(other))
+
+    def __mul__(self, other):
+        return SaleaeTimeDelta(float(self) * float(other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, SaleaeTimeDelta):
+            return float(self) / float(other)
+        return SaleaeTimeDelta(float(self) / float(other))
+
+    def __neg__(self):
+        return SaleaeTimeDelta(-float(self))
+
+    def __abs__(self):
+        return SaleaeTimeDelta(abs(float(self)))
+
+    def __repr__(self):
+        return f"SaleaeTimeDelta(second={float(self)!r})"
+
+
+class SaleaeTime(float):
+    """Point in time, stored as seconds since capture start."""
+
+    def __new__(cls, second: float = 0.0):
+        return float.__new__(cls, second)
+
+    def __add__(self, other):
+        if isinstance(other, SaleaeTime):
+            return NotImplemented
+        return SaleaeTime(float(self) + float(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, SaleaeTime):
+            return SaleaeTimeDelta(float(self) - float(other))
+        return SaleaeTime(float(self) - float(other))
+
+    def __repr__(self):
+        return f"SaleaeTime({float(self)!r})"
+
+
+class AnalyzerFrame:
+    __slots__ = ("type", "start_time", "end_time", "data")
+
+    def __init__(self, type: str, start_time: SaleaeTime, end_time: SaleaeTime,
+                 data: Optional[Dict[str, Any]] = None):
+        self.type = type
+        self.start_time = start_time
+        self.end_time = end_time
+        self.data = {} if data is None else data
+
+    def __eq__(self, other):
+        if not isinstance(other, AnalyzerFrame):
+            return NotImplemented
+        return (self.type == other.type and self.start_time == other.start_time and
+                self.end_time == other.end_time and self.data == other.data)
+
+    def __repr__(self):
+        return f"AnalyzerFrame({self.type!r}, {self.start_time!r}, {self.end_time!r}, {self.data!r})"
+
+
+class HighLevelAnalyzer:
+    result_types: Dict[str, Dict[str, str]] = {}
+
+    def decode(self, frame: AnalyzerFrame):
+        raise NotImplementedError
+
+
+class ChoicesSetting:
+    def __init__(self, choices: Sequence[str], label: str = ""):
+        self.choices = tuple(choices)
+        self.label = label
+
+
+class NumberSetting:
+    def __init__(self, label: str = "", min_value: Optional[float] = None, max_value: Optional[float] = None):
+        self.label = label
+        self.min_value = min_value
+        self.max_value = max_value
+
+
+class StringSetting:
+    def __init__(self, label: str = ""):
+        self.label = label
@@ -1,18 +1,66 @@
 # High Level Analyzer
 # For more information and documentation, please go to https://support.saleae.com/extensions/high-level-analyzer-extensions
+import copy
 import dataclasses
+import re
+import sys
 from enum import Enum
-from typing import List, Optional, Union
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Union
 
-from saleae.analyzers import HighLevelAnalyzer, AnalyzerFrame
-from saleae.data import SaleaeTime
+try:
+    from saleae.analyzers import HighLevelAnalyzer, AnalyzerFrame, ChoicesSetting
+    from saleae.data import SaleaeTime
+except ImportError:
+    # Not running inside Logic 2 (offline decoding, benchmarks)
+    from saleae_standin import HighLevelAnalyzer, AnalyzerFrame, ChoicesSetting, SaleaeTime
+
+from si4467_crc import PacketCrcChecker
+from si4467_frequency import FrequencyCalculator
+from si4467_packets import TX, Packet, PacketAssembler
+from si4467_properties import (PROPERTY_BYTE_NAMES, PROPERTY_BYTE_POSITIONS, PROPERTY_BYTE_SIZES, PROPERTY_GROUPS,
+                               property_key)
+from si4467_shadow import RadioShadow
+from si4467_state import StateTimeline
+from si4467_stats import CtsStatistics
+from si4467_status import (HEX_BYTE, RESPONSE_PAYLOADS_BY_NAME, FRR_DEFAULT_MODES, FRR_MODE_CURRENT_STATE,
+                           FRR_MODE_INT_PH_PEND, FRR_MODE_INT_PH_STATUS, PH_CRC_ERROR, PH_PACKET_RX, PH_PACKET_SENT,
+                           STATE_NAMES, STATE_NO_CHANGE, STATE_RX, STATE_SLEEP, STATE_SPI_ACTIVE, STATE_TX,
+                           frr_mode_name, frr_mode_payloads, hex_bytes)
 
 
 @dataclasses.dataclass(frozen=True)
-class Byte:
-    value: int
+class Field:
+    """Value spread over several bytes named NAME[hi:lo], most significant byte first."""
+    name: str
+    width: int
+    signed: bool = False
+    scale: float = 1.0
+    offset: float = 0.0
+    unit: str = ""
+
+    def value(self, raw: bytes) -> int:
+        value = int.from_bytes(raw, "big") & ((1 << self.width) - 1)
+        if self.signed and value >> (self.width - 1):
+            value -= 1 << self.width
+        return value
+
+    def render(self, value: int) -> str:
+        if self.unit and self.scale == 1.0 and self.offset == 0.0:
+            return f"{value} {self.unit}"
+        if self.unit:
+            return f"{value * self.scale + self.offset:.4g} {self.unit} ({value})"
+        return f"{value} (0x{value & ((1 << self.width) - 1):0{(self.width + 3) // 4}x})"
+
+
+class Transaction(NamedTuple):
+    """Everything exchanged between NSEL going low and high again, as handed to transaction listeners."""
+    command_id: int
     start_time: SaleaeTime
     end_time: SaleaeTime
+    sent: bytes
+    received: bytes
+    # Command whose reply a READ_CMD_BUFF reads, None if not seen
+    previous_command_id: Optional[int]
 
 
 @dataclasses.dataclass(frozen=True)
@@ -21,6 +69,8 @@ class CommandDescription:
     name: str
     argument_names: Optional[List[str]] = None
     response_names: Optional[List[str]] = None
+    # Multi-byte fields needing more than their width (taken from the byte names) to be shown correctly
+    fields: Optional[List[Field]] = None
 
 
 class Command(Enum):
@@ -42,6 +92,7 @@ class Command(Enum):
     FRR_C_READ = 0x53
     FRR_D_READ = 0x57
     IRCAL_MANUAL = 0x1a
+    START_TX = 0x31
     TX_HOP = 0x37
     WRITE_TX_FIFO = 0x66
     PACKET_INFO = 0x16
@@ -54,11 +105,23 @@ class Command(Enum):
     GET_CHIP_STATUS = 0x23
 
 
+FRR_VALUE_NAMES = ["FRR_A_VALUE", "FRR_B_VALUE", "FRR_C_VALUE", "FRR_D_VALUE"]
+
+
+def _frr_read_description(command_id: int, first_register: int) -> CommandDescription:
+    """FRR reads start at the addressed register and continue with the following ones, wrapping around after D."""
+    name = f"FRR_{'ABCD'[first_register]}_READ"
+    register_count = len(FRR_VALUE_NAMES)
+    responses = [FRR_VALUE_NAMES[(first_register + x) % register_count] for x in range(0, register_count)]
+    return CommandDescription(command_id, name, ["CMD"], ["CTS"] + responses)
+
+
 # @formatter:off
 COMMAND_LIST = [
     CommandDescription(0x02, "POWER_UP",
                        ["CMD", "BOOT_OPTIONS", "XTAL_OPTIONS", "XO_FREQ[31:24]", "XO_FREQ[23:16]", "XO_FREQ[15:8]", "XO_FREQ[7:0]"],
-                       ["CTS"]),
+                       ["CTS"],
+                       [Field("XO_FREQ", 32, unit="Hz")]),
     CommandDescription(0x00, "NOP",
                        ["CMD"],
                        ["CTS"]),
@@ -95,18 +158,10 @@ COMMAND_LIST = [
     CommandDescription(0x44, "READ_CMD_BUFF",
                        ["CMD"],
                        ["CTS"] + [f"BYTE[{x}]" for x in range(0, 16)]),
-    CommandDescription(0x50, "FRR_A_READ",
-                       ["CMD"],
-                       ["CTS", "FRR_A_VALUE", "FRR_B_VALUE", "FRR_C_VALUE", "FRR_D_VALUE"]),
-    CommandDescription(0x51, "FRR_B_READ",
-                       ["CMD"],
-                       ["CTS", "FRR_B_VALUE", "FRR_C_VALUE", "FRR_D_VALUE", "FRR_A_VALUE"]),
-    CommandDescription(0x53, "FRR_C_READ",
-                       ["CMD"],
-                       ["CTS", "FRR_C_VALUE", "FRR_D_VALUE", "FRR_A_VALUE", "FRR_B_VALUE"]),
-    CommandDescription(0x57, "FRR_D_READ",
-                       ["CMD"],
-                       ["CTS", "FRR_D_VALUE", "FRR_A_VALUE", "FRR_B_VALUE", "FRR_C_VALUE", ]),
+    _frr_read_description(0x50, 0),
+    _frr_read_description(0x51, 1),
+    _frr_read_description(0x53, 2),
+    _frr_read_description(0x57, 3),
     CommandDescription(0x17, "IRCAL",
                        ["CMD", "SEARCHING_STEP_SIZE", "SEARCHING_RSSI_AVG", "RX_CHAIN_SETTING1", "RX_CHAIN_SETTING2"],
                        ["CTS"]),
@@ -125,7 +180,8 @@ COMMAND_LIST = [
                        ["CTS", "LENGTH[15:8]", "LENGTH[7:0]"]),
     CommandDescription(0x22, "GET_MODEM_STATUS",
                        ["CMD", "MODEM_CLR_PEND"],
-                       ["CTS", "MODEM_PEND", "MODEM_STATUS", "CURR_RSSI", "LATCH_RSSI", "ANT1_RSSI", "ANT2_RSSI", "AFC_FREQ_OFFSET[15:8]", "AFC_FREQ_OFFSET[7:0]", "INFO_FLAGS"]),
+                       ["CTS", "MODEM_PEND", "MODEM_STATUS", "CURR_RSSI", "LATCH_RSSI", "ANT1_RSSI", "ANT2_RSSI", "AFC_FREQ_OFFSET[15:8]", "AFC_FREQ_OFFSET[7:0]", "INFO_FLAGS"],
+                       [Field("AFC_FREQ_OFFSET", 16, signed=True)]),
     CommandDescription(0x32, "START_RX",
                        ["CMD", "CHANNEL", "CONDITION", "RX_LEN[12:8]", "RX_LEN[7:0]", "RXTIMEOUT_STATE", "RXVALID_STATE", "RXINVALID_STATE"],
                        ["CTS"]),
@@ -135,7 +191,9 @@ COMMAND_LIST = [
     CommandDescription(0x77, "READ_RX_FIFO", ["CMD"]),
     CommandDescription(0x14, "GET_ADC_READING",
                        ["CMD", "ADC_EN", "ADC_CFG"],
-                       ["CTS", "GPIO_ADC[10:8]", "GPIO_ADC[7:0]", "BATTERY_ADC[10:8]", "BATTERY_ADC[7:0]", "TEMP_ADC[10:8]", "TEMP_ADC[7:0]"]),
+                       ["CTS", "GPIO_ADC[10:8]", "GPIO_ADC[7:0]", "BATTERY_ADC[10:8]", "BATTERY_ADC[7:0]", "TEMP_ADC[10:8]", "TEMP_ADC[7:0]"],
+                       [Field("BATTERY_ADC", 11, scale=3 / 1280, unit="V"),
+                        Field("TEMP_ADC", 11, scale=899 / 4096, offset=-293, unit="°C")]),
     CommandDescription(0x21, "GET_PH_STATUS",
                        ["CMD", "PH_CLR_PEND"],
                        ["CTS", "PH_PEND", "PH_STATUS"]),
@@ -156,191 +214,932 @@ COMMANDS_WITH_IMMEDIATE_RESPONSE = [Command.FRR_A_READ.value,
                                     Command.READ_CMD_BUFF.value,
                                     Command.READ_RX_FIFO.value]
 
+# Command IDs compared against for every byte, as plain ints to avoid the Enum attribute lookups
+_READ_CMD_BUFF = Command.READ_CMD_BUFF.value
+_FIFO_INFO = Command.FIFO_INFO.value
+_SET_PROPERTY = Command.SET_PROPERTY.value
+_GET_PROPERTY = Command.GET_PROPERTY.value
+_PACKET_INFO = Command.PACKET_INFO.value
+_POWER_UP = Command.POWER_UP.value
+_GPIO_PIN_CFG = Command.GPIO_PIN_CFG.value
+_WRITE_TX_FIFO = Command.WRITE_TX_FIFO.value
+_READ_RX_FIFO = Command.READ_RX_FIFO.value
+_START_TX = Command.START_TX.value
+_START_RX = Command.START_RX.value
+_GET_INT_STATUS = Command.GET_INT_STATUS.value
+_GET_PH_STATUS = Command.GET_PH_STATUS.value
+_TX_HOP = Command.TX_HOP.value
+_CHANGE_STATE = Command.CHANGE_STATE.value
+_REQUEST_DEVICE_STATE = Command.REQUEST_DEVICE_STATE.value
+_RX_HOP = Command.RX_HOP.value
+_FRR_READS = {Command.FRR_A_READ.value: 0, Command.FRR_B_READ.value: 1, Command.FRR_C_READ.value: 2,
+              Command.FRR_D_READ.value: 3}
+# Transactions which are part of reading out a received packet, any other one ends it
+_RX_READOUT_COMMANDS = {_READ_RX_FIFO, _FIFO_INFO, _PACKET_INFO, _READ_CMD_BUFF, *_FRR_READS}
+# Offset of PH_PEND in the replies (after CTS) of the commands reporting it
+_PH_PEND_OFFSETS = {_GET_INT_STATUS: 3, _GET_PH_STATUS: 1}
+_FRR_PH_MODES = (FRR_MODE_INT_PH_PEND, FRR_MODE_INT_PH_STATUS)
+# Transactions feeding the packet assembler
+_PACKET_COMMANDS = {_WRITE_TX_FIFO, _READ_RX_FIFO, _START_TX, _START_RX, _FIFO_INFO, _READ_CMD_BUFF, *_FRR_READS}
+_NO_PACKETS: List[Packet] = []
+# Transactions tuning the synthesizer, their command frame tells the carrier frequency
+_TUNE_COMMANDS = {_START_TX, _START_RX, _TX_HOP, _RX_HOP}
+# Transactions feeding the packet assembler or state timeline, apart from FRR reads (depending on the FRR modes),
+# READ_CMD_BUFF (depending on the command it reads the reply of) and FIFO_INFO (only when resetting a FIFO)
+_TRACKED_COMMANDS = {_WRITE_TX_FIFO, _READ_RX_FIFO, _START_TX, _START_RX, _CHANGE_STATE}
+_TRACKED_REPLIES = {_GET_INT_STATUS, _GET_PH_STATUS, _REQUEST_DEVICE_STATE}
+# Transactions which can tell packet handler interrupts respectively change the state (besides by those interrupts)
+_INTERRUPT_READS = {_READ_CMD_BUFF, *_FRR_READS}
+_STATE_COMMANDS = {_START_TX, _START_RX, _CHANGE_STATE, _READ_CMD_BUFF, *_FRR_READS}
+# Transactions never followed by a wait for CTS: FIFO accesses and the commands reading back their reply right away
+_NO_CTS_COMMANDS = {_WRITE_TX_FIFO, *COMMANDS_WITH_IMMEDIATE_RESPONSE}
+# Transactions updating the radio shadow: property writes, replies read back, POWER_UP and GPIO_PIN_CFG
+_SHADOW_COMMANDS = {_SET_PROPERTY, _READ_CMD_BUFF, _POWER_UP, _GPIO_PIN_CFG}
+# Property group holding FRR_CTL_A_MODE..FRR_CTL_D_MODE at index 0..3
+FRR_CTL_GROUP = 0x02
 
-def decode_immediate_reponse_byte(command_id: int, received: List[Byte]) -> AnalyzerFrame:
-    """Interpret received data as response to the current command."""
-    last_byte = received[-1]
-    count = len(received)
-    last_byte_offset = count - 1
-    payload = f"0x{last_byte.value:02x}"
-    name = "Unknown immediate response"
-    assert command_id in COMMANDS_WITH_IMMEDIATE_RESPONSE
 
-    if command_id == Command.READ_CMD_BUFF.value:
-        if last_byte_offset == 0:
-            name = "CTS"
+# Largest RX/TX FIFO (shared TX/RX FIFO mode)
+RX_FIFO_SIZE = 129
+TX_FIFO_SIZE = 129
+
+# Rendered payloads and frame names, built once so the per-byte decoding does not need to format strings
+CTS_LABELS = tuple("< CTS (ready)" if value == 0xFF else "< CTS (not ready)" for value in range(256))
+
+
+def _compile_fifo_info_labels() -> Tuple[Tuple[Optional[Tuple[str, ...]], ...], ...]:
+    """FIFO_INFO reply names, indexed by the reset flags of the FIFO argument (bit 1: RX, bit 0: TX) and offset."""
+    variants = []
+    for reset_flags in range(0, 4):
+        rx_note = ", RX reset" if reset_flags & 0x02 else ""
+        tx_note = ", TX reset" if reset_flags & 0x01 else ""
+        variants.append((
+            None,
+            tuple(f"< RX_FIFO_COUNT ({value}{rx_note})" if value <= RX_FIFO_SIZE else
+                  f"< RX_FIFO_COUNT (overflow!{rx_note})" for value in range(256)),
+            tuple(f"< TX_FIFO_SPACE ({value}{tx_note})" if value <= TX_FIFO_SIZE else
+                  f"< TX_FIFO_SPACE (illegal!{tx_note})" for value in range(256)),
+        ))
+    return tuple(variants)
+
+
+FIFO_INFO_LABELS = _compile_fifo_info_labels()
+# PACKET_INFO reply names, indexed by the FIELD_NUMBER argument (0: length configured by PKT_LEN) and offset
+PACKET_INFO_LABELS = tuple((None, f"< LENGTH[15:8] (FIELD {field})", f"< LENGTH[7:0] (FIELD {field})")
+                           for field in range(256))
+
+
+def _compile_labels(prefix: str, attribute: str) -> List[Optional[Tuple[str, ...]]]:
+    """Per command ID, the frame name of each argument/response byte."""
+    labels: List[Optional[Tuple[str, ...]]] = [None] * 256
+    for command_id, description in COMMAND_ID_TO_DESCRIPTION.items():
+        names = getattr(description, attribute)
+        if names is not None:
+            labels[command_id] = tuple(f"{prefix}{name}" for name in names)
+    return labels
+
+
+ARGUMENT_LABELS = _compile_labels("> ", "argument_names")
+ARGUMENT_LABELS[Command.WRITE_TX_FIFO.value] = ("> CMD",) + tuple(f"> DATA[{x}]" for x in range(1, TX_FIFO_SIZE + 1))
+RESPONSE_LABELS = _compile_labels("< ", "response_names")
+
+
+def _compile_response_payloads() -> List[Optional[Tuple[Tuple[str, ...], ...]]]:
+    """Per command ID, the payload table for every reply byte (status bits, states, ... or plain hex)."""
+    command_payloads = tuple(f"0x{value:02x} ({COMMAND_ID_TO_NAME[value]})" if value in COMMAND_ID_TO_NAME else
+                             HEX_BYTE[value] for value in range(256))
+    payloads: List[Optional[Tuple[Tuple[str, ...], ...]]] = [None] * 256
+    for command_id, description in COMMAND_ID_TO_DESCRIPTION.items():
+        if description.response_names is None:
+            continue
+        tables = tuple(command_payloads if name == "CMD_ERR_CMD_ID" else RESPONSE_PAYLOADS_BY_NAME.get(name, HEX_BYTE)
+                       for name in description.response_names)
+        if any(table is not HEX_BYTE for table in tables):
+            payloads[command_id] = tables
+    return payloads
+
+
+RESPONSE_PAYLOADS = _compile_response_payloads()
+
+# Byte names like "XO_FREQ[31:24]" belong to a field spanning several bytes, "XO_FREQ[7:0]" being the last one
+_FIELD_BYTE_NAME = re.compile(r"^(.+)\[(\d+):(\d+)]$")
+
+FieldLayout = Tuple[Tuple[int, ...], Tuple[Optional[Field], ...], Tuple[Optional[str], ...]]
+
+
+def _compile_fields(prefix: str, attribute: str) -> List[Optional[FieldLayout]]:
+    """Per command ID, the field layout of the argument/response bytes.
+
+    For every byte offset the span is 0 for single byte fields, -1 for leading bytes of a multi-byte field and the
+    number of bytes of the field at its last byte, where the field definition and frame name are stored as well.
+    """
+    layouts: List[Optional[FieldLayout]] = [None] * 256
+    for command_id, description in COMMAND_ID_TO_DESCRIPTION.items():
+        names = getattr(description, attribute)
+        if names is None:
+            continue
+        definitions = {field.name: field for field in (description.fields or [])}
+        spans = [0] * len(names)
+        fields: List[Optional[Field]] = [None] * len(names)
+        labels: List[Optional[str]] = [None] * len(names)
+        first_offset = None
+        field_name = None
+        width = 0
+        for offset, name in enumerate(names):
+            match = _FIELD_BYTE_NAME.match(name)
+            if match is None:
+                first_offset = None
+                continue
+            if first_offset is None or match.group(1) != field_name:
+                first_offset = offset
+                field_name = match.group(1)
+                width = int(match.group(2)) + 1
+            if match.group(3) == "0":
+                if offset > first_offset:
+                    spans[first_offset:offset] = [-1] * (offset - first_offset)
+                    spans[offset] = offset - first_offset + 1
+                    fields[offset] = definitions.get(field_name, Field(field_name, width))
+                    labels[offset] = f"{prefix}{field_name}"
+                first_offset = None
+        layouts[command_id] = (tuple(spans), tuple(fields), tuple(labels))
+    return layouts
+
+
+ARGUMENT_FIELDS = _compile_fields("> ", "argument_names")
+RESPONSE_FIELDS = _compile_fields("< ", "response_names")
+
+
+# SET_PROPERTY/GET_PROPERTY: property group names and the frame name of every (group, index) property byte
+GROUP_PAYLOADS = tuple(f"0x{value:02x} ({PROPERTY_GROUPS[value]})" if value in PROPERTY_GROUPS else HEX_BYTE[value]
+                       for value in range(256))
+SET_PROPERTY_LABELS = [None if name is None else f"> {name}" for name in PROPERTY_BYTE_NAMES]
+GET_PROPERTY_LABELS = [None if name is None else f"< {name}" for name in PROPERTY_BYTE_NAMES]
+# Offset of the first property value in SET_PROPERTY and in the GET_PROPERTY reply (read by READ_CMD_BUFF)
+SET_PROPERTY_DATA_OFFSET = 4
+GET_PROPERTY_DATA_OFFSET = 1
+
+
+def _compile_immediate_response_labels() -> List[Optional[Tuple[str, ...]]]:
+    """Per command ID, the frame name of each byte read back right after the command byte."""
+    labels: List[Optional[Tuple[str, ...]]] = [None] * 256
+    for command_id in COMMANDS_WITH_IMMEDIATE_RESPONSE:
+        description = COMMAND_ID_TO_DESCRIPTION[command_id]
+        if command_id == Command.READ_RX_FIFO.value:
+            names = [f"DATA[{x}]" for x in range(0, RX_FIFO_SIZE)]
+        elif command_id == Command.READ_CMD_BUFF.value:
+            names = description.response_names
         else:
-            name = f"BYTE[{last_byte_offset - 1}]"
-    elif command_id == Command.READ_RX_FIFO.value:
-        name = f"DATA[{last_byte_offset}]"
-    elif command_id == Command.FRR_A_READ.value:
-        assert last_byte_offset <= 3
-        if last_byte_offset == 0:
-            name = "FRR_A_VALUE"
-        elif last_byte_offset == 1:
-            name = "FRR_B_VALUE"
-        elif last_byte_offset == 2:
-            name = "FRR_C_VALUE"
-        elif last_byte_offset == 3:
-            name = "FRR_D_VALUE"
-    elif command_id == Command.FRR_B_READ.value:
-        assert last_byte_offset <= 3
-        if last_byte_offset == 0:
-            name = "FRR_B_VALUE"
-        elif last_byte_offset == 1:
-            name = "FRR_C_VALUE"
-        elif last_byte_offset == 2:
-            name = "FRR_D_VALUE"
-        elif last_byte_offset == 3:
-            name = "FRR_A_VALUE"
-    elif command_id == Command.FRR_C_READ.value:
-        assert last_byte_offset <= 3
-        if last_byte_offset == 0:
-            name = "FRR_C_VALUE"
-        elif last_byte_offset == 1:
-            name = "FRR_D_VALUE"
-        elif last_byte_offset == 2:
-            name = "FRR_A_VALUE"
-        elif last_byte_offset == 3:
-            name = "FRR_B_VALUE"
-    elif command_id == Command.FRR_D_READ.value:
-        assert last_byte_offset <= 3
-        if last_byte_offset == 0:
-            name = "FRR_D_VALUE"
-        elif last_byte_offset == 1:
-            name = "FRR_A_VALUE"
-        elif last_byte_offset == 2:
-            name = "FRR_B_VALUE"
-        elif last_byte_offset == 3:
-            name = "FRR_C_VALUE"
-    return AnalyzerFrame('command_payload', last_byte.start_time, last_byte.end_time, {
-        'name': f"< {name}",
-        'payload': payload
+            # Fast response registers are clocked out without CTS, starting with the register addressed
+            names = description.response_names[1:]
+        labels[command_id] = tuple(f"< {name}" for name in names)
+    return labels
+
+
+IMMEDIATE_RESPONSE_LABELS = _compile_immediate_response_labels()
+
+
+def _compile_frr_labels() -> Tuple[Tuple[str, ...], ...]:
+    """Frame name per FRR register and mode, e.g. "< FRR_B_VALUE (INT_PH_PEND)"."""
+    return tuple(tuple(f"< {register_name} ({frr_mode_name(mode)})" for mode in range(256))
+                 for register_name in FRR_VALUE_NAMES)
+
+
+FRR_LABELS = _compile_frr_labels()
+
+
+def compile_frr_decoders(modes: bytes) -> List[Optional[Tuple[Tuple[str, Tuple[str, ...]], ...]]]:
+    """Per FRR read command ID and byte offset, the frame name and payload table for the configured FRR modes."""
+    decoders: List[Optional[Tuple[Tuple[str, Tuple[str, ...]], ...]]] = [None] * 256
+    register_count = len(FRR_VALUE_NAMES)
+    for command_id, first_register in _FRR_READS.items():
+        registers = [(first_register + offset) % register_count for offset in range(0, register_count)]
+        decoders[command_id] = tuple((FRR_LABELS[register][modes[register]], frr_mode_payloads(modes[register]))
+                                     for register in registers)
+    return decoders
+
+
+def _frr_offsets(modes: bytes, wanted_modes: Tuple[int, ...]) -> Dict[int, Tuple[int, ...]]:
+    """Per FRR read command ID, the offsets of the bytes reading an FRR configured to one of `wanted_modes`."""
+    register_count = len(FRR_VALUE_NAMES)
+    return {command_id: tuple(offset for offset in range(0, register_count)
+                              if modes[(first_register + offset) % register_count] in wanted_modes)
+            for command_id, first_register in _FRR_READS.items()}
+
+
+def _frr_tracked(*offsets: Dict[int, Tuple[int, ...]]) -> Set[int]:
+    """FRR read command IDs reading any of the given offsets."""
+    return {command_id for command_offsets in offsets for command_id, offset in command_offsets.items() if offset}
+
+
+def _immediate_response_label(command_id: int, offset: int) -> str:
+    """Frame name for bytes beyond the compiled tables."""
+    if command_id == Command.READ_CMD_BUFF.value:
+        return f"< BYTE[{offset - 1}]"
+    if command_id == Command.READ_RX_FIFO.value:
+        return f"< DATA[{offset}]"
+    return "< Unknown immediate response"
+
+
+def decode_immediate_reponse_byte(command_id: int, offset: int, value: int,
+                                  start_time: SaleaeTime, end_time: SaleaeTime) -> AnalyzerFrame:
+    """Interpret received data as response to the current command."""
+    try:
+        name = IMMEDIATE_RESPONSE_LABELS[command_id][offset]
+    except IndexError:
+        name = _immediate_response_label(command_id, offset)
+    return AnalyzerFrame('command_payload', start_time, end_time, {
+        'name': name,
+        'payload': HEX_BYTE[value]
     })
 
 
-def decode_read_cmd_buff_reponse_byte(previous_command_id: int, received: List[Byte]) -> AnalyzerFrame:
-    """Interpret received data as response to the command issued previously."""
-    last_byte = received[-1]
-    count = len(received)
-    last_byte_offset = count - 1
-    payload = f"0x{last_byte.value:02x}"
-    name = "Unexpected response"
-    if count == 1:
-        name = "CTS (ready)" if last_byte.value == 0xFF else "CTS (not ready)"
+def _get_property_reply_label(arguments: bytearray, offset: int) -> str:
+    """Name a GET_PROPERTY reply byte after the property read, from the GROUP/NUM_PROPS/START_PROP arguments."""
+    data_index = offset - GET_PROPERTY_DATA_OFFSET
+    name = None
+    if len(arguments) >= 4 and data_index < arguments[2]:
+        index = arguments[3] + data_index
+        if index <= 0xFF:
+            name = GET_PROPERTY_LABELS[property_key(arguments[1], index)]
+    return f"< DATA[{data_index}]" if name is None else name
+
+
+def decode_read_cmd_buff_reponse_byte(previous_command_id: int, previous_arguments: bytearray, offset: int,
+                                      value: int, start_time: SaleaeTime, end_time: SaleaeTime) -> AnalyzerFrame:
+    """Interpret received data as response to the command issued previously, given the bytes it sent."""
+    if offset == 0:
+        name = CTS_LABELS[value]
+    elif previous_command_id == _GET_PROPERTY:
+        name = _get_property_reply_label(previous_arguments, offset)
+    elif previous_command_id == _FIFO_INFO and offset <= 2:
+        reset_flags = previous_arguments[1] & 0x03 if len(previous_arguments) > 1 else 0
+        name = FIFO_INFO_LABELS[reset_flags][offset][value]
+    elif previous_command_id == _PACKET_INFO and offset <= 2 and len(previous_arguments) > 1:
+        name = PACKET_INFO_LABELS[previous_arguments[1]][offset]
     else:
         try:
-            if previous_command_id == Command.FIFO_INFO.value:
-                if count == 2:
-                    name = f"RX_FIFO_COUNT ({last_byte.value})" if last_byte.value <= 129 else "RX_FIFO_COUNT (overflow!)"
-                elif count == 3:
-                    name = f"TX_FIFO_SPACE ({last_byte.value})" if last_byte.value <= 129 else "TX_FIFO_SPACE (illegal!)"
-            else:
-                name = COMMAND_ID_TO_DESCRIPTION[previous_command_id].response_names[last_byte_offset]
-        except:
-            pass
-    return AnalyzerFrame('command_payload', last_byte.start_time, last_byte.end_time, {
-        'name': f"< {name}",
-        'payload': payload
+            name = RESPONSE_LABELS[previous_command_id][offset]
+        except (IndexError, TypeError):
+            name = "< Unexpected response"
+        else:
+            payloads = RESPONSE_PAYLOADS[previous_command_id]
+            if payloads is not None:
+                return AnalyzerFrame('command_payload', start_time, end_time, {
+                    'name': name,
+                    'payload': payloads[offset][value]
+                })
+    return AnalyzerFrame('command_payload', start_time, end_time, {
+        'name': name,
+        'payload': HEX_BYTE[value]
     })
 
 
-def decode_argument_byte(command_id: int, sent: List[Byte]) -> AnalyzerFrame:
+def decode_argument_byte(command_id: int, offset: int, value: int,
+                         start_time: SaleaeTime, end_time: SaleaeTime) -> AnalyzerFrame:
     """Interpret bytes set by a command."""
-    assert command_id == sent[0].value
-    # print("Sent: " + " ".join(f"0x{b.value:02x}" for b in sent))
-    last_byte = sent[-1]
-    count = len(sent)
-    last_byte_offset = count - 1
-    name = "Unknown argument",
     try:
+        name = ARGUMENT_LABELS[command_id][offset]
+    except (IndexError, TypeError):
         if command_id == Command.WRITE_TX_FIFO.value:
-            name = f"DATA[{last_byte_offset}]"
+            name = f"> DATA[{offset}]"
         else:
-            name = COMMAND_ID_TO_DESCRIPTION[command_id].argument_names[last_byte_offset]
-    except:
-        print(f"Command with ID 0x{command_id:02x} has no description for offset {last_byte_offset}")
+            print(f"Command with ID 0x{command_id:02x} has no description for offset {offset}", file=sys.stderr)
+            name = "> Unknown argument"
+
+    return AnalyzerFrame('command_payload', start_time, end_time, {
+        'name': name,
+        'payload': HEX_BYTE[value]
+    })
+
+
+def decode_property_argument_byte(command_id: int, offset: int, value: int, sent: bytearray,
+                                  start_time: SaleaeTime, end_time: SaleaeTime) -> AnalyzerFrame:
+    """Interpret bytes sent by SET_PROPERTY/GET_PROPERTY, naming property values after the property written."""
+    payload = HEX_BYTE[value]
+    name = None
+    if offset >= SET_PROPERTY_DATA_OFFSET:
+        index = sent[3] + offset - SET_PROPERTY_DATA_OFFSET
+        if index <= 0xFF:
+            name = SET_PROPERTY_LABELS[property_key(sent[1], index)]
+        if name is None:
+            name = f"> DATA[{offset - SET_PROPERTY_DATA_OFFSET}]"
+    elif offset == 1:
+        name = "> GROUP"
+        payload = GROUP_PAYLOADS[value]
+    else:
+        name = ARGUMENT_LABELS[command_id][offset]
+    return AnalyzerFrame('command_payload', start_time, end_time, {
+        'name': name,
+        'payload': payload
+    })
+
+
+def _decode_property_field(prefix: str, arguments: bytearray, data_offset: int, offset: int, values: bytearray,
+                           start_times: List[SaleaeTime], end_time: SaleaeTime) -> Union[None, bool, AnalyzerFrame]:
+    """Assemble multi-byte properties written by SET_PROPERTY or read by GET_PROPERTY.
+
+    `arguments` are the bytes sent by the command (GROUP, NUM_PROPS, START_PROP), `data_offset` is the offset of the
+    first property value in `values`. Same return values as `_decode_field`.
+    """
+    if len(arguments) < 4:
+        return False
+    index = arguments[3] + offset - data_offset
+    if index > 0xFF:
+        return False
+    key = property_key(arguments[1], index)
+    size = PROPERTY_BYTE_SIZES[key]
+    if size <= 1:
+        return False
+    first_offset = offset - PROPERTY_BYTE_POSITIONS[key]
+    last_offset = first_offset + size - 1
+    # Properties only partially written/read are shown per byte
+    if first_offset < data_offset or last_offset >= data_offset + arguments[2]:
+        return False
+    if offset < last_offset:
+        return None
+    field = Field(PROPERTY_BYTE_NAMES[key - size + 1].partition("[")[0], size * 8)
+    value = field.value(values[first_offset:offset + 1])
+    return AnalyzerFrame('command_payload', start_times[first_offset], end_time, {
+        'name': f"{prefix}{field.name}",
+        'payload': field.render(value),
+        'value': value
+    })
+
+
+def _decode_field(layout: Optional[FieldLayout], offset: int, values: bytearray, start_times: List[SaleaeTime],
+                  end_time: SaleaeTime) -> Union[None, bool, AnalyzerFrame]:
+    """Assemble a multi-byte field once its last byte arrived.
+
+    Returns False for single byte fields (to be decoded per byte) and None while a field is still incomplete.
+    """
+    try:
+        spans, fields, labels = layout
+        span = spans[offset]
+    except (IndexError, TypeError):
+        return False
+    if span == 0:
+        return False
+    if span < 0:
+        return None
+    first_offset = offset - span + 1
+    field = fields[offset]
+    value = field.value(values[first_offset:offset + 1])
+    return AnalyzerFrame('command_payload', start_times[first_offset], end_time, {
+        'name': labels[offset],
+        'payload': field.render(value),
+        'value': value
+    })
+
+
+def packet_frame(packet: Packet, crc_result: Optional[str] = None) -> AnalyzerFrame:
+    name = f"{packet.direction} packet"
+    if packet.truncated:
+        name += " (truncated)"
+    if crc_result is not None:
+        name += f" ({crc_result})"
+    return AnalyzerFrame('packet', packet.start_time, packet.end_time, {
+        'name': name,
+        'length': len(packet.data),
+        'payload': hex_bytes(packet.data)
+    })
+
+
+def command_byte_frame(command_id: int, start_time: SaleaeTime, end_time: SaleaeTime) -> AnalyzerFrame:
+    return AnalyzerFrame('command_payload', start_time, end_time, {
+        'name': "> CMD",
+        'payload': HEX_BYTE[command_id]
+    })
+
 
-    return AnalyzerFrame('command_payload', last_byte.start_time, last_byte.end_time, {
-        'name': f"> {name}",
-        'payload': f"0x{last_byte.value:02x}"
+def state_frame(state: int, start_time: SaleaeTime, end_time: SaleaeTime) -> AnalyzerFrame:
+    return AnalyzerFrame('state', start_time, end_time, {
+        'name': STATE_NAMES[state]
     })
 
 
+OUTPUT_PER_BYTE = "Per byte"
+OUTPUT_PER_FIELD = "Per field (multi-byte fields merged)"
+OUTPUT_TRANSACTION_ONLY = "Transaction only"
+
+POLLS_SHOW_ALL = "Show every poll"
+POLLS_COLLAPSE = "Collapse not ready polls"
+
+TRACKING_ON = "Packets, states and CTS waits"
+TRACKING_OFF = "Off"
+
+
+@dataclasses.dataclass
+class TrackedState:
+    """What Si4467Analyzer carries over from one transaction to the next, see Si4467Analyzer.snapshot()."""
+    # None if left out of the snapshot
+    shadow: Optional[RadioShadow]
+    packets: PacketAssembler
+    # (state, start) of the current state interval
+    state: Optional[Tuple[int, SaleaeTime]]
+    tx_complete_state: int
+    rx_valid_state: int
+    rx_invalid_state: int
+    previous_command_id: Optional[int]
+    previous_sent: bytes
+    # (command ID, start, polls) of the command waiting for CTS
+    cts_wait: Tuple[int, Optional[SaleaeTime], int]
+
+
 class Si4467Analyzer(HighLevelAnalyzer):
+    output_granularity = ChoicesSetting(label="Output", choices=(OUTPUT_PER_BYTE, OUTPUT_PER_FIELD,
+                                                                 OUTPUT_TRANSACTION_ONLY))
+    cts_poll_output = ChoicesSetting(label="CTS polls", choices=(POLLS_SHOW_ALL, POLLS_COLLAPSE))
+    radio_tracking = ChoicesSetting(label="Radio tracking", choices=(TRACKING_ON, TRACKING_OFF))
+
     result_types = {
         'command': {
             'format': '{{data.name}}'
         },
         'command_payload': {
             'format': '{{data.name}} = {{data.payload}}'
+        },
+        'packet': {
+            'format': '{{data.name}} ({{data.length}} bytes): {{data.payload}}'
+        },
+        'state': {
+            'format': '{{data.name}}'
+        },
+        'cts_wait': {
+            'format': '{{data.name}}'
+        },
+        'cts_polls': {
+            'format': '{{data.name}}'
         }
     }
 
     def __init__(self):
+        output_granularity = self.output_granularity
+        if isinstance(output_granularity, ChoicesSetting):
+            # Instantiated outside of Logic 2 without settings applied
+            output_granularity = OUTPUT_PER_BYTE
+        self._transaction_only = output_granularity == OUTPUT_TRANSACTION_ONLY
+        self._merge_fields = output_granularity == OUTPUT_PER_FIELD
+        # Not ready READ_CMD_BUFF polls are folded into one frame per run of polls
+        self._collapse_polls = self.cts_poll_output == POLLS_COLLAPSE
+        # Packets, radio states and CTS waits are followed across transactions (and shown), unless turned off
+        self._tracking = self.radio_tracking != TRACKING_OFF
+        self._poll_count = 0
+        self._poll_start_time: Optional[SaleaeTime] = None
+        self._poll_end_time: Optional[SaleaeTime] = None
+        self._command_end_time: Optional[SaleaeTime] = None
+        # Called with every completed Transaction (reports and statistics over the decoded traffic)
+        self.transaction_listeners: List[Callable[[Transaction], None]] = []
         self.nsel_start_time: Optional[SaleaeTime] = None
         self.current_command_id: Optional[int] = None
         self.previous_command_id: Optional[int] = None
-        self._bytes_sent: List[Byte] = []
-        self._bytes_received: List[Byte] = []
+        # Bytes of the current transaction, reused for all transactions, along with the start time of every byte
+        self._sent = bytearray()
+        self._sent_start_times: List[SaleaeTime] = []
+        self._received = bytearray()
+        self._received_start_times: List[SaleaeTime] = []
+        # Bytes sent by the previous command (the one READ_CMD_BUFF reads the reply of)
+        self._previous_sent = bytearray()
+        # Radio configuration as far as seen on the bus
+        self.shadow = RadioShadow()
+        self.frr_modes = bytearray(FRR_DEFAULT_MODES)
+        self._frr_decoders = compile_frr_decoders(self.frr_modes)
+        self._frr_ph_offsets = _frr_offsets(self.frr_modes, _FRR_PH_MODES)
+        self._frr_state_offsets = _frr_offsets(self.frr_modes, (FRR_MODE_CURRENT_STATE,))
+        self._frr_tracked = _frr_tracked(self._frr_ph_offsets, self._frr_state_offsets)
+        self.packets = PacketAssembler()
+        self.crc = PacketCrcChecker(self.shadow)
+        self.frequencies = FrequencyCalculator(self.shadow)
+        # Only the current state, unless record_state_history() was called
+        self.states = StateTimeline(keep_history=False)
+        # Command waiting for CTS since its NSEL release, along with the READ_CMD_BUFF polls so far
+        # Histograms of the waits per command, only kept once record_cts_statistics() was called
+        self.cts: Optional[CtsStatistics] = None
+        self._cts_command_id = 0
+        self._cts_wait_start: Optional[SaleaeTime] = None
+        self._cts_polls = 0
+        # States entered after PACKET_SENT (START_TX) respectively PACKET_RX or CRC_ERROR (START_RX)
+        self._tx_complete_state = STATE_NO_CHANGE
+        self._rx_valid_state = STATE_NO_CHANGE
+        self._rx_invalid_state = STATE_NO_CHANGE
+
+    def record_cts_statistics(self) -> CtsStatistics:
+        """Start collecting CTS latency and poll statistics per command in `cts`."""
+        if self.cts is None:
+            self.cts = CtsStatistics()
+        return self.cts
+
+    def record_state_history(self) -> StateTimeline:
+        """Keep every state interval in `states` rather than just the current one, for queries over the capture."""
+        self.states.keep_history = True
+        return self.states
+
+    def snapshot(self, shadow: bool = True) -> TrackedState:
+        """Copy of the tracked state between two transactions, for restore() into an analyzer continuing from there.
+
+        Lets pieces of a capture be decoded separately with the same result as in one go. Property history and CTS
+        statistics are not part of it. Without `shadow` the radio configuration is left out, which is cheaper when
+        only comparing the rest with another snapshot.
+        """
+        return TrackedState(self.shadow.copy() if shadow else None, copy.deepcopy(self.packets),
+                            self.states.current_interval(), self._tx_complete_state, self._rx_valid_state,
+                            self._rx_invalid_state, self.previous_command_id, bytes(self._previous_sent),
+                            (self._cts_command_id, self._cts_wait_start, self._cts_polls))
+
+    def restore(self, tracked: TrackedState) -> None:
+        """Continue from a snapshot() of another analyzer, before decoding anything."""
+        self.shadow = tracked.shadow.copy()
+        self._update_frr_modes()
+        self.crc = PacketCrcChecker(self.shadow)
+        self.frequencies = FrequencyCalculator(self.shadow)
+        self.packets = copy.deepcopy(tracked.packets)
+        self.states = StateTimeline(self.states.keep_history)
+        if tracked.state is not None:
+            self.states.record(*tracked.state)
+        self._tx_complete_state = tracked.tx_complete_state
+        self._rx_valid_state = tracked.rx_valid_state
+        self._rx_invalid_state = tracked.rx_invalid_state
+        self.previous_command_id = tracked.previous_command_id
+        self._previous_sent = bytearray(tracked.previous_sent)
+        self._cts_command_id, self._cts_wait_start, self._cts_polls = tracked.cts_wait
+
+    def _reset_transaction(self) -> None:
+        self.current_command_id = None
+        self._sent.clear()
+        self._sent_start_times.clear()
+        self._received.clear()
+        self._received_start_times.clear()
+
+    def _update_frr_modes(self) -> None:
+        """Pick up FRR_CTL_x_MODE changes from the shadow, FRR reads are decoded according to them."""
+        shadow = self.shadow
+        modes = bytearray(FRR_DEFAULT_MODES)
+        for register in range(0, len(modes)):
+            key = property_key(FRR_CTL_GROUP, register)
+            if shadow.known[key]:
+                modes[register] = shadow.properties[key]
+        if modes != self.frr_modes:
+            self.frr_modes = modes
+            self._frr_decoders = compile_frr_decoders(modes)
+            self._frr_ph_offsets = _frr_offsets(modes, _FRR_PH_MODES)
+            self._frr_state_offsets = _frr_offsets(modes, (FRR_MODE_CURRENT_STATE,))
+            self._frr_tracked = _frr_tracked(self._frr_ph_offsets, self._frr_state_offsets)
+
+    def _complete_transaction(self, command_id: int, end_time: SaleaeTime) -> None:
+        """Track the effects of one of _SHADOW_COMMANDS on the shadow, called when NSEL gets released."""
+        sent = self._sent
+        if command_id == _SET_PROPERTY:
+            if len(sent) > SET_PROPERTY_DATA_OFFSET:
+                self.shadow.set_properties(sent[1], sent[3], sent[SET_PROPERTY_DATA_OFFSET:
+                                                                   SET_PROPERTY_DATA_OFFSET + sent[2]], end_time)
+                if sent[1] == FRR_CTL_GROUP:
+                    self._update_frr_modes()
+        elif command_id == _READ_CMD_BUFF:
+            received = self._received
+            if len(received) < 2 or received[0] != 0xFF:
+                return
+            arguments = self._previous_sent
+            if self.previous_command_id == _GET_PROPERTY and len(arguments) >= 4:
+                self.shadow.set_properties(arguments[1], arguments[3], received[GET_PROPERTY_DATA_OFFSET:
+                                                                                GET_PROPERTY_DATA_OFFSET + arguments[2]],
+                                           end_time)
+                if arguments[1] == FRR_CTL_GROUP:
+                    self._update_frr_modes()
+            elif self.previous_command_id == _GPIO_PIN_CFG:
+                self.shadow.gpio_pin_cfg_reply(received[1:])
+        elif command_id == _POWER_UP:
+            self.shadow.power_up(sent, end_time)
+            self._update_frr_modes()
+        elif command_id == _GPIO_PIN_CFG:
+            self.shadow.gpio_pin_cfg(sent)
+
+    def _track_transaction(self, command_id: int, start_time: SaleaeTime,
+                           end_time: SaleaeTime) -> Optional[List[AnalyzerFrame]]:
+        """Packets and state intervals completed by the transaction, None if none.
+
+        Only called for transactions that can affect them, see decode().
+        """
+        ph_pending = self._packet_handler_interrupts(command_id) if command_id in _INTERRUPT_READS else 0
+        packets = self._track_packets(command_id, ph_pending, end_time)
+        states = None
+        if command_id in _STATE_COMMANDS or ph_pending or self.states.current == STATE_SLEEP:
+            states = self._track_state(command_id, ph_pending, start_time, end_time)
+        if not packets and not states:
+            return None
+        check_crc = self.crc.check
+        frames = [packet_frame(packet, None if packet.truncated else
+                               check_crc(packet.direction == TX, packet.data, packet.crc_error))
+                  for packet in packets]
+        if states:
+            frames += [state_frame(*interval) for interval in states]
+        return frames
+
+    def _cts_wait_frame(self, end_time: SaleaeTime) -> AnalyzerFrame:
+        """Frame covering the wait of a command for CTS, called with the READ_CMD_BUFF seeing it."""
+        cts_time = self._received_start_times[0]
+        latency = float(cts_time - self._cts_wait_start)
+        if self.cts is not None:
+            self.cts.record(self._cts_command_id, latency, self._cts_polls)
+        name = COMMAND_ID_TO_NAME.get(self._cts_command_id, "Unknown command")
+        frame = AnalyzerFrame('cts_wait', self._cts_wait_start, end_time, {
+            'name': f"CTS after {name}: {latency * 1e6:.1f} us, {self._cts_polls} polls",
+            'command': name,
+            'latency': latency,
+            'polls': self._cts_polls
+        })
+        self._cts_wait_start = None
+        return frame
+
+    def _packet_handler_interrupts(self, command_id: int) -> int:
+        """PH_PEND bits read by the transaction (GET_INT_STATUS/GET_PH_STATUS reply or FRR), 0 if none."""
+        received = self._received
+        if command_id == _READ_CMD_BUFF:
+            offset = _PH_PEND_OFFSETS.get(self.previous_command_id)
+            if offset is not None and len(received) > offset and received[0] == 0xFF:
+                return received[offset]
+            return 0
+        ph_pending = 0
+        if command_id in _FRR_READS:
+            for offset in self._frr_ph_offsets[command_id]:
+                if offset < len(received):
+                    ph_pending |= received[offset]
+        return ph_pending
+
+    def _track_packets(self, command_id: int, ph_pending: int, end_time: SaleaeTime) -> List[Packet]:
+        """Feed FIFO traffic and packet handler interrupts of a transaction to the packet assembler."""
+        packets = self.packets
+        sent = self._sent
+        # A received packet being read out ends with the first transaction doing something else, which includes
+        # FIFO_INFO resetting just the TX FIFO
+        ended = _NO_PACKETS
+        if packets.rx_complete and (command_id not in _RX_READOUT_COMMANDS or
+                                    (command_id == _FIFO_INFO and len(sent) >= 2 and sent[1] & 0x03 == 0x01)):
+            ended = packets.rx_reading_stopped()
+        if command_id not in _PACKET_COMMANDS:
+            return ended
+        received = self._received
+        if command_id == _WRITE_TX_FIFO:
+            if len(sent) > 1:
+                return ended + packets.tx_fifo_write(sent[1:], self._sent_start_times[1], end_time)
+        elif command_id == _READ_RX_FIFO:
+            if received:
+                return packets.rx_fifo_read(bytes(received), self._received_start_times[0], end_time)
+        elif command_id == _START_TX:
+            tx_length = ((sent[3] & 0x1F) << 8) | sent[4] if len(sent) >= 5 else 0
+            return ended + packets.start_tx(tx_length, end_time)
+        elif command_id == _START_RX:
+            return ended + packets.start_rx()
+        elif command_id == _FIFO_INFO:
+            if len(sent) >= 2:
+                return ended + packets.fifo_reset(bool(sent[1] & 0x02), bool(sent[1] & 0x01))
+        elif ph_pending:
+            return packets.packet_handler_pending(bool(ph_pending & PH_PACKET_SENT), bool(ph_pending & PH_PACKET_RX),
+                                                  bool(ph_pending & PH_CRC_ERROR), end_time)
+        return ended
+
+    def _track_state(self, command_id: int, ph_pending: int, start_time: SaleaeTime,
+                     end_time: SaleaeTime) -> List[Tuple[int, SaleaeTime, SaleaeTime]]:
+        """Update the state timeline, returns the (state, start, end) intervals the transaction ended."""
+        states = self.states
+        sent = self._sent
+        ended = []
+        if states.current == STATE_SLEEP:
+            # Any SPI activity wakes the chip up
+            interval = states.record(STATE_SPI_ACTIVE, start_time)
+            if interval is not None:
+                ended.append(interval)
+        state = STATE_NO_CHANGE
+        if command_id == _CHANGE_STATE:
+            if len(sent) >= 2:
+                state = sent[1] & 0x0F
+        elif command_id == _START_TX:
+            state = STATE_TX
+            # CONDITION[7:4]: TXCOMPLETE_STATE
+            self._tx_complete_state = sent[2] >> 4 if len(sent) >= 3 else STATE_NO_CHANGE
+        elif command_id == _START_RX:
+            state = STATE_RX
+            self._rx_valid_state = sent[6] & 0x0F if len(sent) >= 7 else STATE_NO_CHANGE
+            self._rx_invalid_state = sent[7] & 0x0F if len(sent) >= 8 else STATE_NO_CHANGE
+        elif command_id == _READ_CMD_BUFF:
+            received = self._received
+            if self.previous_command_id == _REQUEST_DEVICE_STATE and len(received) >= 2 and received[0] == 0xFF:
+                state = received[1] & 0x0F
+        elif command_id in _FRR_READS:
+            received = self._received
+            for offset in self._frr_state_offsets[command_id]:
+                if offset < len(received):
+                    state = received[offset] & 0x0F
+        if ph_pending:
+            current = states.current
+            if ph_pending & PH_PACKET_SENT and current == STATE_TX:
+                state = self._tx_complete_state
+            elif ph_pending & PH_PACKET_RX and current == STATE_RX:
+                state = self._rx_valid_state
+            elif ph_pending & PH_CRC_ERROR and current == STATE_RX:
+                state = self._rx_invalid_state
+        if state != STATE_NO_CHANGE:
+            interval = states.record(state, end_time)
+            if interval is not None:
+                ended.append(interval)
+        return ended
 
-    def _add_frame_miso(self, frame: AnalyzerFrame) -> None:
-        self._bytes_received.append(
-            Byte(int(frame.data['miso'][0]), start_time=frame.start_time, end_time=frame.end_time))
+    def _tuned_frequency(self, command_id: int) -> Optional[float]:
+        """Carrier frequency in Hz set by START_TX/START_RX (CHANNEL) or TX_HOP/RX_HOP (INTE, FRAC)."""
+        sent = self._sent
+        if command_id == _START_TX or command_id == _START_RX:
+            if len(sent) < 2:
+                return None
+            return self.frequencies.channel_frequency(sent[1])
+        if len(sent) < 5:
+            return None
+        return self.frequencies.hop_frequency(sent[1], int.from_bytes(sent[2:5], "big") & 0x0FFFFF)
 
-    def _add_frame_mosi(self, frame: AnalyzerFrame) -> None:
-        self._bytes_sent.append(Byte(int(frame.data['mosi'][0]), start_time=frame.start_time, end_time=frame.end_time))
+    def _poll_run_frame(self) -> AnalyzerFrame:
+        """Frame covering the not ready polls since the last ready one, resets the run."""
+        elapsed = float(self._poll_end_time - self._poll_start_time)
+        frame = AnalyzerFrame('cts_polls', self._poll_start_time, self._poll_end_time, {
+            'name': f"CTS not ready x{self._poll_count} ({elapsed * 1e6:.1f} us)",
+            'count': self._poll_count,
+            'elapsed': elapsed
+        })
+        self._poll_count = 0
+        return frame
+
+    def flush(self) -> Optional[AnalyzerFrame]:
+        """Frame held back for traffic that did not follow (a run of not ready polls at the end of the data), if any."""
+        if self._poll_count:
+            return self._poll_run_frame()
+        return None
+
+    def _decode_poll_byte(self, frame: AnalyzerFrame) -> Optional[Union[AnalyzerFrame, List[AnalyzerFrame]]]:
+        """READ_CMD_BUFF byte while collapsing polls, up to the CTS byte respectively the whole of a not ready poll."""
+        value = frame.data['miso'][0]
+        self._received.append(value)
+        self._received_start_times.append(frame.start_time)
+        if len(self._received) > 1 or value != 0xFF:
+            return
+        frames = []
+        if self._poll_count:
+            frames.append(self._poll_run_frame())
+        if not self._transaction_only:
+            frames.append(command_byte_frame(_READ_CMD_BUFF, self._sent_start_times[0], self._command_end_time))
+            if self.previous_command_id:
+                frames.append(decode_read_cmd_buff_reponse_byte(self.previous_command_id, self._previous_sent, 0,
+                                                                value, frame.start_time, frame.end_time))
+            else:
+                frames.append(decode_immediate_reponse_byte(_READ_CMD_BUFF, 0, value, frame.start_time,
+                                                            frame.end_time))
+        return frames or None
 
     def decode(self, frame: AnalyzerFrame) -> Optional[Union[AnalyzerFrame, List[AnalyzerFrame]]]:
-        if frame.type == 'enable':
+        frame_type = frame.type
+        if frame_type == 'result':
+            if self.nsel_start_time is None:
+                return
+            command_id = self.current_command_id
+            # First byte is always command ID
+            if command_id is None:
+                value = frame.data['mosi'][0]
+                self._sent.append(value)
+                self._sent_start_times.append(frame.start_time)
+                self.current_command_id = value
+                if self._collapse_polls:
+                    if value == _READ_CMD_BUFF:
+                        # Shown once the CTS byte tells this is not just another not ready poll
+                        self._command_end_time = frame.end_time
+                        return
+                    if self._poll_count:
+                        polls = self._poll_run_frame()
+                        if self._transaction_only:
+                            return polls
+                        return [polls, command_byte_frame(value, frame.start_time, frame.end_time)]
+                if self._transaction_only:
+                    return
+                return command_byte_frame(value, frame.start_time, frame.end_time)
+            if command_id == _READ_CMD_BUFF and self._collapse_polls and (not self._received or
+                                                                           self._received[0] != 0xFF):
+                return self._decode_poll_byte(frame)
+            # Meaning of values read by READ_CMD_BUFF depends on previous (probably missed) command
+            if command_id == _READ_CMD_BUFF and self.previous_command_id:
+                value = frame.data['miso'][0]
+                offset = len(self._received)
+                self._received.append(value)
+                self._received_start_times.append(frame.start_time)
+                if self._transaction_only:
+                    return
+                if self._merge_fields:
+                    if self.previous_command_id == _GET_PROPERTY:
+                        field = _decode_property_field("< ", self._previous_sent, GET_PROPERTY_DATA_OFFSET, offset,
+                                                       self._received, self._received_start_times, frame.end_time)
+                    else:
+                        field = _decode_field(RESPONSE_FIELDS[self.previous_command_id], offset, self._received,
+                                              self._received_start_times, frame.end_time)
+                    if field is not False:
+                        return field
+                return decode_read_cmd_buff_reponse_byte(self.previous_command_id, self._previous_sent, offset, value,
+                                                         frame.start_time, frame.end_time)
+            # Commands which read back values themselves (after their command ID)
+            if IMMEDIATE_RESPONSE_LABELS[command_id] is not None:
+                value = frame.data['miso'][0]
+                offset = len(self._received)
+                self._received.append(value)
+                self._received_start_times.append(frame.start_time)
+                if self._transaction_only:
+                    return
+                frr_decoder = self._frr_decoders[command_id]
+                if frr_decoder is not None and offset < len(frr_decoder):
+                    name, payloads = frr_decoder[offset]
+                    return AnalyzerFrame('command_payload', frame.start_time, frame.end_time, {
+                        'name': name,
+                        'payload': payloads[value]
+                    })
+                return decode_immediate_reponse_byte(command_id, offset, value, frame.start_time, frame.end_time)
+            # Remaining commands just send out data, do not read back (respectively need READ_CMD_BUFF to do so)
+            value = frame.data['mosi'][0]
+            offset = len(self._sent)
+            self._sent.append(value)
+            self._sent_start_times.append(frame.start_time)
+            if self._transaction_only:
+                return
+            if command_id == _SET_PROPERTY or command_id == _GET_PROPERTY:
+                if self._merge_fields and offset >= SET_PROPERTY_DATA_OFFSET:
+                    field = _decode_property_field("> ", self._sent, SET_PROPERTY_DATA_OFFSET, offset, self._sent,
+                                                   self._sent_start_times, frame.end_time)
+                    if field is not False:
+                        return field
+                return decode_property_argument_byte(command_id, offset, value, self._sent, frame.start_time,
+                                                     frame.end_time)
+            if self._merge_fields:
+                field = _decode_field(ARGUMENT_FIELDS[command_id], offset, self._sent, self._sent_start_times,
+                                      frame.end_time)
+                if field is not False:
+                    return field
+            return decode_argument_byte(command_id, offset, value, frame.start_time, frame.end_time)
+
+        if frame_type == 'enable':
             self.nsel_start_time = frame.start_time
-            self.current_command_id = None
-            self._bytes_sent: List[Byte] = []
-            self._bytes_received: List[Byte] = []
+            self._reset_transaction()
             return
 
         if self.nsel_start_time is None:
             return
 
-        if frame.type == 'disable':
+        if frame_type == 'disable':
             # NSEL might get pulled without any data exchange during startup
-            if not self._bytes_sent:
+            if not self._sent:
                 return
 
-            first_byte = self._bytes_sent[0]
+            command_id = self._sent[0]
             result = AnalyzerFrame('command', self.nsel_start_time, frame.end_time, {
-                'name': COMMAND_ID_TO_NAME[
-                    first_byte.value] if first_byte.value in COMMAND_ID_TO_NAME else "Unknown command",
-                'payload': " ".join(f"0x{b.value:02x}" for b in (self._bytes_sent + self._bytes_received))
+                'name': COMMAND_ID_TO_NAME[command_id] if command_id in COMMAND_ID_TO_NAME else "Unknown command",
+                'payload': hex_bytes(self._sent + self._received)
             })
+            if command_id in _TUNE_COMMANDS:
+                frequency = self._tuned_frequency(command_id)
+                if frequency is not None:
+                    result.data['name'] += f" {frequency / 1e6:.6f} MHz"
+                    result.data['frequency_hz'] = frequency
             self.nsel_start_time = None
+            if command_id in _SHADOW_COMMANDS:
+                self._complete_transaction(command_id, frame.end_time)
+            frames = None
+            if self._tracking:
+                # Most transactions cannot end a packet or state, checked here to save the call for them
+                if (command_id in _TRACKED_COMMANDS or command_id in self._frr_tracked
+                        or (command_id == _READ_CMD_BUFF and self.previous_command_id in _TRACKED_REPLIES)
+                        or (command_id == _FIFO_INFO and len(self._sent) >= 2 and self._sent[1] & 0x03)
+                        or self.packets.rx_reading or self.states.current == STATE_SLEEP):
+                    frames = self._track_transaction(command_id, result.start_time, frame.end_time)
+                # Time and READ_CMD_BUFF polls until CTS after a command
+                if command_id == _READ_CMD_BUFF:
+                    if self._cts_wait_start is not None:
+                        self._cts_polls += 1
+                        if self._received and self._received[0] == 0xFF:
+                            cts_wait = self._cts_wait_frame(frame.end_time)
+                            frames = [cts_wait] + frames if frames else [cts_wait]
+                elif command_id not in _NO_CTS_COMMANDS:
+                    # Any wait for a previous command without seeing CTS is abandoned
+                    self._cts_command_id = command_id
+                    self._cts_wait_start = frame.end_time
+                    self._cts_polls = 0
+            if self.transaction_listeners:
+                transaction = Transaction(command_id, result.start_time, frame.end_time, bytes(self._sent),
+                                          bytes(self._received), self.previous_command_id)
+                for listener in self.transaction_listeners:
+                    listener(transaction)
+            not_ready_poll = self._collapse_polls and command_id == _READ_CMD_BUFF and (not self._received or
+                                                                                         self._received[0] != 0xFF)
             if self.current_command_id not in COMMANDS_WITH_IMMEDIATE_RESPONSE:
                 self.previous_command_id = self.current_command_id
-            self.current_command_id = None
-            self._bytes_sent: List[Byte] = []
-            self._bytes_received: List[Byte] = []
+                # Keep the arguments by swapping buffers, the now stale one gets cleared for the next transaction
+                self._previous_sent, self._sent = self._sent, self._previous_sent
+            self._reset_transaction()
+            if not_ready_poll:
+                # Shown as part of the run of polls once it ends
+                if not self._poll_count:
+                    self._poll_start_time = result.start_time
+                self._poll_count += 1
+                self._poll_end_time = frame.end_time
+                return frames
+            if frames:
+                return [result] + frames
             return result
-
-        if frame.type == 'result':
-            # First byte is always command ID
-            if self.current_command_id is None:
-                assert len(self._bytes_sent) == 0
-                assert len(self._bytes_received) == 0
-                self._add_frame_mosi(frame)
-                first_byte = self._bytes_sent[0]
-                self.current_command_id = first_byte.value
-                return AnalyzerFrame('command_payload', first_byte.start_time, first_byte.end_time, {
-                    'name': "> CMD",
-                    'payload': f"0x{first_byte.value:02x}"
-                })
-            # Meaning of values read by READ_CMD_BUFF depends on previous (probably missed) command
-            if self.current_command_id == Command.READ_CMD_BUFF.value and self.previous_command_id:
-                self._add_frame_miso(frame)
-                return decode_read_cmd_buff_reponse_byte(self.previous_command_id, self._bytes_received)
-            # Commands which read back values themselves (after their command ID)
-            if self.current_command_id in COMMANDS_WITH_IMMEDIATE_RESPONSE:
-                self._add_frame_miso(frame)
-                return decode_immediate_reponse_byte(self.current_command_id, self._bytes_received)
-            # Remaining commands just send out data, do not read back (respectively need READ_CMD_BUFF to do so)
-            self._add_frame_mosi(frame)
-            return decode_argument_byte(self.current_command_id, self._bytes_sent)
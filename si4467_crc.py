@@ -0,0 +1,247 @@
+# Packet CRC
+# The CRC polynomials of the packet handler (PKT_CRC_CONFIG), computed a byte at a time with precomputed tables.
+import dataclasses
+from typing import List, Optional, Tuple
+
+from si4467_properties import property_key
+from si4467_shadow import RadioShadow
+
+
+@dataclasses.dataclass(frozen=True)
+class CrcAlgorithm:
+    name: str
+    width: int
+    polynomial: int
+
+
+# CRC_POLYNOMIAL field of PKT_CRC_CONFIG, 0 is NO_CRC
+# @formatter:off
+CRC_ALGORITHMS = {
+    1: CrcAlgorithm("ITU-T CRC8",  8,  0x07),
+    2: CrcAlgorithm("IEC-16",      16, 0x5B93),
+    3: CrcAlgorithm("Baicheva-16", 16, 0x90D9),
+    4: CrcAlgorithm("CRC-16 IBM",  16, 0x8005),
+    5: CrcAlgorithm("CCITT-16",    16, 0x1021),
+    6: CrcAlgorithm("Koopman-32",  32, 0x741B8CD7),
+    7: CrcAlgorithm("IEEE 802.3",  32, 0x04C11DB7),
+    8: CrcAlgorithm("Castagnoli",  32, 0x1EDC6F41),
+    9: CrcAlgorithm("CRC-16 DNP",  16, 0x3D65),
+}
+# @formatter:on
+
+# PKT_CRC_CONFIG
+CRC_SEED_ONES = 0x80
+CRC_POLYNOMIAL_MASK = 0x0F
+# PKT_CONFIG1
+CRC_INVERT = 0x04
+CRC_ENDIAN_MSB_FIRST = 0x02
+# PKT_FIELD_n_CRC_CONFIG / PKT_RX_FIELD_n_CRC_CONFIG
+FIELD_CRC_START = 0x80
+FIELD_SEND_CRC = 0x20
+FIELD_CHECK_CRC = 0x08
+FIELD_CRC_ENABLE = 0x02
+# PKT_LEN, field holding the variable length data, 0 for fixed length packets
+LENGTH_DST_FIELD_MASK = 0x07
+# PKT_CONFIG1, RX uses the PKT_RX_FIELD_n properties instead of the TX ones
+PH_FIELD_SPLIT = 0x80
+
+_PKT_GROUP = 0x12
+_PKT_CRC_CONFIG = property_key(_PKT_GROUP, 0x00)
+_PKT_CONFIG1 = property_key(_PKT_GROUP, 0x06)
+_PKT_LEN = property_key(_PKT_GROUP, 0x08)
+_PKT_CRC_SEED = property_key(_PKT_GROUP, 0x36)
+_PKT_FIELD_CRC_CONFIGS = tuple(property_key(_PKT_GROUP, 0x10 + field * 4) for field in range(0, 5))
+_PKT_RX_FIELD_CRC_CONFIGS = tuple(property_key(_PKT_GROUP, 0x24 + field * 4) for field in range(0, 5))
+# PKT_(RX_)FIELD_1_LENGTH, followed by _CONFIG and _CRC_CONFIG, the other fields every 4 properties
+_PKT_FIELD_1 = property_key(_PKT_GROUP, 0x0D)
+_PKT_RX_FIELD_1 = property_key(_PKT_GROUP, 0x21)
+# (length, CRC config) of every field in use
+FieldLayout = Tuple[Tuple[int, int], ...]
+
+
+def _compile_table(width: int, polynomial: int) -> Tuple[int, ...]:
+    """Table of the MSB first CRC register after shifting in each possible top byte."""
+    top_bit = 1 << (width - 1)
+    mask = (1 << width) - 1
+    table = []
+    for value in range(256):
+        crc = value << (width - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ polynomial if crc & top_bit else crc << 1) & mask
+        table.append(crc)
+    return tuple(table)
+
+
+CRC_TABLES = {number: _compile_table(algorithm.width, algorithm.polynomial)
+              for number, algorithm in CRC_ALGORITHMS.items()}
+
+
+def crc(number: int, data: bytes, seed: int = 0) -> int:
+    """CRC of `data` with the algorithm selected by CRC_POLYNOMIAL `number`, no reflection and no final XOR."""
+    table = CRC_TABLES[number]
+    width = CRC_ALGORITHMS[number].width
+    shift = width - 8
+    mask = (1 << width) - 1
+    value = seed & mask
+    if shift == 0:
+        for byte in data:
+            value = table[value ^ byte]
+        return value
+    for byte in data:
+        value = ((value << 8) & mask) ^ table[(value >> shift) ^ byte]
+    return value
+
+
+@dataclasses.dataclass(frozen=True)
+class CrcConfig:
+    """CRC settings of the packet handler, as far as they are known from the shadow."""
+    number: int
+    seed: int
+    invert: bool
+    msb_first: bool
+    # The packet handler appends the CRC to TX packets respectively strips (checks) it from RX packets, so it is not
+    # part of the FIFO data
+    tx_by_packet_handler: bool
+    rx_by_packet_handler: bool
+    # Packet handler fields in use, None unless all of them are known
+    tx_fields: Optional[FieldLayout] = None
+    rx_fields: Optional[FieldLayout] = None
+    # Index of the variable length field, None for fixed length packets
+    variable_field: Optional[int] = None
+
+    @property
+    def algorithm(self) -> CrcAlgorithm:
+        return CRC_ALGORITHMS[self.number]
+
+    def compute(self, data: bytes) -> bytes:
+        """CRC bytes as sent on air following `data`."""
+        return self.finish(crc(self.number, data, self.seed))
+
+    def finish(self, value: int) -> bytes:
+        """CRC bytes as sent on air for a CRC register value."""
+        width = self.algorithm.width
+        if self.invert:
+            value ^= (1 << width) - 1
+        return value.to_bytes(width // 8, "big" if self.msb_first else "little")
+
+    def field_lengths(self, fields: FieldLayout, packet_length: int) -> Optional[List[int]]:
+        """Length of every field of a packet, None if the packet does not fit the layout."""
+        lengths = [length for length, _ in fields]
+        variable = self.variable_field
+        if variable is None or variable >= len(fields):
+            return lengths if sum(lengths) == packet_length else None
+        lengths[variable] = packet_length - (sum(lengths) - lengths[variable])
+        if not 0 <= lengths[variable] <= fields[variable][0]:
+            return None
+        return lengths
+
+    def field_crcs(self, fields: FieldLayout, data: bytes) -> Optional[List[bytes]]:
+        """CRCs the packet handler appends to the fields of a TX packet, None if it does not fit the layout."""
+        lengths = self.field_lengths(fields, len(data))
+        if lengths is None:
+            return None
+        crcs = []
+        value = self.seed
+        position = 0
+        for (_, crc_config), length in zip(fields, lengths):
+            if crc_config & FIELD_CRC_START:
+                value = self.seed
+            if crc_config & FIELD_CRC_ENABLE:
+                value = crc(self.number, data[position:position + length], value)
+            position += length
+            if crc_config & FIELD_SEND_CRC:
+                crcs.append(self.finish(value))
+        return crcs
+
+
+def _field_layout(properties: bytearray, known: bytearray, first_key: int) -> Optional[FieldLayout]:
+    """Fields in use (up to the first one of length 0), None if any of their properties is unknown."""
+    fields = []
+    for key in range(first_key, first_key + 5 * 4, 4):
+        if not all(known[key:key + 4]):
+            return None
+        length = ((properties[key] & 0x1F) << 8) | properties[key + 1]
+        if length == 0:
+            break
+        fields.append((length, properties[key + 3]))
+    return tuple(fields)
+
+
+def crc_config(shadow: RadioShadow) -> Optional[CrcConfig]:
+    """CRC settings from the shadow, None if no CRC is used or PKT_CRC_CONFIG was not seen."""
+    properties = shadow.properties
+    known = shadow.known
+    if not known[_PKT_CRC_CONFIG] or properties[_PKT_CRC_CONFIG] & CRC_POLYNOMIAL_MASK not in CRC_ALGORITHMS:
+        return None
+    number = properties[_PKT_CRC_CONFIG] & CRC_POLYNOMIAL_MASK
+    if all(known[_PKT_CRC_SEED:_PKT_CRC_SEED + 4]):
+        seed = int.from_bytes(properties[_PKT_CRC_SEED:_PKT_CRC_SEED + 4], "big")
+    else:
+        seed = 0xFFFFFFFF if properties[_PKT_CRC_CONFIG] & CRC_SEED_ONES else 0
+    config1 = properties[_PKT_CONFIG1] if known[_PKT_CONFIG1] else 0
+    tx_layout = _field_layout(properties, known, _PKT_FIELD_1)
+    rx_layout = _field_layout(properties, known, _PKT_RX_FIELD_1) if config1 & PH_FIELD_SPLIT else tx_layout
+    dst_field = properties[_PKT_LEN] & LENGTH_DST_FIELD_MASK if known[_PKT_LEN] else 0
+    return CrcConfig(number, seed, bool(config1 & CRC_INVERT), bool(config1 & CRC_ENDIAN_MSB_FIRST),
+                     tx_layout is not None and any(crc_config & FIELD_SEND_CRC for _, crc_config in tx_layout),
+                     rx_layout is not None and any(crc_config & FIELD_CHECK_CRC for _, crc_config in rx_layout),
+                     tx_layout, rx_layout, dst_field - 1 if dst_field else None)
+
+
+class PacketCrcChecker:
+    """Verifies packets against the CRC settings, which are looked up again only after the shadow changed."""
+
+    def __init__(self, shadow: RadioShadow):
+        self._shadow = shadow
+        self._version = -1
+        self._config: Optional[CrcConfig] = None
+
+    @property
+    def config(self) -> Optional[CrcConfig]:
+        shadow = self._shadow
+        if shadow.version != self._version:
+            self._version = shadow.version
+            self._config = crc_config(shadow)
+        return self._config
+
+    def check(self, tx: bool, data: bytes, crc_error: bool) -> Optional[str]:
+        """Result of checking a packet, None if there is nothing to tell."""
+        config = self.config
+        if config is None:
+            return "CRC error" if crc_error else None
+        fields = config.tx_fields if tx else config.rx_fields
+        if fields is None:
+            # Which fields the CRC covers and who adds it is not known (e.g. configured before the capture started)
+            return "CRC error" if crc_error else None
+        if len(fields) > 1:
+            return self._check_fields(config, fields, tx, data, crc_error)
+        # A single field covers the whole packet
+        if tx and config.tx_by_packet_handler:
+            return f"CRC {config.compute(data).hex()} appended"
+        if not tx and config.rx_by_packet_handler:
+            # CRC bytes are not put into the FIFO, only the radio's verdict is known
+            return "CRC error" if crc_error else "CRC ok"
+        if not any(crc_config & FIELD_CRC_ENABLE for _, crc_config in fields):
+            return "CRC error" if crc_error else None
+        # CRC enabled for the packet but neither sent nor checked by the packet handler: computed by the host and sent
+        # as part of the payload
+        size = config.algorithm.width // 8
+        if len(data) <= size:
+            return None
+        expected = config.compute(data[:-size])
+        if data[-size:] == expected:
+            return "CRC ok"
+        return f"CRC mismatch, expected {expected.hex()}"
+
+    @staticmethod
+    def _check_fields(config: CrcConfig, fields: FieldLayout, tx: bool, data: bytes, crc_error: bool) -> Optional[str]:
+        """Check of a packet made of several fields, each with its own CRC settings."""
+        if tx:
+            crcs = config.field_crcs(fields, data)
+            if not crcs:
+                return None
+            return f"CRC {', '.join(value.hex() for value in crcs)} appended"
+        if any(crc_config & FIELD_CHECK_CRC for _, crc_config in fields):
+            return "CRC error" if crc_error else "CRC ok"
+        # A CRC computed by the host over some of the fields is not told apart from the payload
+        return "CRC error" if crc_error else None
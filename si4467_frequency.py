@@ -0,0 +1,88 @@
+# RF frequency
+# Carrier frequency of the synthesizer: f = (INTE + FRAC / 2^19) * NPRESC * f_XO / OUTDIV, where the channel adds
+# CHANNEL * CHANNEL_STEP_SIZE to FRAC.
+from typing import Optional, Tuple
+
+from si4467_properties import property_key
+from si4467_shadow import RadioShadow
+
+FRAC_SCALE = 1 << 19
+
+# MODEM_CLKGEN_BAND: SY_SEL (bit 3) selects the high performance prescaler dividing by 2 instead of 4, BAND (bits 2:0)
+# the output divider
+SY_SEL = 0x08
+BAND_MASK = 0x07
+OUTPUT_DIVIDERS = (4, 6, 8, 12, 16, 24, 24, 24)
+
+_FREQ_CONTROL_INTE = property_key(0x40, 0x00)
+_FREQ_CONTROL_FRAC = property_key(0x40, 0x01)
+_FREQ_CONTROL_CHANNEL_STEP_SIZE = property_key(0x40, 0x04)
+_MODEM_CLKGEN_BAND = property_key(0x20, 0x51)
+
+# Values after POWER_UP, used for properties not written since
+_RESET_DEFAULTS = {
+    _FREQ_CONTROL_INTE: (0x3C,),
+    _FREQ_CONTROL_FRAC: (0x08, 0x00, 0x00),
+    _FREQ_CONTROL_CHANNEL_STEP_SIZE: (0x00, 0x00),
+    _MODEM_CLKGEN_BAND: (0x08,),
+}
+
+
+def _property(shadow: RadioShadow, key: int) -> Optional[int]:
+    """Value of a property from the shadow or its reset default, None if neither is known."""
+    size = len(_RESET_DEFAULTS[key])
+    if all(shadow.known[key:key + size]):
+        return int.from_bytes(shadow.properties[key:key + size], "big")
+    if shadow.power_up_count == 0:
+        # Capture started with the radio already configured
+        return None
+    return int.from_bytes(bytes(value if shadow.known[key + offset] else _RESET_DEFAULTS[key][offset]
+                                for offset, value in enumerate(shadow.properties[key:key + size])), "big")
+
+
+def synthesizer_parameters(shadow: RadioShadow) -> Optional[Tuple[float, Optional[float], Optional[float]]]:
+    """Hz per synthesizer step (1 / 2^19 of the integer divider), frequency of channel 0 and channel spacing in Hz."""
+    if shadow.xo_frequency is None:
+        return None
+    inte = _property(shadow, _FREQ_CONTROL_INTE)
+    frac = _property(shadow, _FREQ_CONTROL_FRAC)
+    step_size = _property(shadow, _FREQ_CONTROL_CHANNEL_STEP_SIZE)
+    band = _property(shadow, _MODEM_CLKGEN_BAND)
+    if band is None:
+        return None
+    prescaler = 2 if band & SY_SEL else 4
+    hz_per_step = prescaler * shadow.xo_frequency / OUTPUT_DIVIDERS[band & BAND_MASK] / FRAC_SCALE
+    if inte is None or frac is None or step_size is None:
+        return hz_per_step, None, None
+    return hz_per_step, (inte * FRAC_SCALE + frac) * hz_per_step, step_size * hz_per_step
+
+
+class FrequencyCalculator:
+    """Carrier frequencies, with the synthesizer parameters derived again only after the shadow changed."""
+
+    def __init__(self, shadow: RadioShadow):
+        self._shadow = shadow
+        self._version = -1
+        self._parameters: Optional[Tuple[float, Optional[float], Optional[float]]] = None
+
+    @property
+    def parameters(self) -> Optional[Tuple[float, Optional[float], Optional[float]]]:
+        shadow = self._shadow
+        if shadow.version != self._version:
+            self._version = shadow.version
+            self._parameters = synthesizer_parameters(shadow)
+        return self._parameters
+
+    def channel_frequency(self, channel: int) -> Optional[float]:
+        """Frequency START_TX/START_RX tune to."""
+        parameters = self.parameters
+        if parameters is None or parameters[1] is None:
+            return None
+        return parameters[1] + channel * parameters[2]
+
+    def hop_frequency(self, inte: int, frac: int) -> Optional[float]:
+        """Frequency TX_HOP/RX_HOP tune to, given directly as integer and fractional divider."""
+        parameters = self.parameters
+        if parameters is None:
+            return None
+        return (inte * FRAC_SCALE + frac) * parameters[0]
@@ -0,0 +1,116 @@
+# Command n-grams
+# Most frequent sequences of commands on the bus along with the bus time they take, to tell which host driver code
+# paths are worth optimizing. Fed by the transaction listeners of Si4467Analyzer.
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from si4467_analyzer import Transaction
+
+DEFAULT_MAX_LENGTH = 5
+DEFAULT_CAPACITY = 4096
+
+
+def pack(commands: Tuple[int, ...]) -> int:
+    """N-gram as an int: a leading 1 followed by one byte per command ID, so n-grams of different lengths differ."""
+    key = 1
+    for command_id in commands:
+        key = (key << 8) | command_id
+    return key
+
+
+def unpack(key: int) -> Tuple[int, ...]:
+    commands = []
+    while key > 1:
+        commands.append(key & 0xFF)
+        key >>= 8
+    return tuple(reversed(commands))
+
+
+class NgramCounter:
+    """Streaming counts of command n-grams of 2..`max_length` commands.
+
+    Counts are kept per length with a Misra-Gries summary of at most `capacity` entries: an n-gram that is not tracked
+    while the summary is full decrements every count by one instead of being added, and entries reaching zero are
+    dropped. Counts are therefore lower bounds, off by at most (n-grams seen) / (capacity + 1), and every n-gram more
+    frequent than that is guaranteed to be kept. Bus time is summed alongside for as long as an n-gram is tracked.
+    """
+
+    def __init__(self, max_length: int = DEFAULT_MAX_LENGTH, capacity: int = DEFAULT_CAPACITY,
+                 max_gap: Optional[float] = None):
+        self.max_length = max_length
+        self.capacity = capacity
+        # Idle time (seconds) after which a sequence is considered to have ended, None to never split
+        self.max_gap = max_gap
+        self.counts: List[Dict[int, int]] = [{} for _ in range(0, max_length + 1)]
+        self.times: List[Dict[int, float]] = [{} for _ in range(0, max_length + 1)]
+        self.totals = [0] * (max_length + 1)
+        # Last `max_length` command IDs packed into an int, and the running bus time at each of them
+        self._window = 0
+        self._window_length = 0
+        self._window_mask = (1 << (8 * max_length)) - 1
+        self._elapsed = 0.0
+        self._elapsed_at = [0.0] * (max_length + 1)
+        self._position = 0
+        self._last_end: Any = None
+        # Per length: bit marking the length in the key, mask of its command IDs
+        self._length_bits = [(length, 1 << (8 * length), (1 << (8 * length)) - 1)
+                             for length in range(2, max_length + 1)]
+
+    def add(self, transaction: Transaction) -> None:
+        if self._last_end is not None and self.max_gap is not None and \
+                float(transaction.start_time - self._last_end) > self.max_gap:
+            self._window_length = 0
+        self._last_end = transaction.end_time
+        self._window = ((self._window << 8) | transaction.command_id) & self._window_mask
+        if self._window_length < self.max_length:
+            self._window_length += 1
+        slots = self.max_length + 1
+        # Running bus time before this transaction, at slot `position`
+        self._elapsed_at[self._position] = self._elapsed
+        self._elapsed += float(transaction.end_time - transaction.start_time)
+        window = self._window
+        elapsed = self._elapsed
+        position = self._position
+        for length, length_bit, mask in self._length_bits[:self._window_length - 1]:
+            key = length_bit | (window & mask)
+            seconds = elapsed - self._elapsed_at[(position - length + 1) % slots]
+            counts = self.counts[length]
+            self.totals[length] += 1
+            if key in counts:
+                counts[key] += 1
+                self.times[length][key] += seconds
+            else:
+                self._insert(length, key, seconds)
+        self._position = (position + 1) % slots
+
+    def _insert(self, length: int, key: int, seconds: float) -> None:
+        counts = self.counts[length]
+        times = self.times[length]
+        if len(counts) >= self.capacity:
+            # Each decrement cancels `capacity` + 1 occurrences, so this costs O(1) per n-gram amortized
+            for other in list(counts):
+                count = counts[other] - 1
+                if count:
+                    counts[other] = count
+                else:
+                    del counts[other]
+                    del times[other]
+            return
+        counts[key] = 1
+        times[key] = seconds
+
+    def most_common(self, count: int = 20, length: Optional[int] = None) -> List[Tuple[Tuple[int, ...], int, float]]:
+        """(command IDs, count, bus time in seconds) of the most frequent n-grams, of one or all lengths."""
+        lengths = range(2, self.max_length + 1) if length is None else (length,)
+        entries = [(key, ngram_count, self.times[ngram_length][key])
+                   for ngram_length in lengths for key, ngram_count in self.counts[ngram_length].items()]
+        entries.sort(key=lambda entry: (-entry[1], -entry[2]))
+        return [(unpack(key), ngram_count, seconds) for key, ngram_count, seconds in entries[:count]]
+
+    def render(self, command_name: Callable[[int], str], count: int = 20) -> str:
+        lines = []
+        for length in range(2, self.max_length + 1):
+            lines.append(f"{length}-grams ({self.totals[length]} seen, counts may be low by up to "
+                         f"{self.totals[length] // (self.capacity + 1)}):")
+            for commands, ngram_count, seconds in self.most_common(count, length):
+                lines.append(f"  {ngram_count:10} {seconds:12.6f} s  {' -> '.join(map(command_name, commands))}")
+        return "\n".join(lines)
@@ -0,0 +1,463 @@
+# Offline decoder
+# Replays a Logic 2 SPI analyzer export (Data table -> Export to CSV) through Si4467Analyzer without running Logic 2.
+import argparse
+import collections
+import csv
+import dataclasses
+import io
+import itertools
+import multiprocessing
+import os
+import sys
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from si4467_analyzer import (AnalyzerFrame, COMMAND_ID_TO_NAME, COMMANDS_WITH_IMMEDIATE_RESPONSE, OUTPUT_PER_BYTE,
+                             OUTPUT_PER_FIELD, OUTPUT_TRANSACTION_ONLY, POLLS_COLLAPSE, POLLS_SHOW_ALL, TRACKING_OFF,
+                             TRACKING_ON, Command, Si4467Analyzer, TrackedState)
+from si4467_ngrams import NgramCounter
+from si4467_properties import PROPERTY_NAME_TO_DESCRIPTION
+from si4467_report import BusReport
+from si4467_shadow import RadioShadow
+
+OUTPUT_GRANULARITIES = {
+    "byte": OUTPUT_PER_BYTE,
+    "field": OUTPUT_PER_FIELD,
+    "transaction": OUTPUT_TRANSACTION_ONLY,
+}
+
+# Single byte objects as found in `frame.data['mosi']` / `frame.data['miso']` of the SPI analyzer, keyed by how
+# Logic 2 renders them in its CSV export
+_BYTES_BY_TEXT = {}
+for _value in range(256):
+    _single = bytes((_value,))
+    for _text in (f"0x{_value:02X}", f"0x{_value:02x}", f"{_value}"):
+        _BYTES_BY_TEXT[_text] = _single
+
+# Upper bound of the size of the pieces of a CSV export decoded in parallel
+PARALLEL_CHUNK_BYTES = 16 << 20
+# Commands whose decoding depends on the command before them (READ_CMD_BUFF) or which leave it to the next one to
+# do so, pieces decoded in parallel never start with them
+_NO_SPLIT_COMMANDS = set(COMMANDS_WITH_IMMEDIATE_RESPONSE)
+# Transactions at the start of a piece decoded in parallel after which the merge compares the tracked state with the
+# one it actually started from, see decode_spi_csv_parallel
+_CHECKED_TRANSACTIONS = 256
+_START_TX = Command.START_TX.value
+_START_RX = Command.START_RX.value
+
+
+def _parse_byte(text: str) -> bytes:
+    try:
+        return _BYTES_BY_TEXT[text]
+    except KeyError:
+        if not text:
+            raise ValueError("result row without a MOSI/MISO value") from None
+        return bytes((int(text, 0) & 0xFF,))
+
+
+def read_spi_csv(lines: Iterable[str], line_offset: int = 0) -> Iterator[AnalyzerFrame]:
+    """Turn the rows of a Logic 2 SPI export into the frames the SPI analyzer hands to a HLA.
+
+    Times are seconds since capture start (plain floats). Malformed rows raise ValueError naming the line, plus
+    `line_offset` for a piece of an export following its header.
+    """
+    reader = csv.reader(lines)
+    header = [column.strip().lower() for column in next(reader)]
+    type_column = header.index("type")
+    start_column = header.index("start_time")
+    duration_column = header.index("duration")
+    mosi_column = header.index("mosi")
+    miso_column = header.index("miso")
+    parse_byte = _parse_byte
+    try:
+        for row in reader:
+            if not row:
+                continue
+            frame_type = row[type_column]
+            start_time = float(row[start_column])
+            end_time = start_time + float(row[duration_column])
+            if frame_type == "result":
+                yield AnalyzerFrame("result", start_time, end_time, {
+                    "mosi": parse_byte(row[mosi_column]),
+                    "miso": parse_byte(row[miso_column]),
+                })
+            elif frame_type in ("enable", "disable"):
+                yield AnalyzerFrame(frame_type, start_time, end_time, {})
+    except ValueError as error:
+        raise ValueError(f"line {reader.line_num + line_offset}: {error}") from None
+
+
+def _command_name(command_id: int) -> str:
+    return COMMAND_ID_TO_NAME.get(command_id, f"0x{command_id:02x}")
+
+
+def create_analyzer(**settings) -> Si4467Analyzer:
+    """Instantiate the HLA with settings applied the way Logic 2 does, before `__init__` runs."""
+    analyzer = Si4467Analyzer.__new__(Si4467Analyzer)
+    for name, value in settings.items():
+        setattr(analyzer, name, value)
+    analyzer.__init__()
+    return analyzer
+
+
+def decode_frames(frames: Iterable[AnalyzerFrame],
+                  analyzer: Optional[Si4467Analyzer] = None) -> Iterator[AnalyzerFrame]:
+    """Feed SPI frames through the HLA and yield everything it produces, in order, including what it holds back at the
+    end of the input."""
+    if analyzer is None:
+        analyzer = create_analyzer()
+    decode = analyzer.decode
+    for frame in frames:
+        result = decode(frame)
+        if result is None:
+            continue
+        if isinstance(result, list):
+            yield from result
+        else:
+            yield result
+    pending = analyzer.flush()
+    if pending is not None:
+        yield pending
+
+
+def _track_end_time(frames: Iterable[AnalyzerFrame], end_time: List) -> Iterator[AnalyzerFrame]:
+    """Pass frames through, keeping the end time of the latest one in `end_time[0]`."""
+    for frame in frames:
+        end_time[0] = frame.end_time
+        yield frame
+
+
+def write_frames_csv(frames: Iterable[AnalyzerFrame], output: TextIO, header: bool = True) -> int:
+    """Write decoded frames as CSV, returns the number of frames written."""
+    writer = csv.writer(output, lineterminator="\n")
+    if header:
+        writer.writerow(("type", "start_time", "end_time", "name", "payload"))
+    count = 0
+    for frame in frames:
+        writer.writerow(_frame_row(frame))
+        count += 1
+    return count
+
+
+def _frame_row(frame: AnalyzerFrame) -> Tuple[str, str, str, Any, Any]:
+    data = frame.data
+    return (frame.type, f"{float(frame.start_time):.9f}", f"{float(frame.end_time):.9f}", data.get("name", ""),
+            data.get("payload", ""))
+
+
+def _next_split_point(file: BinaryIO, type_column: int, mosi_column: int) -> Optional[int]:
+    """Offset of the first `enable` row from the current position on that starts a piece, None if there is none."""
+    while True:
+        position = file.tell()
+        line = file.readline()
+        if not line:
+            return None
+        row = next(csv.reader([line.decode()]), None)
+        if not row or row[type_column] != "enable":
+            continue
+        row = next(csv.reader([file.readline().decode()]), None)
+        if row and row[type_column] == "result" and _parse_byte(row[mosi_column])[0] not in _NO_SPLIT_COMMANDS:
+            return position
+        file.seek(position + len(line))
+
+
+def split_spi_csv(path: str, chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> Tuple[str, List[Tuple[int, int]]]:
+    """Header line and byte ranges of the rows of a Logic 2 SPI export, cut into pieces of about `chunk_bytes`.
+
+    Pieces start at an NSEL enable followed by a command that does not depend on the ones before it, so decoding them
+    separately gives the same frames, given what was tracked across the transactions before (Si4467Analyzer.restore).
+    """
+    with open(path, "rb") as file:
+        header = file.readline().decode()
+        columns = [column.strip().lower() for column in next(csv.reader([header]))]
+        type_column = columns.index("type")
+        mosi_column = columns.index("mosi")
+        size = os.fstat(file.fileno()).st_size
+        starts = [file.tell()]
+        while starts[-1] + chunk_bytes < size:
+            file.seek(starts[-1] + chunk_bytes)
+            # Skip the rest of the row the seek ended up in
+            file.readline()
+            start = _next_split_point(file, type_column, mosi_column)
+            if start is None:
+                break
+            starts.append(start)
+    return header, list(zip(starts, starts[1:] + [size]))
+
+
+def _piece_frames(header: str, data: bytes, line_offset: int) -> Iterator[AnalyzerFrame]:
+    """Frames of the rows of a piece of a CSV export."""
+    return read_spi_csv(itertools.chain((header,), data.decode().splitlines()), line_offset)
+
+
+def _read_piece(path: str, start: int, end: int) -> bytes:
+    with open(path, "rb") as file:
+        file.seek(start)
+        return file.read(end - start)
+
+
+def _decode_transactions_csv(frames: Iterable[AnalyzerFrame], analyzer: Si4467Analyzer,
+                             output: TextIO) -> Iterator[None]:
+    """write_frames_csv (without header) of decode_frames, pausing after every NSEL release so the caller can look at
+    what the analyzer tracked up to there."""
+    writer = csv.writer(output, lineterminator="\n")
+    decode = analyzer.decode
+    for frame in frames:
+        result = decode(frame)
+        if result is not None:
+            if isinstance(result, list):
+                writer.writerows(map(_frame_row, result))
+            else:
+                writer.writerow(_frame_row(result))
+        if frame.type == "disable":
+            yield
+    pending = analyzer.flush()
+    if pending is not None:
+        writer.writerow(_frame_row(pending))
+
+
+def _track_csv_chunk(task: Tuple[str, str, int, int, Dict[str, Any]]
+                     ) -> Tuple[int, Optional[TrackedState], Set[int], int]:
+    """Number of lines of one piece of a CSV export, what an analyzer starting from scratch tracked over it, the
+    commands it saw and the number of radio states it went through (run in a worker process). Nothing is tracked if
+    the piece is malformed, decoding it tells where.
+    """
+    path, header, start, end, settings = task
+    data = _read_piece(path, start, end)
+    analyzer = create_analyzer(**dict(settings, output_granularity=OUTPUT_TRANSACTION_ONLY))
+    states = analyzer.record_state_history()
+    commands: Set[int] = set()
+    analyzer.transaction_listeners.append(lambda transaction: commands.add(transaction.command_id))
+    try:
+        for frame in _piece_frames(header, data, 0):
+            analyzer.decode(frame)
+    except ValueError:
+        return data.count(b"\n"), None, commands, len(states)
+    return data.count(b"\n"), analyzer.snapshot(), commands, len(states)
+
+
+def _guess_tracked(before: Optional[TrackedState], piece: Optional[TrackedState], commands: Set[int],
+                   state_count: int) -> Optional[TrackedState]:
+    """Likely state tracked after a piece, from the one guessed for its start and what _track_csv_chunk gave for it.
+
+    The configuration adds up exactly. Packets, the radio state and the CTS wait are only right once the piece had
+    enough traffic to not depend on how it started, the merge in decode_spi_csv_parallel catches where they are not.
+    """
+    if piece is None:
+        return before
+    shadow = RadioShadow() if before is None else before.shadow.copy()
+    shadow.apply(piece.shadow)
+    guess = dataclasses.replace(piece, shadow=shadow)
+    if before is not None:
+        # A piece that only saw the state it started in did not change it
+        if piece.state is None or (state_count == 1 and before.state is not None
+                                   and before.state[0] == piece.state[0]):
+            guess.state = before.state
+        if _START_TX not in commands:
+            guess.tx_complete_state = before.tx_complete_state
+        if _START_RX not in commands:
+            guess.rx_valid_state = before.rx_valid_state
+            guess.rx_invalid_state = before.rx_invalid_state
+    return guess
+
+
+def _decode_csv_chunk(task: Tuple[str, str, int, int, int, Dict[str, Any], Optional[TrackedState]]
+                      ) -> Tuple[str, List[Tuple[int, TrackedState]], TrackedState]:
+    """Decoded frames of one piece of a CSV export as CSV rows, starting from the given tracked state (run in a worker
+    process).
+
+    Also returns where the output ends and what is tracked (without the shadow) after each of the first
+    _CHECKED_TRANSACTIONS transactions, and everything tracked at the end.
+    """
+    path, header, start, end, line_offset, settings, tracked = task
+    analyzer = create_analyzer(**settings)
+    if tracked is not None:
+        analyzer.restore(tracked)
+    output = io.StringIO()
+    checkpoints = []
+    for _ in _decode_transactions_csv(_piece_frames(header, _read_piece(path, start, end), line_offset), analyzer,
+                                      output):
+        if len(checkpoints) < _CHECKED_TRANSACTIONS:
+            checkpoints.append((output.tell(), analyzer.snapshot(shadow=False)))
+    return output.getvalue(), checkpoints, analyzer.snapshot()
+
+
+def _without_shadow(tracked: Optional[TrackedState]) -> Optional[TrackedState]:
+    return None if tracked is None else dataclasses.replace(tracked, shadow=None)
+
+
+def _merge_csv_chunk(task: Tuple[str, str, int, int, int, Dict[str, Any], Optional[TrackedState]],
+                     result: Tuple[str, List[Tuple[int, TrackedState]], TrackedState],
+                     tracked: Optional[TrackedState], output: TextIO) -> TrackedState:
+    """Write the frames of a piece decoded by _decode_csv_chunk, given what was actually tracked before the piece.
+    Returns what is tracked after it.
+
+    If the worker started from something else, the piece is decoded again from the actual state until both track the
+    same after a transaction, the worker's output is right from there on.
+    """
+    path, header, start, end, line_offset, settings, guess = task
+    text, checkpoints, final = result
+    if _without_shadow(guess) == _without_shadow(tracked):
+        output.write(text)
+        return final
+    analyzer = create_analyzer(**settings)
+    if tracked is not None:
+        analyzer.restore(tracked)
+    steps = _decode_transactions_csv(_piece_frames(header, _read_piece(path, start, end), line_offset), analyzer,
+                                     output)
+    for (position, checkpoint), _ in zip(checkpoints, steps):
+        if analyzer.snapshot(shadow=False) == checkpoint:
+            output.write(text[position:])
+            return final
+    for _ in steps:
+        pass
+    return analyzer.snapshot()
+
+
+def decode_spi_csv_parallel(path: str, output: TextIO, jobs: int, **settings) -> None:
+    """write_frames_csv of a whole CSV export, with the pieces of split_spi_csv decoded by `jobs` processes.
+
+    The processes first follow each piece from scratch (transactions only, no per byte frames). Putting the
+    configurations together gives the exact shadow at the start of every piece and the rest of what these passes
+    tracked is a guess of the other state the piece starts in. The pieces are then decoded from there and merged in
+    order: where a guess turns out wrong, the start of the piece is decoded again until it arrives at the same state
+    as the worker. The frames are the same as decoding the export in one go.
+    """
+    chunk_bytes = min(PARALLEL_CHUNK_BYTES, max(os.path.getsize(path) // (4 * jobs), 1))
+    header, ranges = split_spi_csv(path, chunk_bytes)
+    write_frames_csv((), output)
+    with multiprocessing.Pool(jobs) as pool:
+        pieces = pool.imap(_track_csv_chunk, [(path, header, start, end, settings) for start, end in ranges])
+        guess: Optional[TrackedState] = None
+        tracked: Optional[TrackedState] = None
+        line_offset = 0
+        pending = collections.deque()
+        for (start, end), (line_count, piece, commands, state_count) in zip(ranges, pieces):
+            task = (path, header, start, end, line_offset, settings, guess)
+            pending.append((task, pool.apply_async(_decode_csv_chunk, (task,))))
+            line_offset += line_count
+            guess = _guess_tracked(guess, piece, commands, state_count)
+            while pending and pending[0][1].ready():
+                task, result = pending.popleft()
+                tracked = _merge_csv_chunk(task, result.get(), tracked, output)
+        for task, result in pending:
+            tracked = _merge_csv_chunk(task, result.get(), tracked, output)
+
+
+def _property_query(text: str) -> Tuple[str, float]:
+    """NAME@SECONDS of --property-at."""
+    name, _, seconds = text.partition("@")
+    if name not in PROPERTY_NAME_TO_DESCRIPTION:
+        raise argparse.ArgumentTypeError(f"unknown property {name!r}")
+    try:
+        return name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME@SECONDS, got {text!r}") from None
+
+
+def _read_digital(paths: List[str], spi_mode: int) -> Iterator[AnalyzerFrame]:
+    # NumPy is only needed for raw digital captures
+    from si4467_spi import SpiMode, decode_spi_chunks, read_digital_export, spi_frames
+
+    nsel, sclk, mosi, miso = (read_digital_export(path) for path in paths)
+    for spi_bytes in decode_spi_chunks(nsel, sclk, mosi, miso, SpiMode(cpol=spi_mode >> 1, cpha=spi_mode & 1)):
+        yield from spi_frames(spi_bytes)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Decode a Logic 2 SPI CSV export as Si4467 traffic")
+    parser.add_argument("input", nargs="?", help="SPI analyzer CSV export, '-' for stdin")
+    parser.add_argument("--digital", nargs=4, metavar=("NSEL", "SCLK", "MOSI", "MISO"),
+                        help="decode SPI from Logic 2 binary digital exports (digital_N.bin) instead, needs NumPy")
+    parser.add_argument("--spi-mode", type=int, choices=range(0, 4), default=0,
+                        help="SPI mode of the --digital channels (CPOL << 1 | CPHA), 0 for the Si4467")
+    parser.add_argument("-o", "--output", help="decoded frames CSV, stdout if omitted")
+    parser.add_argument("-g", "--granularity", choices=sorted(OUTPUT_GRANULARITIES), default="byte",
+                        help="frames to emit: one per byte, one per field or only one per transaction")
+    parser.add_argument("--collapse-polls", action="store_true",
+                        help="emit one frame per run of READ_CMD_BUFF polls returning CTS not ready")
+    parser.add_argument("--no-tracking", action="store_true",
+                        help="only decode commands, without reassembling packets or following radio states and CTS "
+                             "waits (faster)")
+    parser.add_argument("--property-at", action="append", default=[], type=_property_query, metavar="NAME@SECONDS",
+                        help="print the value a property had at the given capture time, e.g. MODEM_DATA_RATE@12.345")
+    parser.add_argument("--report", action="store_true",
+                        help="print a breakdown of the bus time and wasteful host driver patterns")
+    parser.add_argument("--ngrams", type=int, default=0, metavar="MAX_LENGTH",
+                        help="print the most frequent command sequences of 2..MAX_LENGTH commands")
+    parser.add_argument("--state-durations", action="store_true",
+                        help="print the time spent in every radio state")
+    parser.add_argument("--cts-report", action="store_true",
+                        help="print how long and how many READ_CMD_BUFF polls every command waited for CTS")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="decode an input CSV file with up to this many processes (at most one per CPU)")
+    args = parser.parse_args(argv)
+    if (args.input is None) == (args.digital is None):
+        parser.error("give either an input CSV export or --digital")
+    if args.jobs > 1 and (args.input in (None, "-") or args.property_at or args.report or args.ngrams or
+                          args.state_durations or args.cts_report):
+        parser.error("--jobs needs an input CSV file and does not combine with reports")
+    if args.no_tracking and (args.state_durations or args.cts_report):
+        parser.error("--state-durations and --cts-report need tracking")
+    settings = dict(output_granularity=OUTPUT_GRANULARITIES[args.granularity],
+                    cts_poll_output=POLLS_COLLAPSE if args.collapse_polls else POLLS_SHOW_ALL,
+                    radio_tracking=TRACKING_OFF if args.no_tracking else TRACKING_ON)
+    # More processes than CPUs only add overhead, a single one is the serial decoder
+    jobs = min(args.jobs, os.cpu_count() or 1)
+    if jobs > 1:
+        sink = sys.stdout if args.output is None else open(args.output, "w", newline="")
+        try:
+            decode_spi_csv_parallel(args.input, sink, jobs, **settings)
+        except ValueError as error:
+            parser.exit(1, f"{parser.prog}: {args.input}: {error}\n")
+        finally:
+            if sink is not sys.stdout:
+                sink.close()
+        return 0
+    analyzer = create_analyzer(**settings)
+    if args.property_at:
+        analyzer.shadow.record_history()
+    if args.cts_report:
+        analyzer.record_cts_statistics()
+    if args.state_durations:
+        analyzer.record_state_history()
+
+    source = None if args.input is None else sys.stdin if args.input == "-" else open(args.input, newline="")
+    sink = sys.stdout if args.output is None else open(args.output, "w", newline="")
+    report = BusReport(analyzer.shadow)
+    if args.report:
+        analyzer.transaction_listeners.append(report.add)
+    ngrams = NgramCounter(max(args.ngrams, 2))
+    if args.ngrams:
+        analyzer.transaction_listeners.append(ngrams.add)
+
+    capture_end = [None]
+    try:
+        frames = read_spi_csv(source) if source is not None else _read_digital(args.digital, args.spi_mode)
+        if args.state_durations:
+            frames = _track_end_time(frames, capture_end)
+        write_frames_csv(decode_frames(frames, analyzer), sink)
+    except ValueError as error:
+        parser.exit(1, f"{parser.prog}: {args.input}: {error}\n")
+    finally:
+        if source is not None and source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    for name, seconds in args.property_at:
+        value = analyzer.shadow.property_value_at(name, seconds)
+        print(f"{name} @ {seconds} s: {'unknown' if value is None else f'{value} (0x{value:x})'}", file=sys.stderr)
+    if args.state_durations:
+        for state, seconds in analyzer.states.durations(end=capture_end[0]).items():
+            print(f"{state}: {seconds:.6f} s", file=sys.stderr)
+    if args.report:
+        print(report.render(), file=sys.stderr)
+    if args.ngrams:
+        print(ngrams.render(_command_name), file=sys.stderr)
+    if args.cts_report:
+        print(analyzer.cts.report(_command_name), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
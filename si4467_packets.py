@@ -0,0 +1,188 @@
+# Packet reassembly
+# Collects the payload written to the TX FIFO and read from the RX FIFO into whole packets, including large packets
+# moved through the FIFO in several chunks (driven by the FIFO almost empty/full thresholds).
+import dataclasses
+from typing import Any, List, Optional
+
+# Packet lengths are 13 bit (TX_LEN, PKT_FIELD_x_LENGTH)
+MAX_PACKET_LENGTH = 8191
+
+TX = "TX"
+RX = "RX"
+
+
+@dataclasses.dataclass
+class Packet:
+    direction: str
+    start_time: Any
+    end_time: Any
+    data: bytes
+    # More bytes than MAX_PACKET_LENGTH were moved through the FIFO, the rest was dropped
+    truncated: bool = False
+    # The radio flagged a CRC error while receiving the packet
+    crc_error: bool = False
+
+
+class _PacketBuffer:
+    """Bytes of the packet in flight in one direction, never holding more than `max_length` bytes."""
+
+    def __init__(self, direction: str, max_length: int):
+        self.direction = direction
+        self.max_length = max_length
+        self.data = bytearray()
+        self.start_time = None
+        self.end_time = None
+        self.truncated = False
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _PacketBuffer) and vars(self) == vars(other)
+
+    def extend(self, data: bytes, start_time: Any, end_time: Any) -> None:
+        if not self.data:
+            self.start_time = start_time
+        room = self.max_length - len(self.data)
+        if len(data) > room:
+            data = data[:room]
+            self.truncated = True
+        self.data += data
+        self.end_time = end_time
+
+    @property
+    def full(self) -> bool:
+        return len(self.data) >= self.max_length
+
+    def take(self, length: Optional[int] = None, end_time: Any = None) -> Packet:
+        """Remove the first `length` (default: all) bytes as a packet."""
+        if length is None or length >= len(self.data):
+            length = len(self.data)
+        packet = Packet(self.direction, self.start_time, self.end_time if end_time is None else end_time,
+                        bytes(self.data[:length]), self.truncated)
+        del self.data[:length]
+        self.truncated = False
+        if not self.data:
+            self.start_time = self.end_time = None
+        return packet
+
+    def clear(self) -> None:
+        self.data.clear()
+        self.truncated = False
+        self.start_time = self.end_time = None
+
+
+class PacketAssembler:
+    """Turns FIFO traffic and packet handler interrupts into packets.
+
+    TX packets are complete once TX_LEN bytes (START_TX) were written or, if the length is given by the packet
+    handler configuration, when PACKET_SENT is seen. RX packets end after PACKET_RX was seen and the host stopped
+    reading the FIFO, i.e. with the first transaction other than a FIFO read or FIFO/packet information request.
+    """
+
+    def __init__(self, max_length: int = MAX_PACKET_LENGTH):
+        self._tx = _PacketBuffer(TX, max_length)
+        self._tx_transmitting = False
+        self._tx_length: Optional[int] = None
+        # Bytes in the TX FIFO when START_TX was issued
+        self._tx_length_at_start = 0
+        self._rx = _PacketBuffer(RX, max_length)
+        # PACKET_RX was seen, the packet ends once the host stops reading the FIFO
+        self.rx_complete = False
+        self._rx_read_after_complete = False
+        self._rx_crc_error = False
+
+    def __eq__(self, other: object) -> bool:
+        """Same packets in flight, so the same packets come out of the same traffic from here on."""
+        return isinstance(other, PacketAssembler) and vars(self) == vars(other)
+
+    def tx_fifo_write(self, data: bytes, start_time: Any, end_time: Any) -> List[Packet]:
+        self._tx.extend(data, start_time, end_time)
+        if self._tx_transmitting and self._tx_length is not None and len(self._tx.data) >= self._tx_length:
+            return [self._finish_tx(self._tx_length)]
+        if self._tx.full:
+            return [self._finish_tx()]
+        return []
+
+    def start_tx(self, tx_length: int, end_time: Any) -> List[Packet]:
+        packets = []
+        if self._tx_transmitting and self._tx.data:
+            # PACKET_SENT of the previous packet was not seen, it consisted of what was in the FIFO back then
+            packets.append(self._finish_tx(self._tx_length or self._tx_length_at_start))
+        self._tx_transmitting = True
+        self._tx_length = tx_length or None
+        self._tx_length_at_start = len(self._tx.data)
+        if self._tx_length is not None and len(self._tx.data) >= self._tx_length:
+            packets.append(self._finish_tx(self._tx_length, end_time))
+        return packets
+
+    def _finish_tx(self, length: Optional[int] = None, end_time: Any = None) -> Packet:
+        self._tx_transmitting = False
+        self._tx_length = None
+        self._tx_length_at_start = 0
+        return self._tx.take(length, end_time)
+
+    def rx_fifo_read(self, data: bytes, start_time: Any, end_time: Any) -> List[Packet]:
+        self._rx.extend(data, start_time, end_time)
+        if self.rx_complete:
+            self._rx_read_after_complete = True
+        if self._rx.full:
+            return [self._finish_rx()]
+        return []
+
+    def _finish_rx(self) -> Packet:
+        packet = self._rx.take()
+        packet.crc_error = self._rx_crc_error
+        self.rx_complete = False
+        self._rx_read_after_complete = False
+        self._rx_crc_error = False
+        return packet
+
+    def packet_handler_pending(self, packet_sent: bool, packet_rx: bool, crc_error: bool,
+                               end_time: Any) -> List[Packet]:
+        """Packet handler interrupts seen in GET_INT_STATUS/GET_PH_STATUS replies or FRR reads."""
+        packets = []
+        if packet_sent and self._tx_transmitting:
+            if self._tx.data:
+                packets.append(self._finish_tx(end_time=end_time))
+            else:
+                # The packet was already complete, the radio is done with it either way
+                self._tx_transmitting = False
+                self._tx_length = None
+                self._tx_length_at_start = 0
+        if packet_rx or crc_error:
+            if self._rx_read_after_complete:
+                # Another packet arrived while the previous one was still being read
+                packets.append(self._finish_rx())
+            self.rx_complete = True
+            self._rx_crc_error = self._rx_crc_error or crc_error
+        return packets
+
+    @property
+    def rx_reading(self) -> bool:
+        """The host is reading out a received packet, which ends with the first transaction doing something else."""
+        return self._rx_read_after_complete
+
+    def rx_reading_stopped(self) -> List[Packet]:
+        """Any transaction that is not part of reading out the RX FIFO."""
+        if self.rx_complete and self._rx_read_after_complete and self._rx.data:
+            return [self._finish_rx()]
+        return []
+
+    def start_rx(self) -> List[Packet]:
+        if self.rx_complete and self._rx.data:
+            return [self._finish_rx()]
+        return []
+
+    def fifo_reset(self, rx: bool, tx: bool) -> List[Packet]:
+        packets = []
+        if rx:
+            if self.rx_complete and self._rx.data:
+                packets.append(self._finish_rx())
+            self._rx.clear()
+            self.rx_complete = False
+            self._rx_read_after_complete = False
+            self._rx_crc_error = False
+        if tx:
+            self._tx.clear()
+            self._tx_transmitting = False
+            self._tx_length = None
+            self._tx_length_at_start = 0
+        return packets
@@ -0,0 +1,225 @@
+# Si4467 property database
+# Properties are addressed by group and index, see the EZRadioPRO API documentation. Multi-byte properties occupy
+# consecutive indices, most significant byte first.
+import dataclasses
+from typing import Dict, List, Optional
+
+
+@dataclasses.dataclass(frozen=True)
+class PropertyDescription:
+    group: int
+    index: int
+    name: str
+    size: int = 1
+
+    @property
+    def key(self) -> int:
+        return property_key(self.group, self.index)
+
+
+def property_key(group: int, index: int) -> int:
+    """Position of a property in the flat per-property tables."""
+    return (group << 8) | index
+
+
+PROPERTY_GROUPS = {
+    0x00: "GLOBAL",
+    0x01: "INT_CTL",
+    0x02: "FRR_CTL",
+    0x10: "PREAMBLE",
+    0x11: "SYNC",
+    0x12: "PKT",
+    0x20: "MODEM",
+    0x21: "MODEM_CHFLT",
+    0x22: "PA",
+    0x23: "SYNTH",
+    0x30: "MATCH",
+    0x40: "FREQ_CONTROL",
+    0x50: "RX_HOP",
+}
+
+# @formatter:off
+PROPERTY_LIST = [
+    PropertyDescription(0x00, 0x00, "GLOBAL_XO_TUNE"),
+    PropertyDescription(0x00, 0x01, "GLOBAL_CLK_CFG"),
+    PropertyDescription(0x00, 0x02, "GLOBAL_LOW_BATT_THRESH"),
+    PropertyDescription(0x00, 0x03, "GLOBAL_CONFIG"),
+    PropertyDescription(0x00, 0x04, "GLOBAL_WUT_CONFIG"),
+    PropertyDescription(0x00, 0x05, "GLOBAL_WUT_M", 2),
+    PropertyDescription(0x00, 0x07, "GLOBAL_WUT_R"),
+    PropertyDescription(0x00, 0x08, "GLOBAL_WUT_LDC"),
+    PropertyDescription(0x00, 0x09, "GLOBAL_WUT_CAL"),
+
+    PropertyDescription(0x01, 0x00, "INT_CTL_ENABLE"),
+    PropertyDescription(0x01, 0x01, "INT_CTL_PH_ENABLE"),
+    PropertyDescription(0x01, 0x02, "INT_CTL_MODEM_ENABLE"),
+    PropertyDescription(0x01, 0x03, "INT_CTL_CHIP_ENABLE"),
+
+    PropertyDescription(0x02, 0x00, "FRR_CTL_A_MODE"),
+    PropertyDescription(0x02, 0x01, "FRR_CTL_B_MODE"),
+    PropertyDescription(0x02, 0x02, "FRR_CTL_C_MODE"),
+    PropertyDescription(0x02, 0x03, "FRR_CTL_D_MODE"),
+
+    PropertyDescription(0x10, 0x00, "PREAMBLE_TX_LENGTH"),
+    PropertyDescription(0x10, 0x01, "PREAMBLE_CONFIG_STD_1"),
+    PropertyDescription(0x10, 0x02, "PREAMBLE_CONFIG_NSTD"),
+    PropertyDescription(0x10, 0x03, "PREAMBLE_CONFIG_STD_2"),
+    PropertyDescription(0x10, 0x04, "PREAMBLE_CONFIG"),
+    PropertyDescription(0x10, 0x05, "PREAMBLE_PATTERN", 4),
+    PropertyDescription(0x10, 0x09, "PREAMBLE_POSTAMBLE_CONFIG"),
+    PropertyDescription(0x10, 0x0a, "PREAMBLE_POSTAMBLE_PATTERN", 4),
+
+    PropertyDescription(0x11, 0x00, "SYNC_CONFIG"),
+    PropertyDescription(0x11, 0x01, "SYNC_BITS", 4),
+    PropertyDescription(0x11, 0x05, "SYNC_CONFIG2"),
+
+    PropertyDescription(0x12, 0x00, "PKT_CRC_CONFIG"),
+    PropertyDescription(0x12, 0x01, "PKT_WHT_POLY", 2),
+    PropertyDescription(0x12, 0x03, "PKT_WHT_SEED", 2),
+    PropertyDescription(0x12, 0x05, "PKT_WHT_BIT_NUM"),
+    PropertyDescription(0x12, 0x06, "PKT_CONFIG1"),
+    PropertyDescription(0x12, 0x07, "PKT_CONFIG2"),
+    PropertyDescription(0x12, 0x08, "PKT_LEN"),
+    PropertyDescription(0x12, 0x09, "PKT_LEN_FIELD_SOURCE"),
+    PropertyDescription(0x12, 0x0a, "PKT_LEN_ADJUST"),
+    PropertyDescription(0x12, 0x0b, "PKT_TX_THRESHOLD"),
+    PropertyDescription(0x12, 0x0c, "PKT_RX_THRESHOLD"),
+    *[description
+      for field in range(1, 6)
+      for description in (PropertyDescription(0x12, 0x0d + (field - 1) * 4, f"PKT_FIELD_{field}_LENGTH", 2),
+                          PropertyDescription(0x12, 0x0f + (field - 1) * 4, f"PKT_FIELD_{field}_CONFIG"),
+                          PropertyDescription(0x12, 0x10 + (field - 1) * 4, f"PKT_FIELD_{field}_CRC_CONFIG"))],
+    *[description
+      for field in range(1, 6)
+      for description in (PropertyDescription(0x12, 0x21 + (field - 1) * 4, f"PKT_RX_FIELD_{field}_LENGTH", 2),
+                          PropertyDescription(0x12, 0x23 + (field - 1) * 4, f"PKT_RX_FIELD_{field}_CONFIG"),
+                          PropertyDescription(0x12, 0x24 + (field - 1) * 4, f"PKT_RX_FIELD_{field}_CRC_CONFIG"))],
+    PropertyDescription(0x12, 0x36, "PKT_CRC_SEED", 4),
+
+    PropertyDescription(0x20, 0x00, "MODEM_MOD_TYPE"),
+    PropertyDescription(0x20, 0x01, "MODEM_MAP_CONTROL"),
+    PropertyDescription(0x20, 0x02, "MODEM_DSM_CTRL"),
+    PropertyDescription(0x20, 0x03, "MODEM_DATA_RATE", 3),
+    PropertyDescription(0x20, 0x06, "MODEM_TX_NCO_MODE", 4),
+    PropertyDescription(0x20, 0x0a, "MODEM_FREQ_DEV", 3),
+    PropertyDescription(0x20, 0x0d, "MODEM_FREQ_OFFSET", 2),
+    *[PropertyDescription(0x20, 0x0f + x, f"MODEM_TX_FILTER_COEFF_{8 - x}") for x in range(0, 9)],
+    PropertyDescription(0x20, 0x18, "MODEM_TX_RAMP_DELAY"),
+    PropertyDescription(0x20, 0x19, "MODEM_MDM_CTRL"),
+    PropertyDescription(0x20, 0x1a, "MODEM_IF_CONTROL"),
+    PropertyDescription(0x20, 0x1b, "MODEM_IF_FREQ", 3),
+    PropertyDescription(0x20, 0x1e, "MODEM_DECIMATION_CFG1"),
+    PropertyDescription(0x20, 0x1f, "MODEM_DECIMATION_CFG0"),
+    PropertyDescription(0x20, 0x20, "MODEM_DECIMATION_CFG2"),
+    PropertyDescription(0x20, 0x21, "MODEM_IFPKD_THRESHOLDS"),
+    PropertyDescription(0x20, 0x22, "MODEM_BCR_OSR", 2),
+    PropertyDescription(0x20, 0x24, "MODEM_BCR_NCO_OFFSET", 3),
+    PropertyDescription(0x20, 0x27, "MODEM_BCR_GAIN", 2),
+    PropertyDescription(0x20, 0x29, "MODEM_BCR_GEAR"),
+    PropertyDescription(0x20, 0x2a, "MODEM_BCR_MISC1"),
+    PropertyDescription(0x20, 0x2b, "MODEM_BCR_MISC0"),
+    PropertyDescription(0x20, 0x2c, "MODEM_AFC_GEAR"),
+    PropertyDescription(0x20, 0x2d, "MODEM_AFC_WAIT"),
+    PropertyDescription(0x20, 0x2e, "MODEM_AFC_GAIN", 2),
+    PropertyDescription(0x20, 0x30, "MODEM_AFC_LIMITER", 2),
+    PropertyDescription(0x20, 0x32, "MODEM_AFC_MISC"),
+    PropertyDescription(0x20, 0x33, "MODEM_AFC_ZIFOFF"),
+    PropertyDescription(0x20, 0x34, "MODEM_ADC_CTRL"),
+    PropertyDescription(0x20, 0x35, "MODEM_AGC_CONTROL"),
+    PropertyDescription(0x20, 0x38, "MODEM_AGC_WINDOW_SIZE"),
+    PropertyDescription(0x20, 0x39, "MODEM_AGC_RFPD_DECAY"),
+    PropertyDescription(0x20, 0x3a, "MODEM_AGC_IFPD_DECAY"),
+    PropertyDescription(0x20, 0x3b, "MODEM_FSK4_GAIN1"),
+    PropertyDescription(0x20, 0x3c, "MODEM_FSK4_GAIN0"),
+    PropertyDescription(0x20, 0x3d, "MODEM_FSK4_TH", 2),
+    PropertyDescription(0x20, 0x3f, "MODEM_FSK4_MAP"),
+    PropertyDescription(0x20, 0x40, "MODEM_OOK_PDTC"),
+    PropertyDescription(0x20, 0x41, "MODEM_OOK_BLOPK"),
+    PropertyDescription(0x20, 0x42, "MODEM_OOK_CNT1"),
+    PropertyDescription(0x20, 0x43, "MODEM_OOK_MISC"),
+    PropertyDescription(0x20, 0x45, "MODEM_RAW_CONTROL"),
+    PropertyDescription(0x20, 0x46, "MODEM_RAW_EYE", 2),
+    PropertyDescription(0x20, 0x48, "MODEM_ANT_DIV_MODE"),
+    PropertyDescription(0x20, 0x49, "MODEM_ANT_DIV_CONTROL"),
+    PropertyDescription(0x20, 0x4a, "MODEM_RSSI_THRESH"),
+    PropertyDescription(0x20, 0x4b, "MODEM_RSSI_JUMP_THRESH"),
+    PropertyDescription(0x20, 0x4c, "MODEM_RSSI_CONTROL"),
+    PropertyDescription(0x20, 0x4d, "MODEM_RSSI_CONTROL2"),
+    PropertyDescription(0x20, 0x4e, "MODEM_RSSI_COMP"),
+    PropertyDescription(0x20, 0x50, "MODEM_RAW_SEARCH2"),
+    PropertyDescription(0x20, 0x51, "MODEM_CLKGEN_BAND"),
+    PropertyDescription(0x20, 0x54, "MODEM_SPIKE_DET"),
+    PropertyDescription(0x20, 0x55, "MODEM_ONE_SHOT_AFC"),
+    PropertyDescription(0x20, 0x56, "MODEM_RSSI_HYSTERESIS"),
+    PropertyDescription(0x20, 0x57, "MODEM_RSSI_MUTE"),
+    PropertyDescription(0x20, 0x58, "MODEM_FAST_RSSI_DELAY"),
+    PropertyDescription(0x20, 0x59, "MODEM_PSM", 2),
+    PropertyDescription(0x20, 0x5b, "MODEM_DSA_CTRL1"),
+    PropertyDescription(0x20, 0x5c, "MODEM_DSA_CTRL2"),
+    PropertyDescription(0x20, 0x5d, "MODEM_DSA_QUAL"),
+    PropertyDescription(0x20, 0x5e, "MODEM_DSA_RSSI"),
+    PropertyDescription(0x20, 0x5f, "MODEM_DSA_MISC"),
+
+    *[PropertyDescription(0x21, x, f"MODEM_CHFLT_RX1_CHFLT_COE{13 - x}_7_0") for x in range(0, 14)],
+    *[PropertyDescription(0x21, 0x0e + x, f"MODEM_CHFLT_RX1_CHFLT_COEM{x}") for x in range(0, 4)],
+    *[PropertyDescription(0x21, 0x12 + x, f"MODEM_CHFLT_RX2_CHFLT_COE{13 - x}_7_0") for x in range(0, 14)],
+    *[PropertyDescription(0x21, 0x20 + x, f"MODEM_CHFLT_RX2_CHFLT_COEM{x}") for x in range(0, 4)],
+
+    PropertyDescription(0x22, 0x00, "PA_MODE"),
+    PropertyDescription(0x22, 0x01, "PA_PWR_LVL"),
+    PropertyDescription(0x22, 0x02, "PA_BIAS_CLKDUTY"),
+    PropertyDescription(0x22, 0x03, "PA_TC"),
+    PropertyDescription(0x22, 0x04, "PA_RAMP_EX"),
+    PropertyDescription(0x22, 0x05, "PA_RAMP_DOWN_DELAY"),
+    PropertyDescription(0x22, 0x06, "PA_DIG_PWR_SEQ_CONFIG"),
+
+    PropertyDescription(0x23, 0x00, "SYNTH_PFDCP_CPFF"),
+    PropertyDescription(0x23, 0x01, "SYNTH_PFDCP_CPINT"),
+    PropertyDescription(0x23, 0x02, "SYNTH_VCO_KV"),
+    PropertyDescription(0x23, 0x03, "SYNTH_LPFILT3"),
+    PropertyDescription(0x23, 0x04, "SYNTH_LPFILT2"),
+    PropertyDescription(0x23, 0x05, "SYNTH_LPFILT1"),
+    PropertyDescription(0x23, 0x06, "SYNTH_LPFILT0"),
+    PropertyDescription(0x23, 0x07, "SYNTH_VCO_KVCAL"),
+
+    *[description
+      for match in range(1, 5)
+      for description in (PropertyDescription(0x30, (match - 1) * 3, f"MATCH_VALUE_{match}"),
+                          PropertyDescription(0x30, (match - 1) * 3 + 1, f"MATCH_MASK_{match}"),
+                          PropertyDescription(0x30, (match - 1) * 3 + 2, f"MATCH_CTRL_{match}"))],
+
+    PropertyDescription(0x40, 0x00, "FREQ_CONTROL_INTE"),
+    PropertyDescription(0x40, 0x01, "FREQ_CONTROL_FRAC", 3),
+    PropertyDescription(0x40, 0x04, "FREQ_CONTROL_CHANNEL_STEP_SIZE", 2),
+    PropertyDescription(0x40, 0x06, "FREQ_CONTROL_W_SIZE"),
+    PropertyDescription(0x40, 0x07, "FREQ_CONTROL_VCOCNT_RX_ADJ"),
+
+    PropertyDescription(0x50, 0x00, "RX_HOP_CONTROL"),
+    PropertyDescription(0x50, 0x01, "RX_HOP_TABLE_SIZE"),
+    *[PropertyDescription(0x50, 0x02 + x, f"RX_HOP_TABLE_ENTRY_{x}") for x in range(0, 64)],
+]
+# @formatter:on
+
+PROPERTY_NAME_TO_DESCRIPTION: Dict[str, PropertyDescription] = {prop.name: prop for prop in PROPERTY_LIST}
+
+
+def _compile_byte_tables():
+    """Flat tables over all 65536 (group, index) keys: byte name, size of the property and position within it."""
+    names: List[Optional[str]] = [None] * 0x10000
+    sizes = bytearray(0x10000)
+    positions = bytearray(0x10000)
+    for prop in PROPERTY_LIST:
+        for position in range(0, prop.size):
+            key = prop.key + position
+            if prop.size == 1:
+                names[key] = prop.name
+            else:
+                high = (prop.size - position) * 8 - 1
+                names[key] = f"{prop.name}[{high}:{high - 7}]"
+            sizes[key] = prop.size
+            positions[key] = position
+    return names, sizes, positions
+
+
+# Name of every property byte, None for unknown keys
+PROPERTY_BYTE_NAMES, PROPERTY_BYTE_SIZES, PROPERTY_BYTE_POSITIONS = _compile_byte_tables()
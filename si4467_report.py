@@ -0,0 +1,143 @@
+# Bus utilization report
+# Where the SPI bus time goes and which host driver habits waste it, gathered in a single pass over the transactions
+# of Si4467Analyzer (add `BusReport(analyzer.shadow).add` to its `transaction_listeners`).
+from array import array
+from typing import Any, Dict, List, Optional
+
+from si4467_analyzer import COMMAND_ID_TO_NAME, COMMANDS_WITH_IMMEDIATE_RESPONSE, Command, Transaction
+from si4467_shadow import RadioShadow
+
+CTS_POLLING = "CTS polling"
+STATUS_READS = "Status reads"
+FIFO_TRANSFERS = "FIFO transfers"
+PROPERTY_WRITES = "Property writes"
+OTHER_COMMANDS = "Other commands"
+IDLE = "Idle (NSEL high)"
+CATEGORIES = (CTS_POLLING, STATUS_READS, FIFO_TRANSFERS, PROPERTY_WRITES, OTHER_COMMANDS, IDLE)
+
+_READ_CMD_BUFF = Command.READ_CMD_BUFF.value
+_GET_INT_STATUS = Command.GET_INT_STATUS.value
+_FIFO_INFO = Command.FIFO_INFO.value
+_SET_PROPERTY = Command.SET_PROPERTY.value
+
+# Category of every command ID, replies read with READ_CMD_BUFF count towards the command they belong to
+_CATEGORIES: List[str] = [OTHER_COMMANDS] * 256
+for _command in (Command.GET_INT_STATUS, Command.GET_PH_STATUS, Command.GET_MODEM_STATUS, Command.GET_CHIP_STATUS,
+                 Command.REQUEST_DEVICE_STATE, Command.FIFO_INFO, Command.PACKET_INFO, Command.FRR_A_READ,
+                 Command.FRR_B_READ, Command.FRR_C_READ, Command.FRR_D_READ, Command.GET_ADC_READING):
+    _CATEGORIES[_command.value] = STATUS_READS
+_CATEGORIES[Command.WRITE_TX_FIFO.value] = FIFO_TRANSFERS
+_CATEGORIES[Command.READ_RX_FIFO.value] = FIFO_TRANSFERS
+_CATEGORIES[_SET_PROPERTY] = PROPERTY_WRITES
+
+_IMMEDIATE_RESPONSE = set(COMMANDS_WITH_IMMEDIATE_RESPONSE)
+
+
+class BusReport:
+    """Bus time by category and command, plus counts of wasteful patterns.
+
+    Memory is constant: per command ID counters. Redundant property writes are told from the radio configuration the
+    analyzer keeps in `shadow`, which is up to date by the time a transaction is handed to `add`.
+    """
+
+    def __init__(self, shadow: RadioShadow):
+        self.category_times: Dict[str, float] = {category: 0.0 for category in CATEGORIES}
+        self.command_counts = array('Q', bytes(256 * array('Q').itemsize))
+        # NSEL low time of the command itself and of READ_CMD_BUFF transactions reading its reply
+        self.command_times = array('d', bytes(256 * array('d').itemsize))
+        self.reply_times = array('d', bytes(256 * array('d').itemsize))
+        self.poll_count = 0
+        self.first_time: Any = None
+        self.last_time: Any = None
+        # Wasteful patterns: occurrences and bus time spent on them
+        self.idle_int_status_count = 0
+        self.idle_int_status_time = 0.0
+        self.redundant_property_writes = 0
+        self.redundant_property_bytes = 0
+        self.redundant_property_time = 0.0
+        self.unchanged_fifo_info_count = 0
+        self.unchanged_fifo_info_time = 0.0
+        self._shadow = shadow
+        # Shadow version after the previous transaction, SET_PROPERTY leaving it as it is changed nothing
+        self._shadow_version = shadow.version
+        self._fifo_info: Optional[bytes] = None
+        # Bus time of the command whose reply is pending, added to the waste if the reply shows it was pointless
+        self._command_time = 0.0
+
+    def add(self, transaction: Transaction) -> None:
+        command_id = transaction.command_id
+        duration = float(transaction.end_time - transaction.start_time)
+        if self.last_time is None:
+            self.first_time = transaction.start_time
+        else:
+            self.category_times[IDLE] += float(transaction.start_time - self.last_time)
+        self.last_time = transaction.end_time
+        self.command_counts[command_id] += 1
+
+        if command_id != _READ_CMD_BUFF:
+            self.command_times[command_id] += duration
+            self.category_times[_CATEGORIES[command_id]] += duration
+            if command_id not in _IMMEDIATE_RESPONSE:
+                self._command_time = duration
+            if command_id == _SET_PROPERTY:
+                self._set_property(transaction.sent, duration)
+            self._shadow_version = self._shadow.version
+            return
+
+        # GET_PROPERTY replies update the shadow as well
+        self._shadow_version = self._shadow.version
+        received = transaction.received
+        if not received or received[0] != 0xFF:
+            self.poll_count += 1
+            self.category_times[CTS_POLLING] += duration
+            return
+        previous_command_id = transaction.previous_command_id
+        if previous_command_id is None:
+            self.category_times[OTHER_COMMANDS] += duration
+            return
+        self.reply_times[previous_command_id] += duration
+        self.category_times[_CATEGORIES[previous_command_id]] += duration
+        if previous_command_id == _GET_INT_STATUS:
+            # INT_PEND
+            if len(received) >= 2 and received[1] == 0:
+                self.idle_int_status_count += 1
+                self.idle_int_status_time += self._command_time + duration
+        elif previous_command_id == _FIFO_INFO:
+            # RX_FIFO_COUNT, TX_FIFO_SPACE
+            fifo_info = bytes(received[1:3])
+            if fifo_info == self._fifo_info:
+                self.unchanged_fifo_info_count += 1
+                self.unchanged_fifo_info_time += self._command_time + duration
+            self._fifo_info = fifo_info
+
+    def _set_property(self, sent: bytes, duration: float) -> None:
+        """SET_PROPERTY only writing values already known to be set, as RadioShadow.set_properties saw it."""
+        if len(sent) < 5 or self._shadow.version != self._shadow_version:
+            return
+        self.redundant_property_writes += 1
+        self.redundant_property_bytes += min(len(sent) - 4, sent[2], 0x100 - sent[3])
+        self.redundant_property_time += duration
+
+    def render(self) -> str:
+        total = float(self.last_time - self.first_time) if self.last_time is not None else 0.0
+        lines = [f"{'category':24} {'seconds':>12} {'share':>7}"]
+        for category in CATEGORIES:
+            seconds = self.category_times[category]
+            lines.append(f"{category:24} {seconds:12.6f} {seconds / total if total else 0:7.1%}")
+        lines.append("")
+        lines.append(f"{'command':24} {'count':>10} {'command s':>12} {'reply s':>12}")
+        for command_id in sorted(range(0, 256), key=lambda x: -(self.command_times[x] + self.reply_times[x])):
+            if not self.command_counts[command_id]:
+                continue
+            name = COMMAND_ID_TO_NAME.get(command_id, f"0x{command_id:02x}")
+            lines.append(f"{name:24} {self.command_counts[command_id]:10} {self.command_times[command_id]:12.6f} "
+                         f"{self.reply_times[command_id]:12.6f}")
+        lines.append("")
+        lines.append(f"CTS not ready polls: {self.poll_count} ({self.category_times[CTS_POLLING]:.6f} s)")
+        lines.append(f"GET_INT_STATUS without pending interrupt: {self.idle_int_status_count} "
+                     f"({self.idle_int_status_time:.6f} s)")
+        lines.append(f"SET_PROPERTY rewriting identical values: {self.redundant_property_writes} "
+                     f"({self.redundant_property_bytes} bytes, {self.redundant_property_time:.6f} s)")
+        lines.append(f"FIFO_INFO with unchanged result: {self.unchanged_fifo_info_count} "
+                     f"({self.unchanged_fifo_info_time:.6f} s)")
+        return "\n".join(lines)
@@ -0,0 +1,200 @@
+# Shadow state of the radio
+# Tracks what the Si4467 is configured to, as far as it can be seen from the commands on the SPI bus.
+import copy
+from array import array
+from bisect import bisect_right
+from itertools import compress
+from typing import Any, Dict, List, Optional, Tuple
+
+from si4467_properties import PROPERTY_NAME_TO_DESCRIPTION, property_key
+
+PROPERTY_KEY_COUNT = 0x10000
+
+GPIO_PIN_NAMES = ["GPIO[0]", "GPIO[1]", "GPIO[2]", "GPIO[3]", "NIRQ", "SDO", "GEN_CONFIG"]
+
+
+# Value logged when a property reverts to an unknown default (POWER_UP)
+UNKNOWN_VALUE = -1
+
+
+class PropertyHistory:
+    """Versioned, append-only log of the value of every property byte over time.
+
+    Only changes are logged, so "what was the value at time t" is a bisection over the changes of that property.
+    Times are whatever the frames carry (SaleaeTime in Logic 2, seconds in the offline decoder).
+    """
+
+    def __init__(self):
+        self._times: Dict[int, List[Any]] = {}
+        self._values: Dict[int, array] = {}
+
+    def record(self, key: int, value: int, time: Any) -> None:
+        values = self._values.get(key)
+        if values is None:
+            self._times[key] = [time]
+            self._values[key] = array('h', [value])
+        elif values[-1] != value:
+            self._times[key].append(time)
+            values.append(value)
+
+    def forget_all(self, time: Any) -> None:
+        """Every property logged so far reverts to an unknown value."""
+        for key in self._values:
+            self.record(key, UNKNOWN_VALUE, time)
+
+    def value_at(self, key: int, time: Any) -> Optional[int]:
+        """Value of a property byte at `time`, None if not known at that point."""
+        times = self._times.get(key)
+        if times is None:
+            return None
+        position = bisect_right(times, time) - 1
+        if position < 0:
+            return None
+        value = self._values[key][position]
+        return None if value == UNKNOWN_VALUE else value
+
+    def property_at(self, name: str, time: Any) -> Optional[int]:
+        """Value of a (multi-byte) property at `time`, None unless all of its bytes were known."""
+        description = PROPERTY_NAME_TO_DESCRIPTION[name]
+        value = 0
+        for key in range(description.key, description.key + description.size):
+            byte = self.value_at(key, time)
+            if byte is None:
+                return None
+            value = (value << 8) | byte
+        return value
+
+    def changes(self, key: int) -> List[Tuple[Any, Optional[int]]]:
+        """All logged (time, value) pairs of a property byte."""
+        return [(time, None if value == UNKNOWN_VALUE else value)
+                for time, value in zip(self._times.get(key, []), self._values.get(key, []))]
+
+
+class RadioShadow:
+    """Radio configuration, updated incrementally with every completed transaction.
+
+    Properties are kept as a dense image indexed by `property_key(group, index)`, along with a flag telling whether
+    the value was seen on the bus and how often it changed. Updating costs O(bytes written).
+    """
+
+    def __init__(self):
+        self.properties = bytearray(PROPERTY_KEY_COUNT)
+        self.known = bytearray(PROPERTY_KEY_COUNT)
+        self.change_counts = array('L', bytes(PROPERTY_KEY_COUNT * array('L').itemsize))
+        # Incremented whenever any property value changes, derived values can be cached per version
+        self.version = 0
+        self.gpio_config = bytearray(len(GPIO_PIN_NAMES))
+        self.gpio_known = bytearray(len(GPIO_PIN_NAMES))
+        self.xo_frequency: Optional[int] = None
+        self.boot_options: Optional[int] = None
+        self.xtal_options: Optional[int] = None
+        self.power_up_count = 0
+        # Logged property changes, only kept once record_history() was called
+        self.history: Optional[PropertyHistory] = None
+
+    def record_history(self) -> PropertyHistory:
+        """Start logging property changes over time, needed for property_value_at()."""
+        if self.history is None:
+            self.history = PropertyHistory()
+        return self.history
+
+    def copy(self) -> "RadioShadow":
+        """Copy of the configuration as it is now, without the property history."""
+        shadow = copy.copy(self)
+        shadow.properties = bytearray(self.properties)
+        shadow.known = bytearray(self.known)
+        shadow.change_counts = array('L', self.change_counts)
+        shadow.gpio_config = bytearray(self.gpio_config)
+        shadow.gpio_known = bytearray(self.gpio_known)
+        shadow.history = None
+        return shadow
+
+    def apply(self, later: "RadioShadow") -> None:
+        """Take over what `later` saw, a shadow that started from scratch after the transactions seen by this one.
+
+        Lets the configuration of pieces of a capture be followed separately and put together afterwards. Change
+        counts add up (so a value written again after the piece boundary counts once more) and the history of `later`
+        is not taken over.
+        """
+        if later.power_up_count:
+            # Everything seen before was reset
+            self.properties = bytearray(later.properties)
+            self.known = bytearray(later.known)
+            self.gpio_known = bytearray(later.gpio_known)
+            if later.xo_frequency is not None:
+                self.xo_frequency = later.xo_frequency
+                self.boot_options = later.boot_options
+                self.xtal_options = later.xtal_options
+        else:
+            for key in compress(range(PROPERTY_KEY_COUNT), later.known):
+                self.properties[key] = later.properties[key]
+                self.known[key] = 1
+        for pin in compress(range(len(GPIO_PIN_NAMES)), later.gpio_known):
+            self.gpio_config[pin] = later.gpio_config[pin]
+            self.gpio_known[pin] = 1
+        for key in compress(range(PROPERTY_KEY_COUNT), later.change_counts):
+            self.change_counts[key] += later.change_counts[key]
+        self.power_up_count += later.power_up_count
+        self.version += later.version
+
+    def set_properties(self, group: int, start_index: int, values: bytes, time: Any = None) -> None:
+        """Property values written by SET_PROPERTY or read back by GET_PROPERTY, logged at `time` if given and the
+        history is recorded."""
+        first_key = property_key(group, start_index)
+        count = min(len(values), 0x100 - start_index)
+        properties = self.properties
+        known = self.known
+        change_counts = self.change_counts
+        history = self.history if time is not None else None
+        changed = False
+        for key, value in zip(range(first_key, first_key + count), values):
+            if properties[key] != value or not known[key]:
+                properties[key] = value
+                known[key] = 1
+                change_counts[key] += 1
+                changed = True
+                if history is not None:
+                    history.record(key, value, time)
+        if changed:
+            self.version += 1
+
+    def power_up(self, arguments: bytes, time: Any = None) -> None:
+        """POWER_UP arguments: BOOT_OPTIONS, XTAL_OPTIONS, XO_FREQ. Properties revert to their defaults."""
+        if len(arguments) >= 7:
+            self.boot_options = arguments[1]
+            self.xtal_options = arguments[2]
+            self.xo_frequency = int.from_bytes(arguments[3:7], "big")
+        self.properties = bytearray(PROPERTY_KEY_COUNT)
+        self.known = bytearray(PROPERTY_KEY_COUNT)
+        self.gpio_known = bytearray(len(GPIO_PIN_NAMES))
+        self.power_up_count += 1
+        self.version += 1
+        if time is not None and self.history is not None:
+            self.history.forget_all(time)
+
+    def gpio_pin_cfg(self, arguments: bytes) -> None:
+        """GPIO_PIN_CFG arguments, a mode of 0 (DONOTHING) leaves the pin as it is."""
+        for pin, value in enumerate(arguments[1:1 + len(GPIO_PIN_NAMES)]):
+            if value & 0x3F:
+                self.gpio_config[pin] = value
+                self.gpio_known[pin] = 1
+
+    def gpio_pin_cfg_reply(self, reply: bytes) -> None:
+        """GPIO_PIN_CFG reply (after CTS), the actual configuration of every pin."""
+        for pin, value in enumerate(reply[:len(GPIO_PIN_NAMES)]):
+            self.gpio_config[pin] = value
+            self.gpio_known[pin] = 1
+
+    def property_value(self, name: str) -> Optional[int]:
+        """Current value of a (multi-byte) property, None unless all of its bytes were seen."""
+        description = PROPERTY_NAME_TO_DESCRIPTION[name]
+        key = description.key
+        if not all(self.known[key:key + description.size]):
+            return None
+        return int.from_bytes(self.properties[key:key + description.size], "big")
+
+    def property_value_at(self, name: str, time: Any) -> Optional[int]:
+        """Value of a (multi-byte) property at `time`, see `PropertyHistory`."""
+        if self.history is None:
+            raise ValueError("property history is not recorded, see record_history()")
+        return self.history.property_at(name, time)
@@ -0,0 +1,208 @@
+# SPI decoder for raw digital captures
+# Reconstructs the enable/result/disable frames of Logic 2's SPI analyzer from the transitions of the NSEL, SCLK, MOSI
+# and MISO channels (Logic 2 binary digital export), so Si4467Analyzer can run without Logic 2. All the per edge work
+# is done with NumPy array operations, only the resulting bytes are turned into frames one by one.
+import math
+from typing import Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from si4467_analyzer import AnalyzerFrame
+
+_FILE_ID = b"<SALEAE>"
+_DIGITAL_TYPE = 0
+# <SALEAE>, version, type, initial state, begin time, end time, number of transitions
+_HEADER = np.dtype([("id", "S8"), ("version", "<i4"), ("type", "<i4"), ("initial_state", "<u4"),
+                    ("begin_time", "<f8"), ("end_time", "<f8"), ("transition_count", "<u8")])
+
+
+class DigitalChannel(NamedTuple):
+    """Level at capture start and the times (seconds) at which it toggled."""
+    initial_state: int
+    transitions: np.ndarray
+    begin_time: float = 0.0
+    end_time: float = 0.0
+
+    def states_at(self, times: np.ndarray) -> np.ndarray:
+        """Level at each of `times` (sorted or not), a transition at exactly that time counts as done."""
+        toggles = np.searchsorted(self.transitions, times, side="right")
+        return (toggles & 1) ^ self.initial_state
+
+
+class SpiMode(NamedTuple):
+    cpol: int = 0
+    cpha: int = 0
+    msb_first: bool = True
+
+
+BITS_PER_TRANSFER = 8
+# SCLK transitions decoded at once by decode_spi_chunks, about 100 MB of temporary arrays
+DEFAULT_CHUNK_TRANSITIONS = 1 << 20
+_SINGLE_BYTES = [bytes((value,)) for value in range(256)]
+
+
+class SpiBytes(NamedTuple):
+    """Decoded capture: NSEL low periods and the bytes exchanged within them, in time order."""
+    enable_times: np.ndarray
+    # NaN if NSEL was still low at the end of the capture
+    disable_times: np.ndarray
+    # Per byte: transaction it belongs to, first and last sampling edge, values
+    transactions: np.ndarray
+    start_times: np.ndarray
+    end_times: np.ndarray
+    mosi: np.ndarray
+    miso: np.ndarray
+
+
+def read_digital_export(path: str) -> DigitalChannel:
+    """Map a channel of a Logic 2 binary digital export (digital_N.bin).
+
+    The transitions are memory-mapped rather than read, pages are only loaded as they are accessed.
+    """
+    with open(path, "rb") as file:
+        header = np.fromfile(file, dtype=_HEADER, count=1)
+    if len(header) != 1 or header["id"][0] != _FILE_ID:
+        raise ValueError(f"{path}: not a Logic 2 binary export")
+    if header["version"][0] != 0 or header["type"][0] != _DIGITAL_TYPE:
+        raise ValueError(f"{path}: unsupported export version {header['version'][0]} / type {header['type'][0]}")
+    transition_count = int(header["transition_count"][0])
+    if transition_count:
+        transitions = np.memmap(path, dtype="<f8", mode="r", offset=_HEADER.itemsize, shape=(transition_count,))
+    else:
+        # Empty mappings are not allowed
+        transitions = np.empty(0, dtype="<f8")
+    return DigitalChannel(int(header["initial_state"][0]), transitions, float(header["begin_time"][0]),
+                          float(header["end_time"][0]))
+
+
+def _edges(channel: DigitalChannel, rising: bool) -> np.ndarray:
+    """Times of the rising or falling edges of a channel."""
+    # The level after transition k is initial_state ^ ((k + 1) & 1), so rising edges are every other transition
+    first_rising = 0 if channel.initial_state == 0 else 1
+    return channel.transitions[first_rising if rising else 1 - first_rising::2]
+
+
+def decode_spi(nsel: DigitalChannel, sclk: DigitalChannel, mosi: Optional[DigitalChannel],
+               miso: Optional[DigitalChannel], mode: SpiMode = SpiMode()) -> SpiBytes:
+    """Sample MOSI/MISO at the SCLK edges selected by CPOL/CPHA while NSEL (active low) is asserted."""
+    # Leading edge is rising for CPOL 0, data is sampled on the leading edge for CPHA 0 and the trailing one otherwise
+    sample_on_rising = (mode.cpol == 0) == (mode.cpha == 0)
+    samples = _edges(sclk, sample_on_rising)
+
+    enable_times = _edges(nsel, rising=False)
+    disable_times = _edges(nsel, rising=True)
+    if nsel.initial_state == 0:
+        # Capture started within a transaction
+        enable_times = np.concatenate(([nsel.begin_time], enable_times))
+    # Pair every enable with the disable following it
+    disable_positions = np.searchsorted(disable_times, enable_times, side="right")
+    disable_times = np.append(disable_times, np.nan)[disable_positions]
+
+    samples = samples[nsel.states_at(samples) == 0]
+    transactions = np.searchsorted(enable_times, samples, side="right") - 1
+    samples = samples[transactions >= 0]
+    transactions = transactions[transactions >= 0]
+
+    # Bit position of every sample within its transaction, only complete transfers are kept
+    bits = BITS_PER_TRANSFER
+    first_samples = np.searchsorted(samples, enable_times, side="left")
+    positions = np.arange(len(samples)) - first_samples[transactions]
+    sample_counts = np.diff(np.append(first_samples, len(samples)))
+    complete = positions < (sample_counts // bits * bits)[transactions]
+    samples = samples[complete]
+    transactions = transactions[complete]
+
+    weights = 1 << np.arange(bits - 1, -1, -1) if mode.msb_first else 1 << np.arange(0, bits)
+    weights = weights.astype(np.int64)
+
+    def words(channel: Optional[DigitalChannel]) -> np.ndarray:
+        if channel is None:
+            return np.zeros(len(samples) // bits, dtype=np.int64)
+        return channel.states_at(samples).astype(np.int64).reshape(-1, bits) @ weights
+
+    sample_words = samples.reshape(-1, bits)
+    return SpiBytes(enable_times, disable_times, transactions[::bits], sample_words[:, 0], sample_words[:, -1],
+                    words(mosi), words(miso))
+
+
+def _search_forward(transitions: np.ndarray, time: float, first: int, side: str = "right") -> int:
+    """np.searchsorted(transitions, time, side) for a result known to be at least `first`.
+
+    Exports are mapped at an unaligned offset, which NumPy copies in full to search, so only a slice growing from
+    `first` is searched.
+    """
+    count = len(transitions)
+    step = 1024
+    while True:
+        last = min(first + step, count)
+        if last == count:
+            break
+        value = transitions[last - 1]
+        if value > time or (side == "left" and value == time):
+            break
+        step *= 2
+    return first + int(np.searchsorted(transitions[first:last], time, side=side))
+
+
+def decode_spi_chunks(nsel: DigitalChannel, sclk: DigitalChannel, mosi: Optional[DigitalChannel],
+                      miso: Optional[DigitalChannel], mode: SpiMode = SpiMode(),
+                      chunk_transitions: int = DEFAULT_CHUNK_TRANSITIONS) -> Iterator[SpiBytes]:
+    """decode_spi over consecutive pieces of the capture, so memory does not grow with its length.
+
+    Pieces end where NSEL is deasserted after about `chunk_transitions` SCLK transitions, a transaction is never split.
+    Transitions are handed to decode_spi as views of those of the channels.
+    """
+    channels = (nsel, sclk, mosi, miso)
+    # Per channel: transitions before the current piece
+    positions = [0] * len(channels)
+    nsel_transitions = nsel.transitions
+    sclk_transitions = sclk.transitions
+    start: Optional[float] = None
+    while True:
+        end: Optional[float] = None
+        if positions[1] + chunk_transitions < len(sclk_transitions):
+            boundary = _search_forward(nsel_transitions, sclk_transitions[positions[1] + chunk_transitions],
+                                       positions[0], side="left")
+            if nsel.initial_state ^ (boundary & 1):
+                # Not a rising edge, see _edges
+                boundary += 1
+            if boundary < len(nsel_transitions):
+                end = float(nsel_transitions[boundary])
+        pieces: List[Optional[DigitalChannel]] = [None] * len(channels)
+        for index, channel in enumerate(channels):
+            if channel is None:
+                continue
+            first = positions[index]
+            last = len(channel.transitions) if end is None else _search_forward(channel.transitions, end, first)
+            # Level at `start` follows from the number of transitions up to it
+            pieces[index] = DigitalChannel(channel.initial_state ^ (first & 1), channel.transitions[first:last],
+                                                 channel.begin_time if start is None else start,
+                                                 channel.end_time if end is None else end)
+            positions[index] = last
+        yield decode_spi(*pieces, mode)
+        if end is None:
+            return
+        start = end
+
+
+def spi_frames(spi_bytes: SpiBytes) -> Iterator[AnalyzerFrame]:
+    """The frames Logic 2's SPI analyzer would hand to a HLA, in order."""
+    enable_times = spi_bytes.enable_times.tolist()
+    disable_times = spi_bytes.disable_times.tolist()
+    byte_transactions = spi_bytes.transactions.tolist()
+    start_times = spi_bytes.start_times.tolist()
+    end_times = spi_bytes.end_times.tolist()
+    mosi = [_SINGLE_BYTES[value] for value in spi_bytes.mosi.tolist()]
+    miso = [_SINGLE_BYTES[value] for value in spi_bytes.miso.tolist()]
+    position = 0
+    byte_count = len(byte_transactions)
+    for transaction, (enable_time, disable_time) in enumerate(zip(enable_times, disable_times)):
+        yield AnalyzerFrame("enable", enable_time, enable_time, {})
+        while position < byte_count and byte_transactions[position] == transaction:
+            yield AnalyzerFrame("result", start_times[position], end_times[position], {
+                "mosi": mosi[position],
+                "miso": miso[position],
+            })
+            position += 1
+        if not math.isnan(disable_time):
+            yield AnalyzerFrame("disable", disable_time, disable_time, {})
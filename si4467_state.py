@@ -0,0 +1,78 @@
+# Radio state timeline
+# Main state of the chip over time, as far as it can be told from the commands and replies on the SPI bus.
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from si4467_status import STATE_NAMES, STATE_NO_CHANGE
+
+
+class StateTimeline:
+    """Sorted, non-overlapping state intervals.
+
+    Stored as the start time of every interval along with its state, each interval lasting until the next one starts
+    (the last one until now). Point and range queries are a bisection over the start times. Without `keep_history`
+    only the last interval is kept, which is all that tracking the state needs.
+    """
+
+    def __init__(self, keep_history: bool = True):
+        self.keep_history = keep_history
+        self._starts: List[Any] = []
+        self._states = bytearray()
+        # State of the last interval, None while no state is known
+        self.current: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def record(self, state: int, time: Any) -> Optional[Tuple[int, Any, Any]]:
+        """Enter `state` at `time`, returns the (state, start, end) interval this ended, if any."""
+        if state == STATE_NO_CHANGE or state not in STATE_NAMES:
+            return None
+        states = self._states
+        if state == self.current:
+            return None
+        previous = (self.current, self._starts[-1], time) if states else None
+        if not self.keep_history:
+            self._starts.clear()
+            states.clear()
+        self._starts.append(time)
+        states.append(state)
+        self.current = state
+        return previous
+
+    def current_interval(self) -> Optional[Tuple[int, Any]]:
+        """(state, start) of the last interval, None while no state is known."""
+        if not self._states:
+            return None
+        return self.current, self._starts[-1]
+
+    def state_at(self, time: Any) -> Optional[int]:
+        """State at `time`, None before the first known state."""
+        position = bisect_right(self._starts, time) - 1
+        return self._states[position] if position >= 0 else None
+
+    def intervals(self, start: Any = None, end: Any = None) -> Iterator[Tuple[int, Any, Any]]:
+        """(state, start, end) intervals overlapping [start, end), clipped to it; the last one ends at `end`."""
+        starts = self._starts
+        states = self._states
+        first = 0 if start is None else max(bisect_right(starts, start) - 1, 0)
+        # A state entered at `end` does not overlap [start, end)
+        last = len(states) if end is None else bisect_left(starts, end)
+        for position in range(first, last):
+            interval_start = starts[position]
+            interval_end = starts[position + 1] if position + 1 < len(states) else end
+            if start is not None and interval_start < start:
+                interval_start = start
+            if end is not None and (interval_end is None or interval_end > end):
+                interval_end = end
+            yield states[position], interval_start, interval_end
+
+    def durations(self, start: Any = None, end: Any = None) -> Dict[str, float]:
+        """Seconds spent in every state within [start, end), the last state counts until `end` if given."""
+        durations: Dict[str, float] = {}
+        for state, interval_start, interval_end in self.intervals(start, end):
+            if interval_end is None:
+                continue
+            name = STATE_NAMES[state]
+            durations[name] = durations.get(name, 0.0) + float(interval_end - interval_start)
+        return durations
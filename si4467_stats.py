@@ -0,0 +1,85 @@
+# CTS latency statistics
+# How long the host waited for the chip to become ready (CTS) after each command, and how many READ_CMD_BUFF polls it
+# took. Kept as fixed size log2 histograms per command ID, so memory does not grow with the length of the capture.
+import math
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+COMMAND_COUNT = 256
+# Latency bucket 0 holds waits below LATENCY_BASE, bucket n those in [LATENCY_BASE * 2^(n-1), LATENCY_BASE * 2^n)
+LATENCY_BASE = 100e-9
+LATENCY_BUCKETS = 32
+# Poll bucket n holds poll counts with a bit length of n (0, 1, 2-3, 4-7, ...)
+POLL_BUCKETS = 24
+
+
+def latency_bucket(seconds: float) -> int:
+    if seconds < LATENCY_BASE:
+        return 0
+    return min(math.frexp(seconds / LATENCY_BASE)[1], LATENCY_BUCKETS - 1)
+
+
+def latency_bucket_upper_bound(bucket: int) -> float:
+    return LATENCY_BASE * (1 << bucket)
+
+
+class CtsStatistics:
+    """Per command ID: number of waits, polls and latency in total, the worst case and log2 histograms."""
+
+    def __init__(self):
+        self.counts = array('L', bytes(COMMAND_COUNT * array('L').itemsize))
+        self.polls = array('Q', bytes(COMMAND_COUNT * array('Q').itemsize))
+        self.max_polls = array('L', bytes(COMMAND_COUNT * array('L').itemsize))
+        self.latency_sums = array('d', bytes(COMMAND_COUNT * array('d').itemsize))
+        self.max_latencies = array('d', bytes(COMMAND_COUNT * array('d').itemsize))
+        self.latency_histograms = array('L', bytes(COMMAND_COUNT * LATENCY_BUCKETS * array('L').itemsize))
+        self.poll_histograms = array('L', bytes(COMMAND_COUNT * POLL_BUCKETS * array('L').itemsize))
+
+    def record(self, command_id: int, latency: float, polls: int) -> None:
+        self.counts[command_id] += 1
+        self.polls[command_id] += polls
+        if polls > self.max_polls[command_id]:
+            self.max_polls[command_id] = polls
+        self.latency_sums[command_id] += latency
+        if latency > self.max_latencies[command_id]:
+            self.max_latencies[command_id] = latency
+        self.latency_histograms[command_id * LATENCY_BUCKETS + latency_bucket(latency)] += 1
+        self.poll_histograms[command_id * POLL_BUCKETS + min(polls.bit_length(), POLL_BUCKETS - 1)] += 1
+
+    def latency_histogram(self, command_id: int) -> List[int]:
+        start = command_id * LATENCY_BUCKETS
+        return self.latency_histograms[start:start + LATENCY_BUCKETS].tolist()
+
+    def poll_histogram(self, command_id: int) -> List[int]:
+        start = command_id * POLL_BUCKETS
+        return self.poll_histograms[start:start + POLL_BUCKETS].tolist()
+
+    def latency_percentile(self, command_id: int, percentile: float) -> Optional[float]:
+        """Upper bound of the latency bucket holding the given percentile, None if the command was never seen."""
+        count = self.counts[command_id]
+        if count == 0:
+            return None
+        rank = max(1, math.ceil(count * percentile / 100))
+        seen = 0
+        for bucket, bucket_count in enumerate(self.latency_histogram(command_id)):
+            seen += bucket_count
+            if seen >= rank:
+                return min(latency_bucket_upper_bound(bucket), self.max_latencies[command_id])
+        return self.max_latencies[command_id]
+
+    def summary(self) -> Dict[int, Tuple[int, int, int, float, float, float, float]]:
+        """Per command ID seen: waits, polls, most polls, mean, p50, p99 and max latency in seconds."""
+        return {command_id: (self.counts[command_id], self.polls[command_id], self.max_polls[command_id],
+                             self.latency_sums[command_id] / self.counts[command_id],
+                             self.latency_percentile(command_id, 50), self.latency_percentile(command_id, 99),
+                             self.max_latencies[command_id])
+                for command_id in range(0, COMMAND_COUNT) if self.counts[command_id]}
+
+    def report(self, command_name: Callable[[int], str]) -> str:
+        lines = [f"{'command':24} {'waits':>8} {'polls':>10} {'max':>6} {'mean us':>10} {'p50 us':>10} "
+                 f"{'p99 us':>10} {'max us':>10}"]
+        for command_id, (count, polls, max_polls, mean, p50, p99, maximum) in sorted(
+                self.summary().items(), key=lambda item: -item[1][0] * item[1][3]):
+            lines.append(f"{command_name(command_id):24} {count:8} {polls:10} {max_polls:6} {mean * 1e6:10.1f} "
+                         f"{p50 * 1e6:10.1f} {p99 * 1e6:10.1f} {maximum * 1e6:10.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,186 @@
+# Status registers of the Si4467
+# Bit definitions of the interrupt/status bytes and pre-rendered payloads for every possible value, so decoding them
+# is a single table lookup no matter how many bits are set.
+import sys
+from typing import Dict, Tuple
+
+# INT_PEND / INT_STATUS
+INT_BITS = {
+    0x04: "CHIP_INT",
+    0x02: "MODEM_INT",
+    0x01: "PH_INT",
+}
+
+# PH_PEND / PH_STATUS
+PH_FILTER_MATCH = 0x80
+PH_FILTER_MISS = 0x40
+PH_PACKET_SENT = 0x20
+PH_PACKET_RX = 0x10
+PH_CRC_ERROR = 0x08
+PH_ALT_CRC_ERROR = 0x04
+PH_TX_FIFO_ALMOST_EMPTY = 0x02
+PH_RX_FIFO_ALMOST_FULL = 0x01
+PH_BITS = {
+    PH_FILTER_MATCH: "FILTER_MATCH",
+    PH_FILTER_MISS: "FILTER_MISS",
+    PH_PACKET_SENT: "PACKET_SENT",
+    PH_PACKET_RX: "PACKET_RX",
+    PH_CRC_ERROR: "CRC_ERROR",
+    PH_ALT_CRC_ERROR: "ALT_CRC_ERROR",
+    PH_TX_FIFO_ALMOST_EMPTY: "TX_FIFO_ALMOST_EMPTY",
+    PH_RX_FIFO_ALMOST_FULL: "RX_FIFO_ALMOST_FULL",
+}
+
+# MODEM_PEND / MODEM_STATUS
+MODEM_BITS = {
+    0x80: "RSSI_LATCH",
+    0x40: "POSTAMBLE_DETECT",
+    0x20: "INVALID_SYNC",
+    0x10: "RSSI_JUMP",
+    0x08: "RSSI",
+    0x04: "INVALID_PREAMBLE",
+    0x02: "PREAMBLE_DETECT",
+    0x01: "SYNC_DETECT",
+}
+
+# CHIP_PEND / CHIP_STATUS
+CHIP_CMD_ERROR = 0x08
+CHIP_BITS = {
+    0x40: "CAL",
+    0x20: "FIFO_UNDERFLOW_OVERFLOW_ERROR",
+    0x10: "STATE_CHANGE",
+    CHIP_CMD_ERROR: "CMD_ERROR",
+    0x04: "CHIP_READY",
+    0x02: "LOW_BATT",
+    0x01: "WUT",
+}
+
+# Main state of the chip (REQUEST_DEVICE_STATE, FRR CURRENT_STATE, CHANGE_STATE, START_TX/START_RX next states)
+STATE_NO_CHANGE = 0
+STATE_SLEEP = 1
+STATE_SPI_ACTIVE = 2
+STATE_READY = 3
+STATE_READY2 = 4
+STATE_TX_TUNE = 5
+STATE_RX_TUNE = 6
+STATE_TX = 7
+STATE_RX = 8
+STATE_NAMES = {
+    STATE_NO_CHANGE: "NO_CHANGE",
+    STATE_SLEEP: "SLEEP",
+    STATE_SPI_ACTIVE: "SPI_ACTIVE",
+    STATE_READY: "READY",
+    STATE_READY2: "READY2",
+    STATE_TX_TUNE: "TX_TUNE",
+    STATE_RX_TUNE: "RX_TUNE",
+    STATE_TX: "TX",
+    STATE_RX: "RX",
+}
+
+# CMD_ERR_STATUS of GET_CHIP_STATUS
+CMD_ERROR_NAMES = {
+    0x00: "NONE",
+    0x10: "BAD_COMMAND",
+    0x11: "BAD_ARG",
+    0x12: "COMMAND_BUSY",
+    0x31: "BAD_BOOTMODE",
+    0x40: "BAD_PROPERTY",
+}
+
+
+def render_bits(value: int, bits: Dict[int, str]) -> str:
+    names = [name for mask, name in bits.items() if value & mask]
+    return f"0x{value:02x} ({' | '.join(names)})" if names else f"0x{value:02x}"
+
+
+def _compile_bits(bits: Dict[int, str]) -> Tuple[str, ...]:
+    return tuple(render_bits(value, bits) for value in range(256))
+
+
+def _compile_state() -> Tuple[str, ...]:
+    # Lower nibble is the main state, the upper one is reserved
+    return tuple(f"0x{value:02x} ({STATE_NAMES[value & 0x0F]})"
+                 if value & 0x0F in STATE_NAMES and value & 0x0F != STATE_NO_CHANGE else f"0x{value:02x}"
+                 for value in range(256))
+
+
+def _compile_values(names: Dict[int, str]) -> Tuple[str, ...]:
+    return tuple(f"0x{value:02x} ({names[value]})" if value in names else f"0x{value:02x}" for value in range(256))
+
+
+def _compile_rssi() -> Tuple[str, ...]:
+    # 0.5 dB steps. Turning it into dBm takes the MODEM_RSSI_COMP offset and board calibration, so it is shown raw
+    return tuple(f"0x{value:02x} (raw {value / 2:.1f} dB, uncompensated)" for value in range(256))
+
+
+INT_PAYLOADS = _compile_bits(INT_BITS)
+PH_PAYLOADS = _compile_bits(PH_BITS)
+MODEM_PAYLOADS = _compile_bits(MODEM_BITS)
+CHIP_PAYLOADS = _compile_bits(CHIP_BITS)
+STATE_PAYLOADS = _compile_state()
+RSSI_PAYLOADS = _compile_rssi()
+CMD_ERROR_PAYLOADS = _compile_values(CMD_ERROR_NAMES)
+# Plain hex rendering of a byte, shared with the analyzer
+HEX_BYTE = tuple(sys.intern(f"0x{value:02x}") for value in range(256))
+
+
+def hex_bytes(data: bytes) -> str:
+    """Space separated HEX_BYTE rendering of `data`, done by bytes.hex rather than a join per byte."""
+    if not data:
+        return ""
+    return "0x" + data.hex(" ").replace(" ", " 0x")
+
+
+# Payload tables of reply bytes, by the name used in the command descriptions
+RESPONSE_PAYLOADS_BY_NAME = {
+    "INT_PEND": INT_PAYLOADS,
+    "INT_STATUS": INT_PAYLOADS,
+    "PH_PEND": PH_PAYLOADS,
+    "PH_STATUS": PH_PAYLOADS,
+    "MODEM_PEND": MODEM_PAYLOADS,
+    "MODEM_STATUS": MODEM_PAYLOADS,
+    "CHIP_PEND": CHIP_PAYLOADS,
+    "CHIP_STATUS": CHIP_PAYLOADS,
+    "CURR_STATE": STATE_PAYLOADS,
+    "CMD_ERR_STATUS": CMD_ERROR_PAYLOADS,
+    "CURR_RSSI": RSSI_PAYLOADS,
+    "LATCH_RSSI": RSSI_PAYLOADS,
+    "ANT1_RSSI": RSSI_PAYLOADS,
+    "ANT2_RSSI": RSSI_PAYLOADS,
+}
+
+# Fast response register modes (FRR_CTL_x_MODE properties)
+FRR_MODE_DISABLED = 0
+FRR_MODE_INT_STATUS = 1
+FRR_MODE_INT_PEND = 2
+FRR_MODE_INT_PH_STATUS = 3
+FRR_MODE_INT_PH_PEND = 4
+FRR_MODE_INT_MODEM_STATUS = 5
+FRR_MODE_INT_MODEM_PEND = 6
+FRR_MODE_INT_CHIP_STATUS = 7
+FRR_MODE_INT_CHIP_PEND = 8
+FRR_MODE_CURRENT_STATE = 9
+FRR_MODE_LATCHED_RSSI = 10
+FRR_MODES = {
+    FRR_MODE_DISABLED: ("DISABLED", HEX_BYTE),
+    FRR_MODE_INT_STATUS: ("INT_STATUS", INT_PAYLOADS),
+    FRR_MODE_INT_PEND: ("INT_PEND", INT_PAYLOADS),
+    FRR_MODE_INT_PH_STATUS: ("INT_PH_STATUS", PH_PAYLOADS),
+    FRR_MODE_INT_PH_PEND: ("INT_PH_PEND", PH_PAYLOADS),
+    FRR_MODE_INT_MODEM_STATUS: ("INT_MODEM_STATUS", MODEM_PAYLOADS),
+    FRR_MODE_INT_MODEM_PEND: ("INT_MODEM_PEND", MODEM_PAYLOADS),
+    FRR_MODE_INT_CHIP_STATUS: ("INT_CHIP_STATUS", CHIP_PAYLOADS),
+    FRR_MODE_INT_CHIP_PEND: ("INT_CHIP_PEND", CHIP_PAYLOADS),
+    FRR_MODE_CURRENT_STATE: ("CURRENT_STATE", STATE_PAYLOADS),
+    FRR_MODE_LATCHED_RSSI: ("LATCHED_RSSI", RSSI_PAYLOADS),
+}
+# FRR_CTL_A_MODE..FRR_CTL_D_MODE after reset
+FRR_DEFAULT_MODES = (FRR_MODE_INT_STATUS, FRR_MODE_INT_PEND, FRR_MODE_CURRENT_STATE, FRR_MODE_DISABLED)
+
+
+def frr_mode_name(mode: int) -> str:
+    return FRR_MODES[mode][0] if mode in FRR_MODES else f"MODE {mode}"
+
+
+def frr_mode_payloads(mode: int) -> Tuple[str, ...]:
+    return FRR_MODES[mode][1] if mode in FRR_MODES else HEX_BYTE
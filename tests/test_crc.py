@@ -0,0 +1,87 @@
+import unittest
+
+from si4467_crc import (FIELD_CHECK_CRC, FIELD_CRC_ENABLE, FIELD_CRC_START, FIELD_SEND_CRC, PacketCrcChecker, crc,
+                        crc_config)
+from si4467_shadow import RadioShadow
+
+PKT = 0x12
+CCITT_16 = 5
+
+
+def field(length: int, crc_config: int) -> list:
+    # PKT_FIELD_n_LENGTH[12:8], [7:0], PKT_FIELD_n_CONFIG, PKT_FIELD_n_CRC_CONFIG
+    return [length >> 8, length & 0xFF, 0x00, crc_config]
+
+
+class FieldCrcTest(unittest.TestCase):
+    def setUp(self):
+        self.shadow = RadioShadow()
+        # PKT_CRC_CONFIG: CCITT-16 seeded with ones, PKT_CONFIG1: CRC MSB first
+        self.shadow.set_properties(PKT, 0x00, bytes([0x80 | CCITT_16]))
+        self.shadow.set_properties(PKT, 0x06, bytes([0x02, 0x00, 0x00]))
+        self.checker = PacketCrcChecker(self.shadow)
+        self.data = bytes(range(1, 8))
+
+    def set_fields(self, *fields: list) -> None:
+        values = [byte for layout in fields for byte in layout]
+        values += field(0, 0) * (5 - len(fields))
+        self.shadow.set_properties(PKT, 0x0D, bytes(values))
+
+    def test_single_field_covers_whole_packet(self):
+        self.set_fields(field(7, FIELD_CRC_START | FIELD_SEND_CRC | FIELD_CRC_ENABLE))
+        expected = crc(CCITT_16, self.data, 0xFFFF).to_bytes(2, "big").hex()
+        self.assertEqual(self.checker.check(True, self.data, False), f"CRC {expected} appended")
+
+    def test_crc_over_selected_fields(self):
+        # Header without CRC, payload with its own CRC
+        self.set_fields(field(2, 0), field(5, FIELD_CRC_START | FIELD_SEND_CRC | FIELD_CRC_ENABLE))
+        expected = crc(CCITT_16, self.data[2:], 0xFFFF).to_bytes(2, "big").hex()
+        self.assertEqual(self.checker.check(True, self.data, False), f"CRC {expected} appended")
+
+    def test_crc_per_field(self):
+        self.set_fields(field(3, FIELD_CRC_START | FIELD_SEND_CRC | FIELD_CRC_ENABLE),
+                        field(4, FIELD_CRC_START | FIELD_SEND_CRC | FIELD_CRC_ENABLE))
+        first = crc(CCITT_16, self.data[:3], 0xFFFF).to_bytes(2, "big").hex()
+        second = crc(CCITT_16, self.data[3:], 0xFFFF).to_bytes(2, "big").hex()
+        self.assertEqual(self.checker.check(True, self.data, False), f"CRC {first}, {second} appended")
+
+    def test_variable_length_field(self):
+        # PKT_LEN: field 2 holds the variable length data, up to 16 bytes
+        self.shadow.set_properties(PKT, 0x08, bytes([0x02]))
+        self.set_fields(field(1, FIELD_CRC_START | FIELD_CRC_ENABLE), field(16, FIELD_SEND_CRC | FIELD_CRC_ENABLE))
+        expected = crc(CCITT_16, self.data, 0xFFFF).to_bytes(2, "big").hex()
+        self.assertEqual(self.checker.check(True, self.data, False), f"CRC {expected} appended")
+
+    def test_packet_not_matching_layout_is_not_annotated(self):
+        self.set_fields(field(2, 0), field(3, FIELD_CRC_START | FIELD_SEND_CRC | FIELD_CRC_ENABLE))
+        self.assertIsNone(self.checker.check(True, self.data, False))
+        self.assertEqual(self.checker.check(False, self.data, True), "CRC error")
+
+    def test_rx_checked_by_packet_handler(self):
+        self.set_fields(field(2, 0), field(5, FIELD_CRC_START | FIELD_CHECK_CRC | FIELD_CRC_ENABLE))
+        self.assertEqual(self.checker.check(False, self.data, False), "CRC ok")
+        self.assertEqual(self.checker.check(False, self.data, True), "CRC error")
+
+    def test_unknown_layout_is_not_annotated(self):
+        self.assertIsNone(crc_config(self.shadow).tx_fields)
+        packet = self.data + b"\x00\x00"
+        self.assertIsNone(self.checker.check(True, packet, False))
+        self.assertIsNone(self.checker.check(False, packet, False))
+        self.assertEqual(self.checker.check(False, packet, True), "CRC error")
+
+    def test_no_field_crc_is_not_annotated(self):
+        self.set_fields(field(9, 0))
+        self.assertIsNone(self.checker.check(True, self.data + b"\x00\x00", False))
+        self.assertIsNone(self.checker.check(False, self.data + b"\x00\x00", False))
+
+    def test_in_band_crc(self):
+        # CRC enabled over the packet but not sent by the packet handler: the host appends it
+        self.set_fields(field(9, FIELD_CRC_START | FIELD_CRC_ENABLE))
+        expected = crc(CCITT_16, self.data, 0xFFFF).to_bytes(2, "big")
+        self.assertEqual(self.checker.check(True, self.data + expected, False), "CRC ok")
+        self.assertEqual(self.checker.check(False, self.data + b"\x00\x00", False),
+                         f"CRC mismatch, expected {expected.hex()}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from si4467_frequency import FRAC_SCALE, FrequencyCalculator, synthesizer_parameters
+from si4467_shadow import RadioShadow
+
+MODEM = 0x20
+FREQ_CONTROL = 0x40
+# POWER_UP with a 30 MHz XO
+POWER_UP = b"\x02\x01\x00\x01\xc9\xc3\x80"
+XO = 30e6
+
+
+def configured_shadow(band: int = 0x08) -> RadioShadow:
+    shadow = RadioShadow()
+    shadow.power_up(POWER_UP)
+    shadow.set_properties(MODEM, 0x51, bytes([band]))
+    # INTE 0x38, FRAC 0x0DDDDD, CHANNEL_STEP_SIZE 0x4444
+    shadow.set_properties(FREQ_CONTROL, 0x00, bytes([0x38, 0x0D, 0xDD, 0xDD, 0x44, 0x44]))
+    return shadow
+
+
+class SynthesizerTest(unittest.TestCase):
+    def test_channel_frequency(self):
+        calculator = FrequencyCalculator(configured_shadow())
+        # Prescaler 2 (SY_SEL), output divider 4: (INTE + FRAC / 2^19) * 2 * f_XO / 4
+        channel_0 = (0x38 + 0x0DDDDD / FRAC_SCALE) * XO / 2
+        spacing = 0x4444 / FRAC_SCALE * XO / 2
+        self.assertAlmostEqual(calculator.channel_frequency(0), channel_0, delta=1e-3)
+        self.assertAlmostEqual(calculator.channel_frequency(3), channel_0 + 3 * spacing, delta=1e-3)
+        self.assertAlmostEqual(channel_0 / 1e6, 866.0, places=3)
+        self.assertAlmostEqual(spacing, 500e3, delta=10)
+
+    def test_band_and_prescaler(self):
+        # BAND 2: output divider 8, without SY_SEL the prescaler divides by 4
+        reference = FrequencyCalculator(configured_shadow()).channel_frequency(0)
+        self.assertAlmostEqual(FrequencyCalculator(configured_shadow(0x0A)).channel_frequency(0), reference / 2,
+                               delta=1e-3)
+        self.assertAlmostEqual(FrequencyCalculator(configured_shadow(0x02)).channel_frequency(0), reference,
+                               delta=1e-3)
+
+    def test_hop_frequency(self):
+        calculator = FrequencyCalculator(configured_shadow())
+        self.assertAlmostEqual(calculator.hop_frequency(0x38, 0x0DDDDD), calculator.channel_frequency(0), delta=1e-3)
+        self.assertAlmostEqual(calculator.hop_frequency(0x3C, 0x080000), 61 * XO / 2, delta=1e-3)
+
+    def test_reset_defaults_after_power_up(self):
+        shadow = RadioShadow()
+        shadow.power_up(POWER_UP)
+        # INTE 0x3C, FRAC 0x080000, SY_SEL and BAND 0, no channel step
+        calculator = FrequencyCalculator(shadow)
+        self.assertAlmostEqual(calculator.channel_frequency(0), 915e6, delta=1e-3)
+        self.assertEqual(calculator.channel_frequency(7), calculator.channel_frequency(0))
+
+    def test_unknown_without_power_up(self):
+        self.assertIsNone(synthesizer_parameters(RadioShadow()))
+        self.assertIsNone(FrequencyCalculator(RadioShadow()).channel_frequency(0))
+        self.assertIsNone(FrequencyCalculator(RadioShadow()).hop_frequency(0x38, 0))
+
+    def test_follows_shadow_changes(self):
+        shadow = configured_shadow()
+        calculator = FrequencyCalculator(shadow)
+        before = calculator.channel_frequency(0)
+        shadow.set_properties(FREQ_CONTROL, 0x00, bytes([0x39]))
+        self.assertAlmostEqual(calculator.channel_frequency(0) - before, XO / 2, delta=1e-3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from si4467_offline import create_analyzer, decode_frames, read_spi_csv
+from si4467_status import HEX_BYTE, STATE_PAYLOADS, frr_mode_name, frr_mode_payloads
+from test_offline import spi_csv
+
+# FRR_CTL_A..D_MODE: INT_PH_PEND, CURRENT_STATE, LATCHED_RSSI, a mode the Si4467 does not have
+SET_FRR_MODES = ([0x11, 0x02, 0x04, 0x00, 0x04, 0x09, 0x0A, 0x0B], [0xFF] * 8)
+CTS = ([0x44, 0x00], [0xFF, 0xFF])
+POWER_UP = ([0x02, 0x01, 0x00, 0x01, 0xC9, 0xC3, 0x80], [0xFF] * 7)
+
+
+def frr_read(command_id: int, values=(0x20, 0x07, 0x80, 0x42)):
+    return [command_id] + [0x00] * len(values), [0xFF] + list(values)
+
+
+def decoded_frr_reads(transactions):
+    """(name, payload) of the FRR bytes of every FRR read, per byte."""
+    frames = decode_frames(read_spi_csv(spi_csv(transactions).splitlines()), create_analyzer())
+    reads = []
+    for frame in frames:
+        if frame.type == "command_payload" and frame.data["name"] == "> CMD":
+            reads.append([])
+        elif frame.type == "command_payload" and "_VALUE (" in frame.data["name"]:
+            reads[-1].append((frame.data["name"], frame.data["payload"]))
+    return [read for read in reads if read]
+
+
+class FrrModeTest(unittest.TestCase):
+    def test_default_modes(self):
+        read, = decoded_frr_reads([frr_read(0x50)])
+        self.assertEqual([name for name, _ in read], ["< FRR_A_VALUE (INT_STATUS)", "< FRR_B_VALUE (INT_PEND)",
+                                                      "< FRR_C_VALUE (CURRENT_STATE)", "< FRR_D_VALUE (DISABLED)"])
+        self.assertEqual(read[2][1], "0x80")
+
+    def test_configured_modes(self):
+        _, read = decoded_frr_reads([frr_read(0x50), SET_FRR_MODES, CTS, frr_read(0x50)])
+        self.assertEqual(read, [("< FRR_A_VALUE (INT_PH_PEND)", "0x20 (PACKET_SENT)"),
+                                ("< FRR_B_VALUE (CURRENT_STATE)", "0x07 (TX)"),
+                                ("< FRR_C_VALUE (LATCHED_RSSI)", "0x80 (raw 64.0 dB, uncompensated)"),
+                                ("< FRR_D_VALUE (MODE 11)", "0x42")])
+
+    def test_reads_wrap_around_after_d(self):
+        read, short_read = decoded_frr_reads([SET_FRR_MODES, CTS, frr_read(0x53), frr_read(0x57, (0x10,))])
+        self.assertEqual([name for name, _ in read], ["< FRR_C_VALUE (LATCHED_RSSI)", "< FRR_D_VALUE (MODE 11)",
+                                                      "< FRR_A_VALUE (INT_PH_PEND)", "< FRR_B_VALUE (CURRENT_STATE)"])
+        self.assertEqual(short_read, [("< FRR_D_VALUE (MODE 11)", "0x10")])
+
+    def test_modes_read_back_with_get_property(self):
+        reads = decoded_frr_reads([([0x12, 0x02, 0x01, 0x01], [0xFF] * 4), ([0x44, 0x00, 0x00], [0xFF, 0xFF, 0x04]),
+                                   frr_read(0x51, (0x20,))])
+        self.assertEqual(reads, [[("< FRR_B_VALUE (INT_PH_PEND)", "0x20 (PACKET_SENT)")]])
+
+    def test_power_up_restores_defaults(self):
+        *_, read = decoded_frr_reads([SET_FRR_MODES, CTS, POWER_UP, CTS, frr_read(0x50)])
+        self.assertEqual(read[0][0], "< FRR_A_VALUE (INT_STATUS)")
+
+    def test_mode_names(self):
+        self.assertEqual(frr_mode_name(9), "CURRENT_STATE")
+        self.assertIs(frr_mode_payloads(9), STATE_PAYLOADS)
+        self.assertEqual(frr_mode_name(0xC0), "MODE 192")
+        self.assertIs(frr_mode_payloads(0xC0), HEX_BYTE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import random
+import unittest
+from collections import Counter
+
+from si4467_analyzer import Transaction
+from si4467_ngrams import NgramCounter
+
+
+def transaction(command_id: int, index: int) -> Transaction:
+    return Transaction(command_id, index * 1e-4, index * 1e-4 + 1e-5, bytes((command_id,)), b"", None)
+
+
+class NgramCounterTest(unittest.TestCase):
+    def test_counts_are_exact_below_capacity(self):
+        counter = NgramCounter(max_length=3)
+        for index, command_id in enumerate([0x44, 0x20, 0x44, 0x20, 0x44]):
+            counter.add(transaction(command_id, index))
+        bigrams = counter.most_common(length=2)
+        self.assertEqual(sorted(commands for commands, _, _ in bigrams), [(0x20, 0x44), (0x44, 0x20)])
+        for _, count, seconds in bigrams:
+            self.assertEqual(count, 2)
+            # Two transactions of 10 us each per occurrence
+            self.assertAlmostEqual(seconds, 4e-5)
+        self.assertEqual(counter.most_common(length=3)[0][:2], ((0x44, 0x20, 0x44), 2))
+
+    def test_new_ngram_decrements_by_one(self):
+        # GET_INT_STATUS -> READ_CMD_BUFF and back 10 times each fill the summary, one more n-gram must not wipe it
+        commands = [0x20, 0x44] * 10 + [0x20, 0x15]
+        counter = NgramCounter(max_length=2, capacity=2)
+        for index, command_id in enumerate(commands):
+            counter.add(transaction(command_id, index))
+        self.assertEqual(sorted(counter.most_common(length=2))[0][:2], ((0x20, 0x44), 9))
+        self.assertNotIn((0x20, 0x15), [commands_ for commands_, _, _ in counter.most_common(length=2)])
+
+    def test_heavy_hitter_is_kept(self):
+        # FIFO_INFO -> WRITE_TX_FIFO every third command, noise in between
+        rng = random.Random(4467)
+        commands = []
+        for _ in range(3000):
+            commands += [0x15, 0x66, rng.randrange(0x80, 0xFF)]
+        counter = NgramCounter(max_length=2, capacity=8)
+        for index, command_id in enumerate(commands):
+            counter.add(transaction(command_id, index))
+
+        exact = Counter(zip(commands, commands[1:]))
+        seen = len(commands) - 1
+        self.assertEqual(counter.totals[2], seen)
+        self.assertLessEqual(len(counter.counts[2]), 8)
+        (commands_, count, _), = counter.most_common(1, length=2)
+        self.assertEqual(commands_, (0x15, 0x66))
+        self.assertLessEqual(count, exact[(0x15, 0x66)])
+        self.assertGreaterEqual(count, exact[(0x15, 0x66)] - seen // 9)
+        for commands_, count, _ in counter.most_common(8, length=2):
+            self.assertLessEqual(count, exact[commands_])
+            self.assertGreaterEqual(count, exact[commands_] - seen // 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
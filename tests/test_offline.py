@@ -0,0 +1,221 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from typing import List, Sequence, Tuple
+
+from si4467_analyzer import OUTPUT_PER_BYTE, OUTPUT_PER_FIELD, POLLS_COLLAPSE, POLLS_SHOW_ALL, TRACKING_ON
+from si4467_offline import decode_spi_csv_parallel, main, split_spi_csv
+
+HEADER = 'name,type,start_time,duration,"mosi","miso"\n'
+
+
+def spi_csv(transactions: Sequence[Tuple[Sequence[int], Sequence[int]]], gap: float = 0.0001) -> str:
+    """Logic 2 SPI export of the given (MOSI, MISO) transactions."""
+    rows: List[str] = [HEADER]
+    time = 0.0
+    for mosi, miso in transactions:
+        rows.append(f'"SPI","enable",{time:.9f},0.000000010,,\n')
+        for out, back in zip(mosi, miso):
+            time += 0.000001
+            rows.append(f'"SPI","result",{time:.9f},0.000001000,0x{out:02x},0x{back:02x}\n')
+        time += 0.000002
+        rows.append(f'"SPI","disable",{time:.9f},0.000000010,,\n')
+        time += gap
+    return "".join(rows)
+
+
+class OfflineTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_csv(self, text: str, name: str = "capture.csv") -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, "w", newline="") as file:
+            file.write(text)
+        return path
+
+    def decode(self, *argv: str) -> str:
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(main(list(argv)), 0)
+        return output.getvalue()
+
+
+class CollapsePollsTest(OfflineTestCase):
+    def test_trailing_poll_run_is_written(self):
+        # PART_INFO then two READ_CMD_BUFF polls without CTS, the capture ends before the radio answers
+        path = self.write_csv(spi_csv([([0x01], [0xFF]), ([0x44, 0x00], [0xFF, 0x00]), ([0x44, 0x00], [0xFF, 0x00])]))
+        rows = self.decode(path, "--collapse-polls", "-g", "transaction").splitlines()
+        self.assertTrue(rows[-1].startswith("cts_polls,"), rows)
+        self.assertIn("CTS not ready x2", rows[-1])
+
+
+class PropertyAtTest(OfflineTestCase):
+    def test_value_over_time(self):
+        # SET_PROPERTY MODEM_DATA_RATE = 10000, later 20000
+        path = self.write_csv(spi_csv([([0x11, 0x20, 0x03, 0x03, 0x00, 0x27, 0x10], [0xFF] * 7),
+                                       ([0x11, 0x20, 0x03, 0x03, 0x00, 0x4E, 0x20], [0xFF] * 7)], gap=1.0))
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            self.decode(path, "-g", "transaction", "--property-at", "MODEM_DATA_RATE@0.5",
+                        "--property-at", "MODEM_DATA_RATE@1.5")
+        self.assertEqual(errors.getvalue().splitlines(), ["MODEM_DATA_RATE @ 0.5 s: 10000 (0x2710)",
+                                                          "MODEM_DATA_RATE @ 1.5 s: 20000 (0x4e20)"])
+
+
+class CtsReportTest(OfflineTestCase):
+    def test_waits_per_command(self):
+        # PART_INFO, one READ_CMD_BUFF without CTS and one with it
+        path = self.write_csv(spi_csv([([0x01], [0xFF]), ([0x44, 0x00], [0xFF, 0x00]), ([0x44, 0x00], [0xFF, 0xFF])]))
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            rows = self.decode(path, "-g", "transaction", "--cts-report").splitlines()
+        self.assertEqual(sum(row.startswith("cts_wait,") for row in rows), 1)
+        part_info, = [line.split() for line in errors.getvalue().splitlines() if line.startswith("PART_INFO")]
+        # waits, polls, most polls
+        self.assertEqual(part_info[1:4], ["1", "2", "2"])
+
+    def test_no_waits_for_fifo_writes(self):
+        # START_TX, WRITE_TX_FIFO while it waits for CTS, CTS; WRITE_TX_FIFO, READ_CMD_BUFF
+        path = self.write_csv(spi_csv([([0x31, 0x00, 0x30, 0x00, 0x00], [0xFF] * 5), ([0x66, 0x01], [0xFF] * 2),
+                                       ([0x44, 0x00], [0xFF, 0xFF]), ([0x66, 0x02], [0xFF] * 2),
+                                       ([0x44, 0x00], [0xFF, 0xFF])]))
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            rows = self.decode(path, "-g", "transaction", "--cts-report").splitlines()
+        waits = [row for row in rows if row.startswith("cts_wait,")]
+        self.assertEqual(len(waits), 1)
+        self.assertIn("CTS after START_TX", waits[0])
+        self.assertNotIn("WRITE_TX_FIFO", errors.getvalue())
+
+
+class StateDurationsTest(OfflineTestCase):
+    def test_all_states_count(self):
+        # CHANGE_STATE to READY, TX and READY again, one second apart
+        path = self.write_csv(spi_csv([([0x34, 0x03], [0xFF] * 2), ([0x34, 0x07], [0xFF] * 2),
+                                       ([0x34, 0x03], [0xFF] * 2)], gap=1.0))
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            self.decode(path, "-g", "transaction", "--state-durations")
+        durations = dict(line.split(": ") for line in errors.getvalue().splitlines())
+        self.assertEqual(set(durations), {"READY", "TX"})
+        self.assertAlmostEqual(float(durations["TX"].split()[0]), 1.0, places=3)
+
+
+class NoTrackingTest(OfflineTestCase):
+    # WRITE_TX_FIFO of 4 bytes, START_TX of them, CTS
+    TRANSMIT = [([0x66, 1, 2, 3, 4], [0xFF] * 5), ([0x31, 0x00, 0x30, 0x00, 0x04], [0xFF] * 5),
+                ([0x44, 0x00], [0xFF, 0xFF])]
+
+    def test_only_commands(self):
+        path = self.write_csv(spi_csv(self.TRANSMIT))
+        tracked = {row.split(",")[0] for row in self.decode(path, "-g", "transaction").splitlines()[1:]}
+        self.assertEqual(tracked, {"command", "packet", "cts_wait"})
+        rows = self.decode(path, "-g", "transaction", "--no-tracking").splitlines()[1:]
+        untracked = {row.split(",")[0] for row in rows}
+        self.assertEqual(untracked, {"command"})
+
+    def test_reports_need_tracking(self):
+        path = self.write_csv(spi_csv(self.TRANSMIT))
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main([path, "--no-tracking", "--cts-report"])
+
+
+def radio_capture(rounds: int = 40) -> str:
+    """Capture whose decoding depends on state from far back: FRR modes, frequency and CRC configuration set once,
+    TX packets written in two transactions, RX packets, state changes and CTS polls."""
+    transactions = []
+
+    def command(mosi: List[int], reply: Sequence[int] = (), not_ready: int = 0) -> None:
+        transactions.append((mosi, [0xFF] * len(mosi)))
+        for _ in range(not_ready):
+            transactions.append(([0x44, 0x00], [0xFF, 0x00]))
+        transactions.append(([0x44] + [0x00] * (1 + len(reply)), [0xFF, 0xFF] + list(reply)))
+
+    # POWER_UP with a 30 MHz XO
+    command([0x02, 0x01, 0x00, 0x01, 0xC9, 0xC3, 0x80], not_ready=3)
+    # FRR_CTL: A = INT_PH_PEND, B = CURRENT_STATE
+    command([0x11, 0x02, 0x04, 0x00, 0x04, 0x09, 0x00, 0x00])
+    # MODEM_CLKGEN_BAND, FREQ_CONTROL_INTE/FRAC/CHANNEL_STEP_SIZE
+    command([0x11, 0x20, 0x01, 0x51, 0x08])
+    command([0x11, 0x40, 0x06, 0x00, 0x38, 0x0D, 0xDD, 0xDD, 0x44, 0x44])
+    # PKT_CRC_CONFIG: CCITT-16 seeded with ones, PKT_FIELD_1: 64 bytes, CRC START, SEND, CHECK, ENABLE, no field 2
+    command([0x11, 0x12, 0x01, 0x00, 0x85])
+    command([0x11, 0x12, 0x08, 0x0D, 0x00, 0x40, 0x00, 0xAA, 0x00, 0x00, 0x00, 0x00])
+    for index in range(rounds):
+        payload = [(index + offset) & 0xFF for offset in range(64)]
+        transactions.append(([0x66] + payload[:32], [0xFF] * 33))
+        transactions.append(([0x66] + payload[32:], [0xFF] * 33))
+        # START_TX of 64 bytes on channel index % 4, READY after TX
+        command([0x31, index % 4, 0x30, 0x00, 0x40, 0x00, 0x00], not_ready=index % 3)
+        # FRR_A_READ: PACKET_SENT, READY
+        transactions.append(([0x50, 0x00, 0x00], [0xFF, 0x20, 0x03]))
+        # START_RX of 16 bytes, READY after RX either way
+        command([0x32, index % 4, 0x00, 0x00, 0x10, 0x00, 0x03, 0x03])
+        # GET_INT_STATUS: PACKET_RX
+        command([0x20, 0x00, 0x00, 0x00], [0x01, 0x01, 0x10, 0x10, 0x00, 0x00, 0x00, 0x00])
+        transactions.append(([0x77] + [0x00] * 16, [0xFF] + [(index * 7 + offset) & 0xFF for offset in range(16)]))
+        command([0x15, 0x00], [0x00, 0x40])
+    return spi_csv(transactions, gap=0.00005)
+
+
+class ParallelDecodeTest(OfflineTestCase):
+    def test_split_points(self):
+        text = radio_capture()
+        path = self.write_csv(text)
+        header, ranges = split_spi_csv(path, 2000)
+        self.assertEqual(header, HEADER)
+        self.assertGreater(len(ranges), 10)
+        with open(path, "rb") as file:
+            data = file.read()
+        self.assertEqual(ranges[0][0], len(HEADER))
+        self.assertEqual(ranges[-1][1], len(data))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            first, second = data[start:].split(b"\n", 2)[:2]
+            self.assertIn(b'"enable"', first)
+            # Never READ_CMD_BUFF, READ_RX_FIFO or an FRR read, they depend on the command before them
+            self.assertNotIn(second.split(b",")[4], (b"0x44", b"0x77", b"0x50"))
+
+    def assert_same_as_serial(self, settings: dict, *argv: str, jobs: int = 2) -> None:
+        path = self.write_csv(radio_capture())
+        serial = self.decode(path, *argv)
+        parallel = io.StringIO()
+        decode_spi_csv_parallel(path, parallel, jobs, **settings)
+        self.assertEqual(parallel.getvalue().splitlines(), serial.splitlines())
+        # The capture does depend on what was tracked before the last pieces
+        tail = serial.splitlines()[-len(serial.splitlines()) // 4:]
+        for text in ("MHz", "TX packet (CRC", "INT_PH_PEND", "state,"):
+            self.assertTrue(any(text in row for row in tail), text)
+
+    def test_same_as_serial(self):
+        self.assert_same_as_serial(dict(output_granularity=OUTPUT_PER_BYTE, cts_poll_output=POLLS_SHOW_ALL,
+                                        radio_tracking=TRACKING_ON))
+
+    def test_same_as_serial_with_collapsed_polls(self):
+        self.assert_same_as_serial(dict(output_granularity=OUTPUT_PER_FIELD, cts_poll_output=POLLS_COLLAPSE,
+                                        radio_tracking=TRACKING_ON), "-g", "field", "--collapse-polls")
+
+    def test_same_as_serial_with_short_pieces(self):
+        # The start of most pieces is guessed wrong (FRR reads of a piece are decoded before the FRR modes configured
+        # in the pieces before it are known), some pieces never get to the state that was guessed
+        self.assert_same_as_serial(dict(output_granularity=OUTPUT_PER_BYTE, cts_poll_output=POLLS_SHOW_ALL,
+                                        radio_tracking=TRACKING_ON), jobs=8)
+
+    def test_error_names_line_of_export(self):
+        text = radio_capture().splitlines(keepends=True)
+        # Drop the MOSI/MISO values of a row near the end
+        line = [number for number, row in enumerate(text, 1) if '"result"' in row][-5]
+        text[line - 1] = text[line - 1].rsplit(",", 2)[0] + ",,\n"
+        path = self.write_csv("".join(text))
+        with self.assertRaisesRegex(ValueError, f"^line {line}: "):
+            decode_spi_csv_parallel(path, io.StringIO(), 2, output_granularity=OUTPUT_PER_BYTE,
+                                    cts_poll_output=POLLS_SHOW_ALL, radio_tracking=TRACKING_ON)
+
+
+if __name__ == "__main__":
+    unittest.main()
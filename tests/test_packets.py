@@ -0,0 +1,164 @@
+import unittest
+
+from si4467_analyzer import OUTPUT_TRANSACTION_ONLY
+from si4467_offline import create_analyzer, decode_frames, read_spi_csv
+from si4467_packets import MAX_PACKET_LENGTH, RX, TX, PacketAssembler
+from test_offline import spi_csv
+
+# TX/RX FIFO size of the Si4467 (FIFO_MODE shared off)
+FIFO_SIZE = 64
+
+
+def chunks(data: bytes, size: int = FIFO_SIZE):
+    return [data[offset:offset + size] for offset in range(0, len(data), size)]
+
+
+class TxPacketTest(unittest.TestCase):
+    def test_multi_chunk_packet_with_tx_len(self):
+        assembler = PacketAssembler()
+        data = bytes(range(200))
+        first, *rest = chunks(data)
+        self.assertEqual(assembler.tx_fifo_write(first, 1.0, 1.1), [])
+        self.assertEqual(assembler.start_tx(len(data), 1.2), [])
+        packets = []
+        for index, chunk in enumerate(rest):
+            packets += assembler.tx_fifo_write(chunk, 2.0 + index, 2.1 + index)
+        packet, = packets
+        self.assertEqual((packet.direction, packet.data, packet.truncated), (TX, data, False))
+        self.assertEqual((packet.start_time, packet.end_time), (1.0, 2.1 + len(rest) - 1))
+
+    def test_multi_chunk_packet_ended_by_packet_sent(self):
+        assembler = PacketAssembler()
+        data = bytes(range(100))
+        assembler.start_tx(0, 0.5)
+        for index, chunk in enumerate(chunks(data, 30)):
+            self.assertEqual(assembler.tx_fifo_write(chunk, 1.0 + index, 1.1 + index), [])
+        packet, = assembler.packet_handler_pending(True, False, False, 9.0)
+        self.assertEqual((packet.data, packet.end_time), (data, 9.0))
+        self.assertEqual(assembler.packet_handler_pending(True, False, False, 10.0), [])
+
+    def test_packet_sent_with_empty_fifo_ends_transmission(self):
+        assembler = PacketAssembler()
+        assembler.start_tx(64, 0.5)
+        self.assertEqual(assembler.packet_handler_pending(True, False, False, 1.0), [])
+        # The next packet is only complete once started, not as soon as TX_LEN bytes were written
+        self.assertEqual(assembler.tx_fifo_write(bytes(64), 2.0, 2.1), [])
+        packet, = assembler.start_tx(64, 3.0)
+        self.assertEqual((packet.data, packet.end_time), (bytes(64), 3.0))
+
+    def test_equal_once_the_same_packets_are_in_flight(self):
+        first = PacketAssembler()
+        second = PacketAssembler()
+        first.tx_fifo_write(bytes(10), 1.0, 1.1)
+        self.assertNotEqual(first, second)
+        first.start_tx(10, 1.2)
+        second.tx_fifo_write(bytes(5), 4.0, 4.1)
+        self.assertNotEqual(first, second)
+        second.fifo_reset(False, True)
+        self.assertEqual(first, second)
+
+    def test_truncated_at_max_length(self):
+        assembler = PacketAssembler()
+        assembler.start_tx(0, 0.0)
+        data = bytes(index & 0xFF for index in range(MAX_PACKET_LENGTH + 100))
+        packets = []
+        for index, chunk in enumerate(chunks(data)):
+            packets += assembler.tx_fifo_write(chunk, float(index), index + 0.5)
+        packet = packets[0]
+        self.assertEqual(len(packet.data), MAX_PACKET_LENGTH)
+        self.assertEqual(packet.data, data[:MAX_PACKET_LENGTH])
+        self.assertTrue(packet.truncated)
+
+    def test_exactly_max_length_is_not_truncated(self):
+        assembler = PacketAssembler()
+        assembler.start_tx(0, 0.0)
+        data = bytes(MAX_PACKET_LENGTH)
+        packets = []
+        for chunk in chunks(data):
+            packets += assembler.tx_fifo_write(chunk, 0.0, 0.0)
+        packet, = packets
+        self.assertEqual((len(packet.data), packet.truncated), (MAX_PACKET_LENGTH, False))
+
+
+class RxPacketTest(unittest.TestCase):
+    def test_multi_chunk_packet(self):
+        assembler = PacketAssembler()
+        data = bytes(range(150))
+        *early, last = chunks(data)
+        # RX FIFO almost full: the host drains the FIFO while the packet is still coming in
+        for index, chunk in enumerate(early):
+            self.assertEqual(assembler.rx_fifo_read(chunk, 1.0 + index, 1.1 + index), [])
+        self.assertEqual(assembler.packet_handler_pending(False, True, False, 5.0), [])
+        self.assertEqual(assembler.rx_fifo_read(last, 6.0, 6.1), [])
+        packet, = assembler.rx_reading_stopped()
+        self.assertEqual((packet.direction, packet.data, packet.crc_error), (RX, data, False))
+        self.assertEqual((packet.start_time, packet.end_time), (1.0, 6.1))
+        self.assertEqual(assembler.rx_reading_stopped(), [])
+
+    def test_crc_error_flag(self):
+        assembler = PacketAssembler()
+        assembler.packet_handler_pending(False, False, True, 1.0)
+        assembler.rx_fifo_read(b"\x01\x02", 2.0, 2.1)
+        packet, = assembler.rx_reading_stopped()
+        self.assertTrue(packet.crc_error)
+
+    def test_truncated_at_max_length(self):
+        assembler = PacketAssembler()
+        data = bytes(MAX_PACKET_LENGTH + 1)
+        packets = []
+        for chunk in chunks(data):
+            packets += assembler.rx_fifo_read(chunk, 0.0, 0.0)
+        packet, = packets
+        self.assertEqual((len(packet.data), packet.truncated), (MAX_PACKET_LENGTH, True))
+
+    def test_fifo_reset_drops_partial_packet(self):
+        assembler = PacketAssembler()
+        assembler.rx_fifo_read(b"\x01\x02", 0.0, 0.1)
+        self.assertEqual(assembler.fifo_reset(rx=True, tx=False), [])
+        assembler.packet_handler_pending(False, True, False, 1.0)
+        assembler.rx_fifo_read(b"\x03", 2.0, 2.1)
+        packet, = assembler.rx_reading_stopped()
+        self.assertEqual(packet.data, b"\x03")
+
+
+class RxPacketEndTest(unittest.TestCase):
+    # START_RX, GET_INT_STATUS reporting PACKET_RX, READ_RX_FIFO of 4 bytes
+    RECEIVE = [([0x32, 0x00, 0x00, 0x00, 0x04, 0x00, 0x03, 0x03], [0xFF] * 8), ([0x44, 0x00], [0xFF, 0xFF]),
+               ([0x20, 0x00, 0x00, 0x00], [0xFF] * 4),
+               ([0x44] + [0x00] * 9, [0xFF, 0xFF, 0x01, 0x01, 0x10, 0x10, 0x00, 0x00, 0x00, 0x00]),
+               ([0x77] + [0x00] * 4, [0xFF, 0x01, 0x02, 0x03, 0x04])]
+
+    def decode(self, transactions):
+        frames = read_spi_csv(spi_csv(self.RECEIVE + transactions).splitlines())
+        return [(frame.type, frame.data["name"], frame.end_time) for frame in
+                decode_frames(frames, create_analyzer(output_granularity=OUTPUT_TRANSACTION_ONLY))
+                if frame.type in ("command", "packet")]
+
+    def assert_packet_after(self, transactions, command_name):
+        decoded = self.decode(transactions)
+        names = [name for _, name, _ in decoded]
+        index = names.index("RX packet")
+        self.assertEqual(names[index - 1], command_name)
+        # Ends with the last FIFO read rather than the transaction ending it
+        read_end = [end for _, name, end in decoded if name == "READ_RX_FIFO"][-1]
+        self.assertEqual(decoded[index][2], read_end)
+
+    def test_ended_by_tx_fifo_write(self):
+        self.assert_packet_after([([0x66, 0x01, 0x02], [0xFF] * 3), ([0x66, 0x03, 0x04], [0xFF] * 3)],
+                                 "WRITE_TX_FIFO")
+        names = [name for _, name, _ in self.decode([([0x66, 0x01], [0xFF] * 2), ([0x66, 0x02], [0xFF] * 2)])]
+        self.assertEqual(names[-3:], ["WRITE_TX_FIFO", "RX packet", "WRITE_TX_FIFO"])
+
+    def test_ended_by_tx_fifo_reset(self):
+        self.assert_packet_after([([0x15, 0x01], [0xFF] * 2), ([0x44, 0x00, 0x00, 0x00], [0xFF, 0xFF, 0x00, 0x40])],
+                                 "FIFO_INFO")
+
+    def test_not_ended_by_fifo_count_query(self):
+        # FIFO_INFO without reset is part of reading out the packet, the second READ_RX_FIFO belongs to it
+        decoded = self.decode([([0x15, 0x00], [0xFF] * 2), ([0x44, 0x00, 0x00, 0x00], [0xFF, 0xFF, 0x02, 0x40]),
+                               ([0x77, 0x00, 0x00], [0xFF, 0x05, 0x06]), ([0x66, 0x01], [0xFF] * 2)])
+        self.assertEqual([name for _, name, _ in decoded[-3:]], ["READ_RX_FIFO", "WRITE_TX_FIFO", "RX packet"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from si4467_analyzer import OUTPUT_TRANSACTION_ONLY
+from si4467_offline import create_analyzer, decode_frames, read_spi_csv
+from si4467_report import CTS_POLLING, FIFO_TRANSFERS, PROPERTY_WRITES, STATUS_READS, BusReport
+from test_offline import spi_csv
+
+# SET_PROPERTY MODEM_DATA_RATE = 10000
+DATA_RATE_10000 = ([0x11, 0x20, 0x03, 0x03, 0x00, 0x27, 0x10], [0xFF] * 7)
+CTS = ([0x44, 0x00], [0xFF, 0xFF])
+NOT_READY = ([0x44, 0x00], [0xFF, 0x00])
+POWER_UP = ([0x02, 0x01, 0x00, 0x01, 0xC9, 0xC3, 0x80], [0xFF] * 7)
+
+
+def report(transactions) -> BusReport:
+    analyzer = create_analyzer(output_granularity=OUTPUT_TRANSACTION_ONLY)
+    bus_report = BusReport(analyzer.shadow)
+    analyzer.transaction_listeners.append(bus_report.add)
+    for _ in decode_frames(read_spi_csv(spi_csv(transactions).splitlines()), analyzer):
+        pass
+    return bus_report
+
+
+class BusTimeTest(unittest.TestCase):
+    def test_categories(self):
+        bus_report = report([([0x66, 1, 2, 3], [0xFF] * 4), DATA_RATE_10000, NOT_READY, NOT_READY, CTS,
+                             ([0x15, 0x00], [0xFF] * 2), ([0x44, 0x00, 0x00, 0x00], [0xFF, 0xFF, 0x00, 0x40])])
+        self.assertEqual(bus_report.poll_count, 2)
+        self.assertEqual(bus_report.command_counts[0x44], 4)
+        self.assertEqual(bus_report.command_counts[0x11], 1)
+        for category in (CTS_POLLING, STATUS_READS, FIFO_TRANSFERS, PROPERTY_WRITES):
+            self.assertGreater(bus_report.category_times[category], 0.0, category)
+        # The FIFO_INFO reply counts towards FIFO_INFO
+        self.assertGreater(bus_report.reply_times[0x15], 0.0)
+        self.assertEqual(bus_report.reply_times[0x44], 0.0)
+
+
+class WastefulPatternsTest(unittest.TestCase):
+    def test_int_status_without_pending_interrupt(self):
+        int_status = ([0x20, 0x00, 0x00, 0x00], [0xFF] * 4)
+        # INT_PEND 0, then a pending PH interrupt
+        bus_report = report([int_status, ([0x44] + [0x00] * 9, [0xFF, 0xFF] + [0x00] * 8),
+                             int_status, ([0x44] + [0x00] * 9, [0xFF, 0xFF, 0x01, 0x01] + [0x00] * 6)])
+        self.assertEqual(bus_report.idle_int_status_count, 1)
+
+    def test_redundant_property_writes(self):
+        bus_report = report([DATA_RATE_10000, CTS, DATA_RATE_10000, CTS])
+        self.assertEqual((bus_report.redundant_property_writes, bus_report.redundant_property_bytes), (1, 3))
+
+    def test_changed_or_partly_unknown_values_are_not_redundant(self):
+        # MODEM_DATA_RATE[7:0] = 0x10, then all of it, then a different value
+        bus_report = report([([0x11, 0x20, 0x01, 0x05, 0x10], [0xFF] * 5), CTS, DATA_RATE_10000, CTS,
+                             ([0x11, 0x20, 0x03, 0x03, 0x00, 0x4E, 0x20], [0xFF] * 7), CTS])
+        self.assertEqual(bus_report.redundant_property_writes, 0)
+
+    def test_power_up_reverts_to_defaults(self):
+        bus_report = report([DATA_RATE_10000, CTS, POWER_UP, CTS, DATA_RATE_10000, CTS])
+        self.assertEqual(bus_report.redundant_property_writes, 0)
+
+    def test_value_read_back_is_known(self):
+        # GET_PROPERTY MODEM_DATA_RATE reads 10000, writing it is redundant
+        bus_report = report([([0x12, 0x20, 0x03, 0x03], [0xFF] * 4), ([0x44, 0x00, 0x00, 0x00, 0x00],
+                                                                       [0xFF, 0xFF, 0x00, 0x27, 0x10]),
+                             DATA_RATE_10000, CTS])
+        self.assertEqual(bus_report.redundant_property_writes, 1)
+
+    def test_unchanged_fifo_info(self):
+        fifo_info = ([0x15, 0x00], [0xFF] * 2)
+        bus_report = report([fifo_info, ([0x44, 0x00, 0x00, 0x00], [0xFF, 0xFF, 0x00, 0x40]),
+                             fifo_info, ([0x44, 0x00, 0x00, 0x00], [0xFF, 0xFF, 0x00, 0x40]),
+                             fifo_info, ([0x44, 0x00, 0x00, 0x00], [0xFF, 0xFF, 0x04, 0x40])])
+        self.assertEqual(bus_report.unchanged_fifo_info_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from si4467_shadow import RadioShadow
+
+# MODEM_DATA_RATE, 3 bytes
+MODEM = 0x20
+DATA_RATE = 0x03
+
+
+class PropertyHistoryTest(unittest.TestCase):
+    def test_not_recorded_by_default(self):
+        shadow = RadioShadow()
+        shadow.set_properties(MODEM, DATA_RATE, b"\x00\x27\x10", 1.0)
+        self.assertIsNone(shadow.history)
+        self.assertEqual(shadow.property_value("MODEM_DATA_RATE"), 10000)
+        with self.assertRaises(ValueError):
+            shadow.property_value_at("MODEM_DATA_RATE", 2.0)
+
+    def test_value_at(self):
+        shadow = RadioShadow()
+        shadow.record_history()
+        shadow.set_properties(MODEM, DATA_RATE, b"\x00\x27\x10", 1.0)
+        shadow.set_properties(MODEM, DATA_RATE + 1, b"\x4e\x20", 2.0)
+        self.assertIsNone(shadow.property_value_at("MODEM_DATA_RATE", 0.5))
+        self.assertEqual(shadow.property_value_at("MODEM_DATA_RATE", 1.0), 10000)
+        self.assertEqual(shadow.property_value_at("MODEM_DATA_RATE", 1.5), 10000)
+        self.assertEqual(shadow.property_value_at("MODEM_DATA_RATE", 2.5), 20000)
+
+    def test_power_up_forgets_values(self):
+        shadow = RadioShadow()
+        shadow.record_history()
+        shadow.set_properties(MODEM, DATA_RATE, b"\x00\x27\x10", 1.0)
+        shadow.power_up(b"\x02\x01\x00\x01\xc9\xc3\x80", 2.0)
+        self.assertEqual(shadow.property_value_at("MODEM_DATA_RATE", 1.5), 10000)
+        self.assertIsNone(shadow.property_value_at("MODEM_DATA_RATE", 2.5))
+        self.assertIsNone(shadow.property_value("MODEM_DATA_RATE"))
+
+
+class ApplyTest(unittest.TestCase):
+    def assert_same_configuration(self, first: RadioShadow, second: RadioShadow) -> None:
+        for name in ("properties", "known", "gpio_config", "gpio_known", "xo_frequency", "boot_options",
+                     "xtal_options", "power_up_count"):
+            self.assertEqual(getattr(first, name), getattr(second, name), name)
+
+    def test_same_as_one_shadow(self):
+        whole = RadioShadow()
+        before = RadioShadow()
+        later = RadioShadow()
+        for shadow in (whole, before):
+            shadow.power_up(b"\x02\x01\x00\x01\xc9\xc3\x80")
+            shadow.set_properties(MODEM, DATA_RATE, b"\x00\x27\x10")
+            shadow.set_properties(MODEM, 0x00, b"\x03")
+            shadow.gpio_pin_cfg(b"\x13\x21\x20\x00\x00\x00\x00\x00")
+        for shadow in (whole, later):
+            shadow.set_properties(MODEM, DATA_RATE + 1, b"\x4e")
+            shadow.gpio_pin_cfg(b"\x13\x00\x03\x00\x00\x00\x00\x00")
+        before.apply(later)
+        self.assert_same_configuration(before, whole)
+        self.assertEqual(before.property_value("MODEM_DATA_RATE"), 0x4E10)
+
+    def test_power_up_in_later_shadow(self):
+        whole = RadioShadow()
+        before = RadioShadow()
+        later = RadioShadow()
+        for shadow in (whole, before):
+            shadow.power_up(b"\x02\x01\x00\x01\xc9\xc3\x80")
+            shadow.set_properties(MODEM, DATA_RATE, b"\x00\x27\x10")
+            shadow.gpio_pin_cfg(b"\x13\x21\x20\x00\x00\x00\x00\x00")
+        for shadow in (whole, later):
+            # Without XO_FREQ, the one from before stays
+            shadow.power_up(b"\x02\x01")
+            shadow.set_properties(MODEM, 0x00, b"\x03")
+        before.apply(later)
+        self.assert_same_configuration(before, whole)
+        self.assertIsNone(before.property_value("MODEM_DATA_RATE"))
+        self.assertEqual(before.xo_frequency, 30000000)
+
+
+if __name__ == "__main__":
+    unittest.main()
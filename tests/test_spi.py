@@ -0,0 +1,167 @@
+import os
+import tempfile
+import unittest
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is only needed for raw digital captures
+    np = None
+
+if np is not None:
+    from si4467_spi import DigitalChannel, SpiMode, decode_spi, decode_spi_chunks, read_digital_export, spi_frames
+
+# Bit period of the generated SCLK, seconds
+BIT = 1e-6
+TRANSACTIONS = [([0x44, 0x00, 0x00], [0xFF, 0xFF, 0xA5]), ([0x66] + list(range(1, 20)), [0xFF] * 20),
+                ([0x12, 0x20, 0x03, 0x03], [0xC3, 0x3C, 0x81, 0x7E]), ([0x77, 0x00], [0x00, 0x80])]
+
+
+def channel(initial_state: int, levels: List[Tuple[float, int]], begin_time: float,
+            end_time: float) -> "DigitalChannel":
+    """Channel changing to each (time, level) in turn, starting at `initial_state`."""
+    transitions = []
+    state = initial_state
+    for time, level in levels:
+        if level != state:
+            transitions.append(time)
+            state = level
+    return DigitalChannel(initial_state, np.array(transitions, dtype=np.float64), begin_time, end_time)
+
+
+def spi_channels(transactions: Sequence[Tuple[Sequence[int], Sequence[int]]],
+                 mode: "SpiMode") -> Tuple["DigitalChannel", ...]:
+    """NSEL, SCLK, MOSI and MISO of the transactions, MSB first."""
+    nsel: List[Tuple[float, int]] = []
+    sclk: List[Tuple[float, int]] = []
+    data: Tuple[List[Tuple[float, int]], List[Tuple[float, int]]] = ([], [])
+    time = 2.0
+    for mosi, miso in transactions:
+        nsel.append((time * BIT, 0))
+        for index, values in enumerate(zip(mosi, miso)):
+            for bit in range(8):
+                start = time + 1 + index * 8 + bit
+                leading, trailing = start + 0.25, start + 0.75
+                sclk += [(leading * BIT, 1 - mode.cpol), (trailing * BIT, mode.cpol)]
+                # Data changes halfway between the edges, after the sampling edge of the bit before (CPHA 0: leading,
+                # CPHA 1: trailing), so that the other edge reads the neighbouring bit
+                change = start + 0.5 if mode.cpha else start - 0.5
+                for levels, value in zip(data, values):
+                    levels.append((change * BIT, (value >> (7 - bit)) & 1))
+        time += 1 + len(mosi) * 8
+        nsel.append((time * BIT, 1))
+        time += 3
+    end_time = time * BIT
+    return (channel(1, nsel, 0.0, end_time), channel(mode.cpol, sclk, 0.0, end_time),
+            channel(0, data[0], 0.0, end_time), channel(0, data[1], 0.0, end_time))
+
+
+def transactions_of(frames) -> List[Tuple[List[int], List[int]]]:
+    decoded = []
+    for frame in frames:
+        if frame.type == "enable":
+            decoded.append(([], []))
+        elif frame.type == "result":
+            decoded[-1][0].append(frame.data["mosi"][0])
+            decoded[-1][1].append(frame.data["miso"][0])
+    return decoded
+
+
+def expected(transactions) -> List[Tuple[List[int], List[int]]]:
+    return [(list(mosi), list(miso)) for mosi, miso in transactions]
+
+
+@unittest.skipIf(np is None, "needs NumPy")
+class DecodeSpiTest(unittest.TestCase):
+    def test_all_modes(self):
+        for cpol in (0, 1):
+            for cpha in (0, 1):
+                with self.subTest(cpol=cpol, cpha=cpha):
+                    mode = SpiMode(cpol, cpha)
+                    spi_bytes = decode_spi(*spi_channels(TRANSACTIONS, mode), mode)
+                    self.assertEqual(transactions_of(spi_frames(spi_bytes)), expected(TRANSACTIONS))
+                    # Sampling on the other edge reads the neighbouring bits
+                    other = SpiMode(cpol, 1 - cpha)
+                    spi_bytes = decode_spi(*spi_channels(TRANSACTIONS, mode), other)
+                    self.assertNotEqual(transactions_of(spi_frames(spi_bytes)), expected(TRANSACTIONS))
+
+    def test_incomplete_transfer_is_dropped(self):
+        nsel, sclk, mosi, miso = spi_channels([([0x02, 0x01], [0xFF, 0xFF])], SpiMode())
+        # Cut SCLK after 12 of the 16 bits
+        sclk = DigitalChannel(sclk.initial_state, sclk.transitions[:24], sclk.begin_time, sclk.end_time)
+        spi_bytes = decode_spi(nsel, sclk, mosi, miso)
+        self.assertEqual(transactions_of(spi_frames(spi_bytes)), [([0x02], [0xFF])])
+
+    def test_nsel_low_at_capture_start(self):
+        nsel, sclk, mosi, miso = spi_channels(TRANSACTIONS, SpiMode())
+        # Capture starts after NSEL was asserted for the first transaction, before its first SCLK edge
+        begin_time = nsel.transitions[0] + 0.5 * BIT
+        nsel = DigitalChannel(0, nsel.transitions[1:], begin_time, nsel.end_time)
+        channels = [nsel] + [DigitalChannel(int(data.states_at(np.array([begin_time]))[0]),
+                                            data.transitions[data.transitions > begin_time], begin_time, data.end_time)
+                             for data in (sclk, mosi, miso)]
+        frames = list(spi_frames(decode_spi(*channels)))
+        self.assertEqual(frames[0].type, "enable")
+        self.assertEqual(frames[0].start_time, begin_time)
+        self.assertEqual(transactions_of(frames), expected(TRANSACTIONS))
+        for chunk_transitions in (5, 40):
+            frames = [frame for spi_bytes in decode_spi_chunks(*channels, chunk_transitions=chunk_transitions)
+                      for frame in spi_frames(spi_bytes)]
+            self.assertEqual(transactions_of(frames), expected(TRANSACTIONS))
+
+
+def write_digital_export(path: str, digital: "DigitalChannel") -> None:
+    """Logic 2 binary digital export (digital_N.bin) of a channel."""
+    header = np.zeros(1, dtype=[("id", "S8"), ("version", "<i4"), ("type", "<i4"), ("initial_state", "<u4"),
+                                ("begin_time", "<f8"), ("end_time", "<f8"), ("transition_count", "<u8")])
+    header[0] = (b"<SALEAE>", 0, 0, digital.initial_state, digital.begin_time, digital.end_time,
+                 len(digital.transitions))
+    with open(path, "wb") as file:
+        file.write(header.tobytes())
+        file.write(digital.transitions.astype("<f8").tobytes())
+
+
+@unittest.skipIf(np is None, "needs NumPy")
+class DecodeSpiChunksTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_bytes_straddling_chunk_boundaries(self):
+        mode = SpiMode(1, 1)
+        channels = spi_channels(TRANSACTIONS * 3, mode)
+        whole = list(spi_frames(decode_spi(*channels, mode)))
+        # Piece boundaries land in the middle of bytes and transactions, and right at their end
+        for chunk_transitions in (1, 7, 15, 16, 17, 100, 1000):
+            with self.subTest(chunk_transitions=chunk_transitions):
+                pieces = list(decode_spi_chunks(*channels, mode, chunk_transitions=chunk_transitions))
+                frames = [frame for spi_bytes in pieces for frame in spi_frames(spi_bytes)]
+                self.assertEqual([(frame.type, frame.start_time, frame.end_time, frame.data) for frame in frames],
+                                 [(frame.type, frame.start_time, frame.end_time, frame.data) for frame in whole])
+                if chunk_transitions < 100:
+                    self.assertGreater(len(pieces), 1)
+
+    def test_memory_mapped_exports(self):
+        channels = spi_channels(TRANSACTIONS, SpiMode())
+        paths = [os.path.join(self.directory, f"digital_{index}.bin") for index in range(4)]
+        for path, digital in zip(paths, channels):
+            write_digital_export(path, digital)
+        mapped = [read_digital_export(path) for path in paths]
+        self.assertIsInstance(mapped[1].transitions, np.memmap)
+        self.assertEqual((mapped[0].initial_state, mapped[0].end_time), (1, channels[0].end_time))
+        frames = [frame for spi_bytes in decode_spi_chunks(*mapped, chunk_transitions=20)
+                  for frame in spi_frames(spi_bytes)]
+        self.assertEqual(transactions_of(frames), expected(TRANSACTIONS))
+
+    def test_not_an_export(self):
+        path = os.path.join(self.directory, "digital_0.bin")
+        with open(path, "wb") as file:
+            file.write(b"\x00" * 64)
+        with self.assertRaisesRegex(ValueError, "not a Logic 2 binary export"):
+            read_digital_export(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
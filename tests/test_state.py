@@ -0,0 +1,96 @@
+import unittest
+
+from si4467_offline import create_analyzer, decode_frames, read_spi_csv
+from si4467_state import StateTimeline
+from si4467_status import STATE_NO_CHANGE, STATE_READY, STATE_RX, STATE_SLEEP, STATE_TX
+from test_offline import spi_csv
+
+
+def timeline() -> StateTimeline:
+    # READY from 1 s, TX from 2 s, READY from 3 s, RX from 5 s
+    states = StateTimeline()
+    for state, time in ((STATE_READY, 1.0), (STATE_TX, 2.0), (STATE_READY, 3.0), (STATE_RX, 5.0)):
+        states.record(state, time)
+    return states
+
+
+class RecordTest(unittest.TestCase):
+    def test_returns_ended_interval(self):
+        states = StateTimeline()
+        self.assertIsNone(states.record(STATE_READY, 1.0))
+        self.assertEqual(states.record(STATE_TX, 2.0), (STATE_READY, 1.0, 2.0))
+        self.assertEqual(states.current_interval(), (STATE_TX, 2.0))
+
+    def test_ignores_no_change_and_same_state(self):
+        states = StateTimeline()
+        states.record(STATE_READY, 1.0)
+        self.assertIsNone(states.record(STATE_NO_CHANGE, 2.0))
+        self.assertIsNone(states.record(STATE_READY, 3.0))
+        # Reserved state values
+        self.assertIsNone(states.record(0x0F, 4.0))
+        self.assertEqual((len(states), states.current_interval()), (1, (STATE_READY, 1.0)))
+
+    def test_without_history(self):
+        states = StateTimeline(keep_history=False)
+        states.record(STATE_READY, 1.0)
+        self.assertEqual(states.record(STATE_TX, 2.0), (STATE_READY, 1.0, 2.0))
+        self.assertEqual((len(states), states.current_interval()), (1, (STATE_TX, 2.0)))
+        self.assertEqual(list(states.intervals()), [(STATE_TX, 2.0, None)])
+
+
+class QueryTest(unittest.TestCase):
+    def test_state_at(self):
+        states = timeline()
+        self.assertIsNone(states.state_at(0.5))
+        self.assertEqual(states.state_at(1.0), STATE_READY)
+        self.assertEqual(states.state_at(2.0), STATE_TX)
+        self.assertEqual(states.state_at(2.999), STATE_TX)
+        self.assertEqual(states.state_at(100.0), STATE_RX)
+
+    def test_intervals(self):
+        self.assertEqual(list(timeline().intervals()), [(STATE_READY, 1.0, 2.0), (STATE_TX, 2.0, 3.0),
+                                                        (STATE_READY, 3.0, 5.0), (STATE_RX, 5.0, None)])
+
+    def test_intervals_clipped_to_range(self):
+        self.assertEqual(list(timeline().intervals(2.5, 6.0)), [(STATE_TX, 2.5, 3.0), (STATE_READY, 3.0, 5.0),
+                                                                (STATE_RX, 5.0, 6.0)])
+        self.assertEqual(list(timeline().intervals(0.0, 1.5)), [(STATE_READY, 1.0, 1.5)])
+
+    def test_state_entered_at_end_is_outside(self):
+        self.assertEqual(list(timeline().intervals(2.0, 3.0)), [(STATE_TX, 2.0, 3.0)])
+        self.assertEqual(list(timeline().intervals(end=5.0))[-1], (STATE_READY, 3.0, 5.0))
+
+    def test_durations(self):
+        states = timeline()
+        self.assertEqual(states.durations(end=6.0), {"READY": 3.0, "TX": 1.0, "RX": 1.0})
+        # Without an end the current state has not ended yet
+        self.assertEqual(states.durations(), {"READY": 3.0, "TX": 1.0})
+        self.assertEqual(states.durations(2.5, 4.0), {"TX": 0.5, "READY": 1.0})
+        self.assertEqual(StateTimeline().durations(end=1.0), {})
+
+
+class AnalyzerStateTest(unittest.TestCase):
+    def test_sleep_ended_by_spi_activity(self):
+        # CHANGE_STATE to SLEEP, then PART_INFO wakes the chip up, then CHANGE_STATE to READY
+        frames = read_spi_csv(spi_csv([([0x34, STATE_SLEEP], [0xFF] * 2), ([0x01], [0xFF]),
+                                       ([0x34, STATE_READY], [0xFF] * 2)], gap=1.0).splitlines())
+        analyzer = create_analyzer()
+        names = [frame.data["name"] for frame in decode_frames(frames, analyzer) if frame.type == "state"]
+        self.assertEqual(names, ["SLEEP", "SPI_ACTIVE"])
+        self.assertEqual(analyzer.states.current, STATE_READY)
+        # Only the current state is kept unless asked for
+        self.assertEqual(len(analyzer.states), 1)
+
+    def test_history(self):
+        frames = read_spi_csv(spi_csv([([0x34, STATE_READY], [0xFF] * 2), ([0x34, STATE_TX], [0xFF] * 2),
+                                       ([0x34, STATE_READY], [0xFF] * 2)], gap=1.0).splitlines())
+        analyzer = create_analyzer()
+        analyzer.record_state_history()
+        for _ in decode_frames(frames, analyzer):
+            pass
+        self.assertEqual([state for state, _, _ in analyzer.states.intervals()], [STATE_READY, STATE_TX, STATE_READY])
+        self.assertEqual(analyzer.states.state_at(1.5), STATE_TX)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from si4467_offline import create_analyzer, decode_frames, read_spi_csv
+from si4467_status import (CHIP_BITS, CHIP_PAYLOADS, CMD_ERROR_PAYLOADS, HEX_BYTE, INT_BITS, INT_PAYLOADS, MODEM_BITS,
+                           MODEM_PAYLOADS, PH_BITS, PH_PACKET_RX, PH_PACKET_SENT, PH_PAYLOADS, RSSI_PAYLOADS,
+                           STATE_PAYLOADS, hex_bytes, render_bits)
+from test_offline import spi_csv
+
+
+def payloads(transactions) -> dict:
+    """Payload of every reply byte frame by name, decoded per byte."""
+    frames = decode_frames(read_spi_csv(spi_csv(transactions).splitlines()), create_analyzer())
+    return {frame.data["name"]: frame.data["payload"] for frame in frames
+            if frame.type == "command_payload" and frame.data["name"].startswith("<")}
+
+
+class StatusTablesTest(unittest.TestCase):
+    def test_bit_tables(self):
+        for table, bits in ((INT_PAYLOADS, INT_BITS), (PH_PAYLOADS, PH_BITS), (MODEM_PAYLOADS, MODEM_BITS),
+                            (CHIP_PAYLOADS, CHIP_BITS)):
+            self.assertEqual(table, tuple(render_bits(value, bits) for value in range(256)))
+        self.assertEqual(PH_PAYLOADS[PH_PACKET_SENT | PH_PACKET_RX], "0x30 (PACKET_SENT | PACKET_RX)")
+        self.assertEqual(PH_PAYLOADS[0], "0x00")
+        self.assertEqual(INT_PAYLOADS[0x08], "0x08")
+
+    def test_state_table(self):
+        self.assertEqual(STATE_PAYLOADS[0x07], "0x07 (TX)")
+        # Upper nibble is reserved
+        self.assertEqual(STATE_PAYLOADS[0x13], "0x13 (READY)")
+        self.assertEqual(STATE_PAYLOADS[0x00], "0x00")
+        self.assertEqual(STATE_PAYLOADS[0x0F], "0x0f")
+
+    def test_rssi_is_raw(self):
+        self.assertEqual(RSSI_PAYLOADS[0x80], "0x80 (raw 64.0 dB, uncompensated)")
+
+    def test_command_errors(self):
+        self.assertEqual(CMD_ERROR_PAYLOADS[0x11], "0x11 (BAD_ARG)")
+        self.assertEqual(CMD_ERROR_PAYLOADS[0x05], "0x05")
+
+    def test_hex_bytes(self):
+        data = bytes((0x00, 0x0A, 0xFF))
+        self.assertEqual(hex_bytes(data), " ".join(HEX_BYTE[value] for value in data))
+        self.assertEqual(hex_bytes(b""), "")
+
+
+class StatusRepliesTest(unittest.TestCase):
+    def test_int_status_reply(self):
+        decoded = payloads([([0x20, 0x00, 0x00, 0x00], [0xFF] * 4),
+                            ([0x44] + [0x00] * 9, [0xFF, 0xFF, 0x01, 0x01, 0x30, 0x10, 0x00, 0x00, 0x14, 0x04])])
+        self.assertEqual(decoded["< INT_PEND"], "0x01 (PH_INT)")
+        self.assertEqual(decoded["< PH_PEND"], "0x30 (PACKET_SENT | PACKET_RX)")
+        self.assertEqual(decoded["< PH_STATUS"], "0x10 (PACKET_RX)")
+        self.assertEqual(decoded["< CHIP_PEND"], "0x14 (STATE_CHANGE | CHIP_READY)")
+
+    def test_chip_status_reply(self):
+        decoded = payloads([([0x23, 0x00], [0xFF] * 2),
+                            ([0x44] + [0x00] * 6, [0xFF, 0xFF, 0x08, 0x08, 0x11, 0x31, 0x00])])
+        self.assertEqual(decoded["< CMD_ERR_STATUS"], "0x11 (BAD_ARG)")
+        self.assertEqual(decoded["< CMD_ERR_CMD_ID"], "0x31 (START_TX)")
+
+    def test_modem_status_reply(self):
+        decoded = payloads([([0x22, 0x00], [0xFF] * 2),
+                            ([0x44] + [0x00] * 10, [0xFF, 0xFF, 0x00, 0x00, 0x50, 0x60, 0x00, 0x00, 0x00, 0x00, 0x00])])
+        self.assertEqual(decoded["< CURR_RSSI"], "0x50 (raw 40.0 dB, uncompensated)")
+        self.assertEqual(decoded["< LATCH_RSSI"], "0x60 (raw 48.0 dB, uncompensated)")
+        self.assertEqual(decoded["< INFO_FLAGS"], "0x00")
+
+
+if __name__ == "__main__":
+    unittest.main()